@@ -12,6 +12,9 @@ import sys
 import os
 from pathlib import Path
 from config import get_bot_token, validate_token
+from utils.sim_executor import sim_executor
+from utils.leaderboard import leaderboard_service
+from utils.pvp_boss_manager import pvp_boss_manager
 
 # Setup logging first
 logging.basicConfig(
@@ -436,7 +439,7 @@ class KoKoroMichiBot(commands.Bot):
                 'commands.seasonal_events', 'commands.server_config',
                 'commands.server_setup', 'commands.store', 'commands.summon',
                 'commands.traits', 'commands.upgrade', 'commands.contests',
-                'commands.lore'
+                'commands.lore', 'commands.leaderboard', 'commands.tournament'
             ]
 
             # Load each command module
@@ -459,6 +462,13 @@ class KoKoroMichiBot(commands.Bot):
         except Exception as e:
             logger.error(f"Error in setup_hook: {e}")
 
+    async def close(self):
+        """Stop the simulation worker processes and flush leaderboards and raid state before disconnecting"""
+        sim_executor.shutdown()
+        leaderboard_service.save()
+        pvp_boss_manager.flush_active_bosses(force=True)
+        await super().close()
+
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f"🤖 {self.user} is online!")
@@ -8,6 +8,11 @@ from datetime import datetime, timedelta
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import ADMIN_USER_ID
+from utils.affinity_manager import affinity_manager
+from utils.collection_stats import collection_stats
+from utils.content_index import content_index
+from utils.sim_executor import sim_executor
+from utils.rating_system import rating_system
 try:
     from utils.helpers import format_number
 except ImportError:
@@ -549,6 +554,8 @@ class AdminCommands(commands.Cog):
             
             if removed_waifu:
                 data_manager.save_user_data(str(member.id), user_data)
+                affinity_manager.remove_team_member(str(member.id), removed_waifu.get("name", ""))
+                collection_stats.remove_waifu(str(member.id), removed_waifu)
                 
                 embed = self.embed_builder.success_embed(
                     "Character Removed",
@@ -619,6 +626,8 @@ class AdminCommands(commands.Cog):
             claimed_waifus.append(new_waifu)
             user_data["claimed_waifus"] = claimed_waifus
             data_manager.save_user_data(str(member.id), user_data)
+            affinity_manager.add_team_member(str(member.id), new_waifu.get("name", ""))
+            collection_stats.add_waifus(str(member.id), [new_waifu])
             
             embed = self.embed_builder.success_embed(
                 "Character Added",
@@ -679,6 +688,7 @@ class AdminCommands(commands.Cog):
                 if waifu.get("name", "").lower() == character_name.lower():
                     old_affection = waifu.get("affection", 0)
                     waifu["affection"] = affection_level
+                    collection_stats.update_waifu(str(member.id), waifu)
                     character_found = True
                     break
             
@@ -725,19 +735,7 @@ class AdminCommands(commands.Cog):
         
         try:
             # Check if relic exists
-            relic_data = data_manager.get_game_data("relics")
-            if not relic_data:
-                # Try loading from relic files
-                from pathlib import Path
-                relic_file = Path("data/relics") / f"{relic_name}.json"
-                if relic_file.exists():
-                    import json
-                    with open(relic_file, 'r') as f:
-                        relic_info = json.load(f)
-                else:
-                    relic_info = {"name": relic_name, "description": "Admin-given relic"}
-            else:
-                relic_info = relic_data.get(relic_name, {"name": relic_name, "description": "Admin-given relic"})
+            relic_info = content_index.get_relic(relic_name) or {"name": relic_name, "description": "Admin-given relic"}
             
             user_data = data_manager.get_user_data(str(member.id))
             inventory = user_data.setdefault("inventory", {})
@@ -772,6 +770,126 @@ class AdminCommands(commands.Cog):
             await ctx.send(embed=embed)
             print(f"Add relic error: {e}")
     
+    @admin_group.command(name="rebuildaffinity")
+    async def rebuild_affinity(self, ctx, member: discord.Member):
+        """Rebuild a user's team cohesion aggregate from raw affinity data"""
+        if not self.is_admin(ctx.author.id):
+            embed = self.embed_builder.error_embed(
+                "Access Denied",
+                "You don't have permission to use admin commands."
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        try:
+            user_id = str(member.id)
+            user_data = data_manager.get_user_data(user_id)
+            names = [waifu.get("name", "") for waifu in user_data.get("claimed_waifus", [])]
+            
+            previous = affinity_manager.get_team_cohesion(user_id)
+            aggregate = affinity_manager.rebuild_team_cohesion(user_id, names)
+            rebuilt = affinity_manager.get_team_cohesion(user_id)
+            
+            # Full pairwise scan to confirm the rebuilt aggregate
+            total = 0
+            for i, waifu_a in enumerate(names):
+                for waifu_b in names[i+1:]:
+                    total += affinity_manager.get_affinity(user_id, waifu_a, waifu_b)
+            verified = total / aggregate["pairs"] if aggregate["pairs"] else None
+            
+            def format_avg(value):
+                return f"{value:.2f}" if value is not None else "N/A"
+            
+            drift = abs(previous - rebuilt) if previous is not None and rebuilt is not None else 0.0
+            embed = self.embed_builder.success_embed(
+                "Affinity Aggregate Rebuilt",
+                f"Rebuilt team cohesion for {member.mention}\n"
+                f"Collection: {len(names)} waifus ({format_number(aggregate['pairs'])} pairs)\n"
+                f"Previous: {format_avg(previous)} → Rebuilt: {format_avg(rebuilt)} (drift {drift:.4f})\n"
+                f"Pairwise check: {format_avg(verified)}"
+            )
+            
+            # Log admin action
+            await self.log_admin_action(ctx, f"Rebuilt affinity aggregate for {member.display_name}")
+            
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Rebuild Affinity Error",
+                "Unable to rebuild affinity data. Please try again."
+            )
+            await ctx.send(embed=embed)
+            print(f"Rebuild affinity error: {e}")
+    
+    @admin_group.command(name="simstats")
+    async def simulation_stats(self, ctx):
+        """Show simulation worker pool utilization and job counters"""
+        if not self.is_admin(ctx.author.id):
+            embed = self.embed_builder.error_embed(
+                "Access Denied",
+                "You don't have permission to use admin commands."
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        metrics = sim_executor.get_metrics()
+        embed = self.embed_builder.info_embed(
+            "Simulation Pool",
+            f"Workers: {metrics['workers']} ({'running' if metrics['pool_running'] else 'idle'})\n"
+            f"Utilization: {metrics['utilization']:.1%}"
+        )
+        embed.add_field(
+            name="📥 Queue",
+            value=f"In flight: {metrics['in_flight']} (peak {metrics['max_in_flight']})\n"
+                  f"Queued: {metrics['queued']}/{metrics['queue_limit']}",
+            inline=True
+        )
+        embed.add_field(
+            name="📊 Jobs",
+            value=f"Pool: {format_number(metrics['completed'])}/{format_number(metrics['submitted'])} completed\n"
+                  f"In-process: {format_number(metrics['inline'])}\n"
+                  f"Timeouts: {metrics['timeouts']} | Rejected: {metrics['rejected']} | Failed: {metrics['failures']}",
+            inline=True
+        )
+        embed.add_field(
+            name="⏱️ CPU Time",
+            value=f"Workers: {metrics['worker_seconds']:.1f}s\nIn-process: {metrics['inline_seconds']:.1f}s",
+            inline=True
+        )
+        
+        await self.log_admin_action(ctx, "Viewed simulation pool stats")
+        await ctx.send(embed=embed)
+    
+    @admin_group.command(name="ratingperiod")
+    async def close_rating_period(self, ctx):
+        """Close the current PvP rating period now and apply all logged duels"""
+        if not self.is_admin(ctx.author.id):
+            embed = self.embed_builder.error_embed(
+                "Access Denied",
+                "You don't have permission to use admin commands."
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        try:
+            result = rating_system.process_period()
+            embed = self.embed_builder.success_embed(
+                "Rating Period Closed",
+                f"Period {result['period']}: {format_number(result['matches'])} duels rated\n"
+                f"Active players: {format_number(result['active'])} of {format_number(result['players'])}"
+            )
+            await self.log_admin_action(ctx, f"Closed rating period {result['period']}")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Rating Error",
+                f"Failed to process rating period: {str(e)}"
+            )
+            await ctx.send(embed=embed)
+            print(f"Rating period error: {e}")
+    
     @admin_group.command(name="help", aliases=["adminhelp"])
     async def admin_help(self, ctx):
         """Display all admin commands in a comprehensive embed"""
@@ -805,13 +923,16 @@ class AdminCommands(commands.Cog):
                 value="• `!admin addwaifu <user> <character>` - Add character to collection\n"
                       "• `!admin banwaifu <user> <character>` - Remove character from collection\n"
                       "• `!admin editaffection <user> <character> <level>` - Edit affection (0-100)\n"
-                      "• `!admin addrelic <user> <relic>` - Give relic to user",
+                      "• `!admin addrelic <user> <relic>` - Give relic to user\n"
+                      "• `!admin rebuildaffinity <user>` - Rebuild team cohesion aggregate",
                 inline=False
             )
             
             help_embed.add_field(
                 name="📊 Bot Management",
                 value="• `!admin stats` - Show detailed bot statistics\n"
+                      "• `!admin simstats` - Show simulation pool utilization\n"
+                      "• `!admin ratingperiod` - Close the PvP rating period now\n"
                       "• `!admin backup` - Create data backup\n"
                       "• `!admin announce <message>` - Make server announcement\n"
                       "• `!admin erase [amount]` - Clear channel messages (preserve pinned)",
@@ -9,7 +9,10 @@ from datetime import datetime, timedelta
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import RARITY_TIERS, BATTLE_XP_BASE, BATTLE_GOLD_BASE
-from utils.helpers import format_number, calculate_battle_power
+from utils.helpers import format_number
+from utils.power_cache import get_waifu_power
+from utils.leaderboard import leaderboard_service
+from utils.matchmaking import matchmaking_service
 
 class ArenaCommands(commands.Cog):
     """Competitive arena battles with rankings and rewards"""
@@ -28,6 +31,7 @@ class ArenaCommands(commands.Cog):
             {"name": "Arena Champion", "level": 50, "power_multiplier": 2.0},
             {"name": "Legendary Warrior", "level": 75, "power_multiplier": 3.0}
         ]
+        matchmaking_service.register_npc_templates("arena", self.arena_opponents)
     
     @commands.command(name="arena", aliases=["fight", "duel"])
     async def arena_battle(self, ctx, *, character_name: str = None):
@@ -72,9 +76,9 @@ class ArenaCommands(commands.Cog):
             self.active_battles.add(str(ctx.author.id))
             
             try:
-                # Select arena opponent based on character level
+                # Select arena opponent: another player's champion of similar power, else an NPC by level
                 char_level = character.get("level", 1)
-                opponent = self.select_arena_opponent(char_level)
+                opponent = self.select_arena_opponent(char_level, character, str(ctx.author.id))
                 
                 # Show battle preparation
                 prep_embed = await self.create_battle_preparation_embed(character, opponent)
@@ -143,9 +147,18 @@ class ArenaCommands(commands.Cog):
             highest_rank = arena_stats.get("highest_rank", "Unranked")
             current_streak = arena_stats.get("current_streak", 0)
             
+            rankings_text = f"**Points:** {ranking_points:,}\n**Best Rank:** {highest_rank}\n**Win Streak:** {current_streak}"
+            global_rank, _, global_total = leaderboard_service.get_rank(ctx.author.id, "arena")
+            if global_rank is not None:
+                rankings_text += f"\n**Global Rank:** #{global_rank:,} of {global_total:,}"
+            if ctx.guild:
+                guild_rank, _, guild_total = leaderboard_service.get_rank(ctx.author.id, "arena", ctx.guild.id)
+                if guild_rank is not None:
+                    rankings_text += f"\n**Server Rank:** #{guild_rank:,} of {guild_total:,}"
+
             embed.add_field(
                 name="🏆 Rankings",
-                value=f"**Points:** {ranking_points:,}\n**Best Rank:** {highest_rank}\n**Win Streak:** {current_streak}",
+                value=rankings_text,
                 inline=True
             )
             
@@ -173,6 +186,7 @@ class ArenaCommands(commands.Cog):
                     inline=False
                 )
             
+            embed.set_footer(text=f"Use '{ctx.clean_prefix}leaderboard arena' to see the arena leaderboard")
             await ctx.send(embed=embed)
             await self.log_arena_activity(ctx, None, None, {"type": "stats_check"})
             
@@ -192,19 +206,23 @@ class ArenaCommands(commands.Cog):
                 return char
         return None
     
-    def select_arena_opponent(self, player_level: int) -> Dict:
-        """Select appropriate arena opponent based on player level"""
-        # Filter opponents within reasonable level range
-        suitable_opponents = [
-            opp for opp in self.arena_opponents 
-            if abs(opp["level"] - player_level) <= 20
-        ]
-        
-        if not suitable_opponents:
-            # Fallback to closest level opponent
-            suitable_opponents = [min(self.arena_opponents, key=lambda x: abs(x["level"] - player_level))]
+    def select_arena_opponent(self, player_level: int, character: Optional[Dict] = None,
+                              user_id: Optional[str] = None) -> Dict:
+        """Select an arena opponent: a ghost of a similarly powered player team, or an NPC near the player's level"""
+        if character is not None:
+            char_power = max(1, get_waifu_power(character))
+            ghost = matchmaking_service.find_player_opponent(char_power, exclude_user=user_id)
+            if ghost:
+                champion = ghost["champion"]
+                return {
+                    "name": f"👻 {champion.get('name', 'Unknown')}",
+                    "level": champion.get("level", 1),
+                    "power_multiplier": round(ghost["power"] / char_power, 2),
+                    "ghost_of": ghost["user_id"]
+                }
         
-        return random.choice(suitable_opponents)
+        # Within 20 levels, or the closest template
+        return matchmaking_service.find_npc("arena", player_level)
     
     async def create_battle_preparation_embed(self, character: Dict, opponent: Dict) -> discord.Embed:
         """Create battle preparation embed"""
@@ -217,7 +235,7 @@ class ArenaCommands(commands.Cog):
         # Player character info
         char_name = character.get("name", "Unknown")
         char_level = character.get("level", 1)
-        char_power = calculate_battle_power(character)
+        char_power = get_waifu_power(character)
         
         embed.add_field(
             name="🛡️ Your Champion",
@@ -252,7 +270,7 @@ class ArenaCommands(commands.Cog):
     
     async def execute_arena_battle(self, character: Dict, opponent: Dict) -> Dict:
         """Execute arena battle and return results"""
-        char_power = calculate_battle_power(character)
+        char_power = get_waifu_power(character)
         opp_power = int(char_power * opponent["power_multiplier"])
         
         # Battle simulation with some randomness
@@ -1,7 +1,7 @@
 # Battle System Commands for KoKoroMichi Advanced Bot
 import discord
 from discord.ext import commands
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List
 import random
 import asyncio
 import logging
@@ -16,10 +16,19 @@ from utils.helpers import (
 )
 from utils.advanced_combat import BattleEngine
 from utils.guild_manager import GuildManager
-from utils.affinity_manager import AffinityManager
+from utils.affinity_manager import affinity_manager
 from utils.pet_manager import PetManager
 from utils.dream_manager import DreamManager
 from utils.channel_restriction import check_channel_restriction
+from utils.rng_service import rng_service, RNG_BATTLE
+from utils.buff_snapshot import BuffSnapshot, BuffManager
+from utils.win_estimator import format_win_chance
+from utils.sim_executor import sim_executor
+from utils.matchmaking import matchmaking_service
+from utils.power_cache import get_waifu_power
+from utils.battle_replay import (
+    replay_store, run_duel, iter_duel_log, pack_fighter, unpack_fighter, decode_events
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +43,21 @@ class BattleCommands(commands.Cog):
         # Initialize advanced combat systems
         self.battle_engine = BattleEngine()
         self.guild_manager = GuildManager()
-        self.affinity_manager = AffinityManager()
+        self.affinity_manager = affinity_manager
         self.pet_manager = PetManager()
         self.dream_manager = DreamManager()
+        self.buff_manager = BuffManager(
+            self.battle_engine, self.guild_manager, self.pet_manager,
+            self.dream_manager, self.affinity_manager
+        )
+        data_manager.add_save_listener(self.buff_manager.invalidate_user)
         
         # Load NPC names for battles
         self.npc_names = self.load_npc_names()
+
+    def cog_unload(self):
+        """Stop invalidating this cog's buff snapshots on profile saves"""
+        data_manager.remove_save_listener(self.buff_manager.invalidate_user)
     
     def load_npc_names(self) -> List[str]:
         """Load NPC names for battles"""
@@ -109,6 +127,9 @@ class BattleCommands(commands.Cog):
                     # Use strongest character
                     player_character = max(user_waifus, key=lambda c: c.get("potential", 0))
                 
+                # Seeded stream for this battle (logged with the result for replays)
+                rng = rng_service.stream(ctx.author.id, RNG_BATTLE)
+                
                 # Determine opponent
                 if target and not target.bot:
                     # PvP battle
@@ -128,13 +149,13 @@ class BattleCommands(commands.Cog):
                     is_pvp = True
                 else:
                     # PvE battle
-                    opponent_character = self.generate_npc_opponent(player_character)
-                    opponent_name = random.choice(self.npc_names)
+                    opponent_character = self.generate_npc_opponent(player_character, rng)
+                    opponent_name = rng.choice(self.npc_names)
                     is_pvp = False
                 
                 # Start battle sequence
                 await self.conduct_battle(ctx, player_character, opponent_character, 
-                                        opponent_name, is_pvp, target)
+                                        opponent_name, is_pvp, target, rng=rng)
                 
             finally:
                 # Remove user from active battles
@@ -174,12 +195,22 @@ class BattleCommands(commands.Cog):
             # Use strongest character
             player_character = max(user_waifus, key=lambda c: c.get("potential", 0))
             
-            # Generate arena opponent (slightly stronger than player)
-            opponent_character = self.generate_arena_opponent(player_character)
-            opponent_name = f"Arena {random.choice(['Champion', 'Challenger', 'Warrior', 'Fighter'])}"
+            rng = rng_service.stream(ctx.author.id, RNG_BATTLE)
+            
+            # Ghost of another player's champion with similar power, else a generated opponent
+            ghost = matchmaking_service.find_player_opponent(get_waifu_power(player_character),
+                                                             exclude_user=str(ctx.author.id), rng=rng)
+            if ghost:
+                opponent_character = dict(ghost["champion"])
+                owner = self.bot.get_user(int(ghost["user_id"]))
+                opponent_name = f"👻 {owner.display_name}'s Ghost" if owner else "👻 Arena Ghost"
+            else:
+                # Generate arena opponent (slightly stronger than player)
+                opponent_character = self.generate_arena_opponent(player_character, rng)
+                opponent_name = f"Arena {rng.choice(['Champion', 'Challenger', 'Warrior', 'Fighter'])}"
             
             await self.conduct_battle(ctx, player_character, opponent_character, 
-                                    opponent_name, False, None, is_arena=True)
+                                    opponent_name, False, None, is_arena=True, rng=rng)
             
         except Exception as e:
             error_embed = self.embed_builder.error_embed(
@@ -189,69 +220,168 @@ class BattleCommands(commands.Cog):
             await ctx.send(embed=error_embed)
             print(f"Arena command error: {e}")
     
+    @commands.command(name="replay", aliases=["battle_replay"])
+    async def replay_command(self, ctx, replay_id: int = None):
+        """Re-render one of your recent battles from its stored replay"""
+        try:
+            user_id = str(ctx.author.id)
+            if replay_id is None:
+                replays = replay_store.list_replays(user_id)
+                if not replays:
+                    embed = self.embed_builder.info_embed(
+                        "No Replays",
+                        "Fight a battle first! Your recent battles can be replayed here."
+                    )
+                    await ctx.send(embed=embed)
+                    return
+                
+                lines = []
+                for replay in replays[:10]:
+                    player_name, opponent_name = replay["fighters"][0][0], replay["fighters"][1][0]
+                    lines.append(f"`#{replay['id']}` {player_name} vs {opponent_name} "
+                                 f"({replay['mode'].upper()}, {replay['rounds']} rounds)")
+                embed = self.embed_builder.create_embed(
+                    title="📼 Recent Battle Replays",
+                    description="\n".join(lines) + "\n\nUse `koko replay <id>` to watch one.",
+                    color=0x9370DB
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            replay = replay_store.get_replay(user_id, replay_id)
+            if not replay:
+                embed = self.embed_builder.error_embed(
+                    "Replay Not Found",
+                    f"No stored replay #{replay_id}. Use `koko replay` to list your recent battles."
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            await ctx.send(embed=self.create_replay_embed(user_id, replay))
+            
+        except Exception as e:
+            error_embed = self.embed_builder.error_embed(
+                "Replay Error",
+                "Unable to load that replay. Please try again later."
+            )
+            await ctx.send(embed=error_embed)
+            print(f"Replay command error: {e}")
+    
+    def create_replay_embed(self, user_id: str, replay: Dict) -> discord.Embed:
+        """Re-render a stored battle and check it reproduces from its seed"""
+        player_name, player_level, player_hp, player_stats = unpack_fighter(replay["fighters"][0])
+        opponent_name, opponent_level, opponent_hp, opponent_stats = unpack_fighter(replay["fighters"][1])
+        events = decode_events(replay["events"])
+        
+        # Re-run the duel from the seed and stored stats; it must match the recorded events
+        rerun = run_duel(
+            self.battle_engine, (lambda: player_stats, lambda: opponent_stats),
+            (player_hp, opponent_hp), rng_service.stream(user_id, RNG_BATTLE, seed=replay["seed"])
+        )
+        reproduced = rerun["events"] == events
+        
+        battle_log = []
+        final_player_hp, final_opponent_hp = player_hp, opponent_hp
+        for _, lines, final_player_hp, final_opponent_hp in iter_duel_log(
+            self.battle_engine, (player_name, opponent_name), (player_stats, opponent_stats),
+            (player_hp, opponent_hp), events
+        ):
+            battle_log.extend(lines)
+        victory = final_player_hp > 0
+        
+        embed = self.embed_builder.create_embed(
+            title=f"📼 Battle Replay #{replay['id']}",
+            description=f"**{player_name}** (Lv.{player_level}) vs **{opponent_name}** (Lv.{opponent_level})\n"
+                        f"{replay['mode'].upper()} battle on {replay['ts'][:10]}",
+            color=0x00FF00 if victory else 0xFF0000
+        )
+        
+        # Full log, split across fields to respect the embed field limit
+        chunks = [""]
+        for line in battle_log:
+            if len(chunks[-1]) + len(line) + 1 > 1000:
+                chunks.append("")
+            chunks[-1] += line + "\n"
+        if len(chunks) > 4:
+            chunks = chunks[:3] + ["..."]
+        for index, chunk in enumerate(chunks):
+            embed.add_field(name="📜 Battle Log" if index == 0 else "📜 (cont.)", value=chunk or "-", inline=False)
+        
+        embed.add_field(
+            name="🏁 Result",
+            value=f"{'🎉 Victory' if victory else '💔 Defeat'} after {replay['rounds']} rounds\n"
+                  f"{player_name}: {final_player_hp} HP\n{opponent_name}: {final_opponent_hp} HP",
+            inline=True
+        )
+        embed.add_field(
+            name="🎲 Seed",
+            value=f"`{replay['seed']}`\n{'✅ Reproduced exactly' if reproduced else '⚠️ Buffs changed mid-battle'}",
+            inline=True
+        )
+        
+        return embed
+    
     async def conduct_battle(self, ctx, player_char: Dict, opponent_char: Dict, 
                            opponent_name: str, is_pvp: bool, target_user: Optional[discord.Member] = None, 
-                           is_arena: bool = False):
+                           is_arena: bool = False, rng=None):
         """Conduct the actual battle sequence"""
+        rng = rng or rng_service.stream(ctx.author.id, RNG_BATTLE)
+        
+        # Initialize battle stats
+        player_max_hp = player_char.get("hp", 100)
+        opponent_max_hp = opponent_char.get("hp", 100)
+        
+        battle_log = []
+        player_damage = opponent_damage = 0
+        
+        # Buffs are computed once per participant for the whole battle
+        player_snapshot = self.buff_manager.create_snapshot(player_char, str(ctx.author.id))
+        opponent_snapshot = self.buff_manager.create_snapshot(
+            opponent_char, str(target_user.id) if is_pvp and target_user else None
+        )
+        
+        # The duel and the win estimate run on their own seeds drawn from the battle stream,
+        # so both can be replayed from it
+        duel_seed = rng.getrandbits(64)
+        estimate_seed = rng.getrandbits(64)
         
         # Create battle setup embed
-        embed = self.create_battle_setup_embed(player_char, opponent_char, opponent_name, is_pvp)
+        win_estimate = await self.estimate_win_chance(player_snapshot, opponent_snapshot, estimate_seed)
+        embed = self.create_battle_setup_embed(player_char, opponent_char, opponent_name, is_pvp, win_estimate)
         battle_msg = await ctx.send(embed=embed)
         
+        duel = run_duel(
+            self.battle_engine,
+            (lambda: self.buff_manager.refresh(player_snapshot).stats,
+             lambda: self.buff_manager.refresh(opponent_snapshot).stats),
+            (player_max_hp, opponent_max_hp),
+            rng_service.stream(ctx.author.id, RNG_BATTLE, seed=duel_seed)
+        )
+        player_hp, opponent_hp, round_num = duel["player_hp"], duel["opponent_hp"], duel["rounds"]
+        
         # Battle preparation animation
         await asyncio.sleep(2)
         
-        # Initialize battle stats
-        player_hp = player_char.get("hp", 100)
-        player_max_hp = player_hp
-        opponent_hp = opponent_char.get("hp", 100)
-        opponent_max_hp = opponent_hp
-        
-        battle_log = []
-        round_num = 1
-        
-        # Battle loop
-        while player_hp > 0 and opponent_hp > 0 and round_num <= 20:  # Max 20 rounds
-            
-            # Player turn - use enhanced damage calculation
-            player_damage, player_combat_log = self.calculate_damage(
-                player_char, opponent_char, str(ctx.author.id) if not is_pvp else None
-            )
-            opponent_hp -= player_damage
-            opponent_hp = max(0, opponent_hp)
-            
-            # Add detailed combat log
-            battle_log.append(f"Round {round_num}: {player_char['name']} deals {player_damage} damage!")
-            for log_entry in player_combat_log:
-                if log_entry:  # Only add non-empty log entries
-                    battle_log.append(f"  {log_entry}")
-            
-            if opponent_hp <= 0:
-                break
-            
-            # Opponent turn
-            opponent_damage, opponent_combat_log = self.calculate_damage(
-                opponent_char, player_char, str(target.id) if is_pvp and target else None
-            )
-            player_hp -= opponent_damage
-            player_hp = max(0, player_hp)
-            
-            battle_log.append(f"Round {round_num}: {opponent_name} deals {opponent_damage} damage!")
-            for log_entry in opponent_combat_log:
-                if log_entry:
-                    battle_log.append(f"  {log_entry}")
-            
-            # Update battle display every few rounds
-            if round_num % 3 == 0:
-                embed = self.create_battle_progress_embed(
-                    player_char, opponent_char, opponent_name,
-                    player_hp, player_max_hp, opponent_hp, opponent_max_hp,
-                    round_num, battle_log[-2:]
-                )
-                await battle_msg.edit(embed=embed)
-                await asyncio.sleep(1)
-            
-            round_num += 1
+        # Play back the battle, updating the display every few rounds
+        for event, lines, current_player_hp, current_opponent_hp in iter_duel_log(
+            self.battle_engine, (player_char['name'], opponent_name),
+            (player_snapshot.stats, opponent_snapshot.stats), (player_max_hp, opponent_max_hp),
+            duel["events"], (player_snapshot.messages, opponent_snapshot.messages)
+        ):
+            turn, actor, _, damage = event[:4]
+            battle_log.extend(lines)
+            if actor == 0:
+                player_damage = damage
+            else:
+                opponent_damage = damage
+                if turn % 3 == 0:
+                    embed = self.create_battle_progress_embed(
+                        player_char, opponent_char, opponent_name,
+                        current_player_hp, player_max_hp, current_opponent_hp, opponent_max_hp,
+                        turn, battle_log[-2:]
+                    )
+                    await battle_msg.edit(embed=embed)
+                    await asyncio.sleep(1)
         
         # Determine winner and rewards
         if player_hp > 0:
@@ -262,29 +392,53 @@ class BattleCommands(commands.Cog):
             victory = False
         
         # Calculate rewards
-        rewards = self.calculate_battle_rewards(victory, opponent_char, is_arena)
+        rewards = self.calculate_battle_rewards(victory, opponent_char, is_arena, rng)
         
         # Get final buff display for the battle result
-        final_buffs = self.get_active_buffs_display(player_char, str(ctx.author.id) if not is_pvp else None)
+        final_buffs = self.buff_manager.refresh(player_snapshot).messages
+        
+        # Compact replay: the duel seed, both fighters' battle stats and the event stream
+        replay_id = replay_store.add_replay(
+            str(ctx.author.id), "arena" if is_arena else "pvp" if is_pvp else "pve", duel_seed,
+            [pack_fighter(player_char['name'], player_char, player_snapshot.stats),
+             pack_fighter(opponent_name, opponent_char, opponent_snapshot.stats)],
+            duel
+        )
         
         # Update user stats
-        await self.update_battle_stats(ctx.author.id, victory, player_damage, opponent_damage, rewards)
+        battle_record = {
+            "character": player_char.get("name", "Unknown"),
+            "opponent": opponent_name,
+            "result": "win" if victory else "lose",
+            "rounds": round_num,
+            "seed": rng_service.get_seed(rng),
+            "replay_id": replay_id,
+            "timestamp": datetime.now().isoformat()
+        }
+        await self.update_battle_stats(str(ctx.author.id), victory, player_damage, opponent_damage,
+                                       rewards, battle_record)
         
         # Create final battle result
         embed = self.create_battle_result_embed(
             player_char, opponent_char, opponent_name, victory, 
             player_hp, opponent_hp, rewards, battle_log, round_num, final_buffs
         )
+        embed.add_field(
+            name="📼 Replay",
+            value=f"Watch again with `koko replay {replay_id}`",
+            inline=False
+        )
         
         await battle_msg.edit(embed=embed)
     
-    def generate_npc_opponent(self, player_char: Dict) -> Dict:
+    def generate_npc_opponent(self, player_char: Dict, rng=None) -> Dict:
         """Generate an NPC opponent based on player character"""
+        rng = rng or random
         player_level = player_char.get("level", 1)
         player_potential = player_char.get("potential", 1000)
         
         # Create opponent with similar but varied stats
-        level_variance = random.randint(-1, 2)
+        level_variance = rng.randint(-1, 2)
         opponent_level = max(1, player_level + level_variance)
         
         # Base stats with some randomness
@@ -293,21 +447,22 @@ class BattleCommands(commands.Cog):
         base_def = player_char.get("def", 30)
         
         return {
-            "name": random.choice(self.npc_names),
+            "name": rng.choice(self.npc_names),
             "level": opponent_level,
-            "hp": max(50, base_hp + random.randint(-20, 30)),
-            "atk": max(30, base_atk + random.randint(-15, 25)),
-            "def": max(20, base_def + random.randint(-10, 20)),
-            "element": random.choice(["Fire", "Water", "Earth", "Air", "Light", "Dark", "Neutral"]),
-            "potential": max(500, player_potential + random.randint(-500, 300))
+            "hp": max(50, base_hp + rng.randint(-20, 30)),
+            "atk": max(30, base_atk + rng.randint(-15, 25)),
+            "def": max(20, base_def + rng.randint(-10, 20)),
+            "element": rng.choice(["Fire", "Water", "Earth", "Air", "Light", "Dark", "Neutral"]),
+            "potential": max(500, player_potential + rng.randint(-500, 300))
         }
     
-    def generate_arena_opponent(self, player_char: Dict) -> Dict:
+    def generate_arena_opponent(self, player_char: Dict, rng=None) -> Dict:
         """Generate a stronger arena opponent"""
-        npc = self.generate_npc_opponent(player_char)
+        rng = rng or random
+        npc = self.generate_npc_opponent(player_char, rng)
         
         # Arena opponents are 10-20% stronger
-        strength_boost = random.uniform(1.1, 1.2)
+        strength_boost = rng.uniform(1.1, 1.2)
         
         npc["hp"] = int(npc["hp"] * strength_boost)
         npc["atk"] = int(npc["atk"] * strength_boost)
@@ -316,220 +471,28 @@ class BattleCommands(commands.Cog):
         
         return npc
     
-    def calculate_damage(self, attacker: Dict, defender: Dict, user_id: str = None) -> Tuple[int, List[str]]:
-        """Calculate damage using comprehensive buff system"""
-        # Apply all buffs and bonuses to attacker
-        enhanced_attacker = self.apply_all_buffs(attacker, user_id)
-        enhanced_defender = self.apply_all_buffs(defender, user_id)
-        
-        # Use advanced combat engine
-        damage, is_crit, combat_log = self.battle_engine.calculate_damage(
-            enhanced_attacker, enhanced_defender
-        )
-        
-        # Add buff information to combat log
-        buff_log = self.get_active_buffs_display(enhanced_attacker, user_id)
-        combat_log.extend(buff_log)
-        
-        return damage, combat_log
-    
-    def apply_all_buffs(self, character: Dict, user_id: str = None) -> Dict:
-        """Apply all available buffs to character stats"""
-        if not user_id:
-            return character
-            
-        # Start with base character stats
-        enhanced_stats = character.copy()
-        
-        # Apply guild bonuses
-        enhanced_stats = self.apply_guild_buffs(enhanced_stats, user_id)
-        
-        # Apply pet bonuses
-        enhanced_stats = self.apply_pet_buffs(enhanced_stats, user_id)
-        
-        # Apply dream buffs
-        enhanced_stats = self.apply_dream_buffs(enhanced_stats, user_id)
-        
-        # Apply affinity buffs (if fighting with other characters)
-        enhanced_stats = self.apply_affinity_buffs(enhanced_stats, user_id)
-        
-        # Apply relic and trait bonuses (using battle engine)
-        enhanced_stats = self.battle_engine.calculate_battle_stats(enhanced_stats)
-        
-        return enhanced_stats
-    
-    def apply_guild_buffs(self, stats: Dict, user_id: str) -> Dict:
-        """Apply guild membership bonuses"""
+    async def estimate_win_chance(self, player: BuffSnapshot, opponent: BuffSnapshot,
+                                  seed: int) -> Optional[Dict]:
+        """Estimate the player's win chance for this battle loop (player strikes first, 20 rounds)"""
         try:
-            if user_id in self.guild_manager.user_guilds.get("memberships", {}):
-                guild_id = self.guild_manager.user_guilds["memberships"][user_id]
-                guild = self.guild_manager.user_guilds["guilds"].get(guild_id, {})
-                
-                # Apply faction bonuses
-                faction = guild.get("faction", "")
-                faction_bonuses = {
-                    "celestial": {"atk": 1.2, "crit": 5},
-                    "shadow": {"atk": 1.3, "speed": 1.2},
-                    "elemental": {"magic": 1.25, "hp": 1.15},
-                    "arcane": {"magic": 1.3, "def": 1.2}
+            return await sim_executor.run("win_estimate", {
+                "waifu1": player.character,
+                "waifu2": opponent.character,
+                "seed": seed,
+                "options": {
+                    "stats1": dict(player.stats, hp=player.character.get("hp", 100)),
+                    "stats2": dict(opponent.stats, hp=opponent.character.get("hp", 100)),
+                    "first_attacker": 1, "use_skills": False, "max_rounds": 20
                 }
-                
-                if faction in faction_bonuses:
-                    bonuses = faction_bonuses[faction]
-                    for stat, multiplier in bonuses.items():
-                        if stat in stats:
-                            if stat == "crit":
-                                stats[stat] = stats.get(stat, 5) + multiplier
-                            else:
-                                stats[stat] = int(stats.get(stat, 50) * multiplier)
-                                
-        except Exception as e:
-            logger.warning(f"Guild buff error: {e}")
-            
-        return stats
-    
-    def apply_pet_buffs(self, stats: Dict, user_id: str) -> Dict:
-        """Apply active pet bonuses"""
-        try:
-            user_pets = self.pet_manager.get_user_pets(user_id)
-            active_pets = self.pet_manager.user_pets.get("active_pets", {}).get(user_id, [])
-            
-            for pet in user_pets:
-                if pet.get("pet_id") in active_pets:
-                    abilities = pet.get("unlocked_abilities", [])
-                    for ability_name in abilities:
-                        # Find ability effects in pet species data
-                        species_name = pet.get("species", "")
-                        for species in self.pet_manager.pet_data.get("pet_species", []):
-                            if species["name"] == species_name:
-                                for ability in species.get("abilities", []):
-                                    if ability["name"] == ability_name:
-                                        effect = ability.get("effect", {})
-                                        for effect_type, value in effect.items():
-                                            if effect_type == "damage_bonus":
-                                                stats["atk"] = int(stats.get("atk", 50) * (1 + value))
-                                            elif effect_type == "damage_reduction":
-                                                stats["def"] = int(stats.get("def", 30) * (1 + value))
-                                            elif effect_type == "crit_chance_bonus":
-                                                stats["crit"] = stats.get("crit", 5) + (value * 100)
-                                            elif effect_type == "dodge_chance":
-                                                stats["speed"] = int(stats.get("speed", 50) * (1 + value))
-                                                
-        except Exception as e:
-            logger.warning(f"Pet buff error: {e}")
-            
-        return stats
-    
-    def apply_dream_buffs(self, stats: Dict, user_id: str) -> Dict:
-        """Apply active dream event buffs"""
-        try:
-            dream_buffs = self.dream_manager.user_dreams.get("dream_buffs", {}).get(user_id, {})
-            
-            for buff_id, buff_data in dream_buffs.items():
-                expires_at = buff_data.get("expires_at")
-                if expires_at:
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        if datetime.now() > expire_time:
-                            continue  # Skip expired buff
-                    except:
-                        continue
-                
-                buff_effects = buff_data.get("effects", {})
-                for effect, value in buff_effects.items():
-                    if effect == "combat_power":
-                        stats["atk"] = int(stats.get("atk", 50) * (1 + value))
-                    elif effect == "defense_boost":
-                        stats["def"] = int(stats.get("def", 30) * (1 + value))
-                    elif effect == "hp_boost":
-                        stats["hp"] = int(stats.get("hp", 100) * (1 + value))
-                        
-        except Exception as e:
-            logger.warning(f"Dream buff error: {e}")
-            
-        return stats
-    
-    def apply_affinity_buffs(self, stats: Dict, user_id: str) -> Dict:
-        """Apply bonuses from character relationships"""
-        try:
-            # For now, apply a general affinity bonus based on overall relationship levels
-            # This could be expanded to specific character pairs
-            user_data = data_manager.get_user_data(user_id)
-            characters = user_data.get("claimed_waifus", [])
-            
-            if len(characters) >= 2:
-                # Calculate average affinity among characters
-                total_affinity = 0
-                pairs = 0
-                
-                for i, char1 in enumerate(characters):
-                    for char2 in characters[i+1:]:
-                        affinity = self.affinity_manager.get_affinity(
-                            user_id, char1.get("name", ""), char2.get("name", "")
-                        )
-                        total_affinity += affinity
-                        pairs += 1
-                
-                if pairs > 0:
-                    avg_affinity = total_affinity / pairs
-                    if avg_affinity > 70:  # High team cohesion bonus
-                        stats["atk"] = int(stats.get("atk", 50) * 1.15)
-                        stats["def"] = int(stats.get("def", 30) * 1.1)
-                        
-        except Exception as e:
-            logger.warning(f"Affinity buff error: {e}")
-            
-        return stats
-    
-    def get_active_buffs_display(self, character: Dict, user_id: str) -> List[str]:
-        """Get display messages for active buffs"""
-        buff_messages = []
-        
-        try:
-            # Check for guild buffs
-            if user_id and user_id in self.guild_manager.user_guilds.get("memberships", {}):
-                guild_id = self.guild_manager.user_guilds["memberships"][user_id]
-                guild = self.guild_manager.user_guilds["guilds"].get(guild_id, {})
-                faction = guild.get("faction", "")
-                if faction:
-                    buff_messages.append(f"🏰 Guild ({faction.title()}) buffs active!")
-            
-            # Check for pet buffs
-            active_pets = self.pet_manager.user_pets.get("active_pets", {}).get(user_id, [])
-            if active_pets:
-                buff_messages.append(f"🐾 Pet companion buffs active ({len(active_pets)} pets)!")
-            
-            # Check for dream buffs
-            dream_buffs = self.dream_manager.user_dreams.get("dream_buffs", {}).get(user_id, {})
-            active_dream_buffs = 0
-            for buff_data in dream_buffs.values():
-                expires_at = buff_data.get("expires_at")
-                if expires_at:
-                    try:
-                        expire_time = datetime.fromisoformat(expires_at)
-                        if datetime.now() <= expire_time:
-                            active_dream_buffs += 1
-                    except:
-                        pass
-            
-            if active_dream_buffs > 0:
-                buff_messages.append(f"🌙 Dream buffs active ({active_dream_buffs} effects)!")
-                
-            # Check for traits
-            if character.get("traits"):
-                buff_messages.append(f"✨ Character traits active ({len(character['traits'])} traits)!")
-                
-            # Check for equipped relic
-            if character.get("relic") or character.get("equipped_relic"):
-                buff_messages.append("🏺 Relic bonuses active!")
-                
+            })
         except Exception as e:
-            logger.warning(f"Buff display error: {e}")
-            
-        return buff_messages
+            logger.warning(f"Win estimate error: {e}")
+            return None
     
-    def calculate_battle_rewards(self, victory: bool, opponent: Dict, is_arena: bool = False) -> Dict:
+    def calculate_battle_rewards(self, victory: bool, opponent: Dict, is_arena: bool = False,
+                                 rng=None) -> Dict:
         """Calculate battle rewards based on outcome"""
+        rng = rng or random
         if not victory:
             return {"gold": 0, "xp": 10, "items": []}
         
@@ -555,12 +518,12 @@ class BattleCommands(commands.Cog):
         items = []
         drop_chance = 0.3 if victory else 0.1
         
-        if random.random() < drop_chance:
+        if rng.random() < drop_chance:
             item_pool = [
                 "Health Potion Small", "Experience Scroll", "Gold Pouch",
                 "Iron Ore", "Cloth Scrap", "Small Gem"
             ]
-            items.append(random.choice(item_pool))
+            items.append(rng.choice(item_pool))
         
         return {
             "gold": gold_reward,
@@ -569,7 +532,7 @@ class BattleCommands(commands.Cog):
         }
     
     async def update_battle_stats(self, user_id: str, victory: bool, damage_dealt: int, 
-                                damage_taken: int, rewards: Dict):
+                                damage_taken: int, rewards: Dict, battle_record: Optional[Dict] = None):
         """Update user battle statistics and apply rewards"""
         user_data = data_manager.get_user_data(user_id)
         
@@ -583,6 +546,11 @@ class BattleCommands(commands.Cog):
         battle_stats["total_damage_dealt"] = battle_stats.get("total_damage_dealt", 0) + damage_dealt
         battle_stats["total_damage_taken"] = battle_stats.get("total_damage_taken", 0) + damage_taken
         
+        # Keep recent results with their RNG seed for replays
+        if battle_record:
+            user_data.setdefault("battle_history", []).append(battle_record)
+            user_data["battle_history"] = user_data["battle_history"][-10:]
+        
         # Apply rewards
         user_data["gold"] = user_data.get("gold", 0) + rewards["gold"]
         user_data["xp"] = user_data.get("xp", 0) + rewards["xp"]
@@ -602,7 +570,8 @@ class BattleCommands(commands.Cog):
         data_manager.save_user_data(user_id, user_data)
     
     def create_battle_setup_embed(self, player_char: Dict, opponent_char: Dict, 
-                                opponent_name: str, is_pvp: bool) -> discord.Embed:
+                                opponent_name: str, is_pvp: bool,
+                                win_estimate: Optional[Dict] = None) -> discord.Embed:
         """Create battle setup embed"""
         embed = self.embed_builder.create_embed(
             title="⚔️ Battle Commencing!",
@@ -643,6 +612,13 @@ class BattleCommands(commands.Cog):
             inline=False
         )
         
+        if win_estimate:
+            embed.add_field(
+                name="📊 Estimated Win Chance",
+                value=f"{format_win_chance(win_estimate)} over {format_number(win_estimate['battles'])} simulations",
+                inline=False
+            )
+        
         return embed
     
     def create_battle_progress_embed(self, player_char: Dict, opponent_char: Dict, 
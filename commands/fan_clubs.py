@@ -9,6 +9,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
+from utils.top_k import top_k
 
 class FanClubCommands(commands.Cog):
     """Character fan clubs with voting, events, and exclusive rewards"""
@@ -73,7 +74,7 @@ class FanClubCommands(commands.Cog):
             
             # Show popular clubs
             fan_clubs = game_data.get("fan_clubs", {})
-            popular_clubs = sorted(fan_clubs.items(), key=lambda x: len(x[1].get("members", [])), reverse=True)[:5]
+            popular_clubs = top_k(fan_clubs.items(), 5, key=lambda x: len(x[1].get("members", [])))
             
             if popular_clubs:
                 popular_text = ""
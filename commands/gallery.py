@@ -10,6 +10,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import CHARACTERS_DIR
 from utils.helpers import format_number
+from utils.skill_compiler import render_skill_field
 
 LEVEL_REQUIREMENTS = {1: 1, 2: 30, 3: 60, 4: 90, 5: 120}
 
@@ -189,8 +190,17 @@ class GalleryImageView(discord.ui.View):
         # Skills and fate
         skills = self.character_data.get("skills", [])
         if skills:
-            skills_text = "\n".join([f"• {skill}" for skill in skills[:3]])
-            embed.add_field(name="🎯 Skills", value=skills_text, inline=False)
+            skills_text = ""
+            for skill in skills[:3]:
+                if isinstance(skill, dict):
+                    skill_name = skill.get("name", "Skill")
+                    if skill.get("stacks"):
+                        skill_name += f" (+{skill['stacks']})"
+                    skill_desc = render_skill_field(skill, "effect") or skill.get("description", "")
+                    skills_text += f"• **{skill_name}**: {skill_desc[:250]}\n"
+                else:
+                    skills_text += f"• {str(skill)[:250]}\n"
+            embed.add_field(name="🎯 Skills", value=skills_text[:1024], inline=False)
         
         return embed
 
@@ -34,7 +34,7 @@ class CustomHelpCommand(commands.HelpCommand):
                 "emoji": "👤"
             },
             "Summoning & Battles": {
-                "commands": ["summon", "battle", "arena", "duel", "fight", "upgrade", "train", "rates", "quick_arena"],
+                "commands": ["summon", "battle", "arena", "duel", "fight", "upgrade", "train", "rates", "quick_arena", "replay", "tournament"],
                 "description": "Summon characters and engage in combat",
                 "emoji": "⚔️"
             },
@@ -64,7 +64,7 @@ class CustomHelpCommand(commands.HelpCommand):
                 "emoji": "🎊"
             },
             "Achievements & Lore": {
-                "commands": ["achievements", "lorebooks", "lore_achievements", "contests", "moodpoll", "fancontest"],
+                "commands": ["achievements", "lorebooks", "lore_achievements", "contests", "moodpoll", "fancontest", "leaderboard", "rank"],
                 "description": "Track progress, discover history, and join community events",
                 "emoji": "🏆"
             },
@@ -74,7 +74,7 @@ class CustomHelpCommand(commands.HelpCommand):
                 "emoji": "💕"
             },
             "Boss Fights & Raids": {
-                "commands": ["bossfight", "raid", "pvpboss", "challenge"],
+                "commands": ["bossfight", "raid", "pvpboss", "challenge", "pvprating"],
                 "description": "Take on powerful bosses and raid challenges",
                 "emoji": "🐉"
             },
@@ -320,6 +320,29 @@ class CustomHelpCommand(commands.HelpCommand):
                 f"`{self.context.clean_prefix}battle` - Battle with your strongest character",
                 f"`{self.context.clean_prefix}battle Sakura` - Battle with specific character"
             ],
+            "replay": [
+                f"`{self.context.clean_prefix}replay` - List your recent battle replays",
+                f"`{self.context.clean_prefix}replay 12` - Watch battle replay #12 again"
+            ],
+            "tournament": [
+                f"`{self.context.clean_prefix}tournament` - Current tournament status and top seeds",
+                f"`{self.context.clean_prefix}tournament join` - Sign up with your strongest characters",
+                f"`{self.context.clean_prefix}tournament create 30 64` - Open 30 minutes of signups for up to 64 players",
+                f"`{self.context.clean_prefix}tournament bracket 1` - Browse first-round results"
+            ],
+            "pvprating": [
+                f"`{self.context.clean_prefix}pvprating` - Your PvP rating and recent rating periods",
+                f"`{self.context.clean_prefix}pvprating @user` - Another player's PvP rating"
+            ],
+            "leaderboard": [
+                f"`{self.context.clean_prefix}leaderboard gold` - Richest players in this server",
+                f"`{self.context.clean_prefix}leaderboard arena global` - Top arena players everywhere",
+                f"`{self.context.clean_prefix}leaderboard power 2` - Second page of collection power"
+            ],
+            "rank": [
+                f"`{self.context.clean_prefix}rank` - Your global and server rank in every category",
+                f"`{self.context.clean_prefix}rank @user` - Another player's rankings"
+            ],
             "invest": [
                 f"`{self.context.clean_prefix}invest cafe` - Invest in a café",
                 f"`{self.context.clean_prefix}invest` - View investment options"
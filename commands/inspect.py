@@ -6,7 +6,10 @@ import random
 
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
-from utils.helpers import format_number, find_character_by_name, calculate_battle_power
+from utils.helpers import format_number, find_character_by_name
+from utils.power_cache import get_waifu_power
+from utils.top_k import get_top_waifus
+from utils.skill_compiler import render_skill_field
 
 class InspectCommands(commands.Cog):
     """Character inspection and detailed viewing commands"""
@@ -128,10 +131,11 @@ class InspectCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            # Sort characters by criteria
-            sorted_waifus = self.sort_characters(waifus, sort_by.lower())
+            # Select the top characters by criteria
+            sort_by = sort_by.lower()
+            top_waifus = self.get_top_characters(str(ctx.author.id), waifus, sort_by)
             
-            if not sorted_waifus:
+            if not top_waifus:
                 embed = self.embed_builder.error_embed(
                     "Invalid Sort Criteria",
                     "Valid options: potential, level, hp, atk, def, power"
@@ -140,7 +144,7 @@ class InspectCommands(commands.Cog):
                 return
             
             # Create top characters embed
-            embed = self.create_top_characters_embed(sorted_waifus, sort_by)
+            embed = self.create_top_characters_embed(top_waifus, waifus, sort_by)
             await ctx.send(embed=embed)
             
         except Exception as e:
@@ -169,23 +173,12 @@ class InspectCommands(commands.Cog):
         suggestions.sort(key=lambda x: x[1], reverse=True)
         return [name for name, _ in suggestions[:5]]
     
-    def sort_characters(self, waifus: List[Dict], sort_by: str) -> Optional[List[Dict]]:
-        """Sort characters by specified criteria"""
-        sort_functions = {
-            "potential": lambda w: w.get("potential", 0),
-            "level": lambda w: w.get("level", 1),
-            "hp": lambda w: w.get("hp", 0),
-            "atk": lambda w: w.get("atk", 0),
-            "def": lambda w: w.get("def", 0),
-            "power": lambda w: calculate_battle_power(
-                w.get("hp", 0), w.get("atk", 0), w.get("def", 0), w.get("level", 1)
-            )
-        }
-        
-        if sort_by not in sort_functions:
+    def get_top_characters(self, user_id: str, waifus: List[Dict], sort_by: str) -> Optional[List[Dict]]:
+        """Top 10 characters by specified criteria (potential, level and power come from the collection aggregates)"""
+        if sort_by not in ("potential", "level", "hp", "atk", "def", "power"):
             return None
         
-        return sorted(waifus, key=sort_functions[sort_by], reverse=True)
+        return get_top_waifus(user_id, waifus, sort_by, 10)
     
     def create_comparison_embed(self, char1: Dict, char2: Dict) -> discord.Embed:
         """Create a character comparison embed"""
@@ -255,12 +248,8 @@ class InspectCommands(commands.Cog):
         )
         
         # Battle power comparison
-        power1 = calculate_battle_power(
-            char1.get("hp", 0), char1.get("atk", 0), char1.get("def", 0), char1.get("level", 1)
-        )
-        power2 = calculate_battle_power(
-            char2.get("hp", 0), char2.get("atk", 0), char2.get("def", 0), char2.get("level", 1)
-        )
+        power1 = get_waifu_power(char1)
+        power2 = get_waifu_power(char2)
         
         if power1 > power2:
             winner = f"**{name1}** is stronger!"
@@ -283,28 +272,19 @@ class InspectCommands(commands.Cog):
         
         return embed
     
-    def create_top_characters_embed(self, sorted_waifus: List[Dict], sort_by: str) -> discord.Embed:
+    def create_top_characters_embed(self, top_waifus: List[Dict], waifus: List[Dict], sort_by: str) -> discord.Embed:
         """Create top characters embed"""
         embed = self.embed_builder.create_embed(
             title=f"🏆 Top Characters by {sort_by.title()}",
             color=0xFFD700
         )
         
-        # Show top 10
-        top_waifus = sorted_waifus[:10]
-        
         rankings_text = ""
         for i, waifu in enumerate(top_waifus, 1):
             name = waifu.get("name", "Unknown")
             rarity = waifu.get("rarity", "N").split()[0]
             
-            if sort_by == "power":
-                value = calculate_battle_power(
-                    waifu.get("hp", 0), waifu.get("atk", 0), 
-                    waifu.get("def", 0), waifu.get("level", 1)
-                )
-            else:
-                value = waifu.get(sort_by, 0)
+            value = waifu.get(sort_by, 0)
             
             # Add rank emoji
             rank_emoji = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, f"{i}.")
@@ -319,9 +299,10 @@ class InspectCommands(commands.Cog):
         )
         
         # Add summary stats
-        total_chars = len(sorted_waifus)
+        total_chars = len(waifus)
         if total_chars > 0:
-            avg_value = sum(waifu.get(sort_by, 0) for waifu in sorted_waifus) / total_chars
+            value_of = get_waifu_power if sort_by == "power" else lambda waifu: waifu.get(sort_by, 0)
+            avg_value = sum(value_of(waifu) for waifu in waifus) / total_chars
             embed.add_field(
                 name="📈 Collection Stats",
                 value=f"Total Characters: {total_chars}\n"
@@ -381,7 +362,7 @@ class CharacterInspectView(discord.ui.View):
         )
         
         # Battle power
-        battle_power = calculate_battle_power(hp, atk, defense, level)
+        battle_power = get_waifu_power(self.character)
         embed.add_field(
             name="⚔️ Battle Power",
             value=f"**{format_number(battle_power)}**",
@@ -414,14 +395,20 @@ class CharacterInspectView(discord.ui.View):
             for i, skill in enumerate(skills, 1):
                 if isinstance(skill, dict):
                     skill_name = skill.get("name", f"Skill {i}")
-                    skill_desc = skill.get("description", "No description")
-                    skills_text += f"**{skill_name}**\n{skill_desc}\n\n"
+                    # Structured skills keep numbers separate; render current values here
+                    damage_text = render_skill_field(skill, "damage")
+                    skill_desc = render_skill_field(skill, "effect") or skill.get("description", "No description")
+                    if damage_text:
+                        skill_desc = f"{damage_text} • {skill_desc}"
+                    if skill.get("stacks"):
+                        skill_name += f" (+{skill['stacks']})"
+                    skills_text += f"**{skill_name}**\n{skill_desc[:200]}\n\n"
                 else:
                     skills_text += f"**Skill {i}**\n{skill}\n\n"
             
             embed.add_field(
                 name="⚔️ Active Skills",
-                value=skills_text,
+                value=skills_text[:1024],
                 inline=False
             )
         else:
@@ -10,6 +10,8 @@ from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
 from utils.channel_restriction import check_channel_restriction
+from utils.collection_stats import collection_stats
+from utils.top_k import top_k, get_top_waifus
 
 class IntimateCommands(commands.Cog):
     """Character relationship and affection system"""
@@ -216,6 +218,7 @@ class IntimateCommands(commands.Cog):
             # Apply affection gain
             character["affection"] = min(100, current_affection + affection_gained)
             character["last_intimate_interaction"] = datetime.now().isoformat()
+            collection_stats.update_waifu(str(ctx.author.id), character)
             
             # Update interaction statistics
             char_stats = character.setdefault("interaction_stats", {})
@@ -308,7 +311,7 @@ class IntimateCommands(commands.Cog):
                 await ctx.send(embed=embed)
             else:
                 # Show all relationships
-                embed = self.create_all_relationships_embed(user_characters)
+                embed = self.create_all_relationships_embed(str(ctx.author.id), user_characters)
                 await ctx.send(embed=embed)
             
             await self.log_intimate_activity(ctx, "relationship_check", character_name)
@@ -350,7 +353,7 @@ class IntimateCommands(commands.Cog):
         )
         
         # Show top characters by affection
-        top_chars = sorted(characters, key=lambda c: c.get("affection", 0), reverse=True)[:5]
+        top_chars = top_k(characters, 5, key=lambda c: c.get("affection", 0))
         
         chars_text = ""
         for char in top_chars:
@@ -494,7 +497,7 @@ class IntimateCommands(commands.Cog):
         
         return embed
     
-    def create_all_relationships_embed(self, characters: List[Dict]) -> discord.Embed:
+    def create_all_relationships_embed(self, user_id: str, characters: List[Dict]) -> discord.Embed:
         """Create overview of all character relationships"""
         embed = self.embed_builder.create_embed(
             title="💝 All Relationships",
@@ -502,11 +505,11 @@ class IntimateCommands(commands.Cog):
             color=0xFF69B4
         )
         
-        # Sort by affection
-        sorted_chars = sorted(characters, key=lambda c: c.get("affection", 0), reverse=True)
+        # Top 10 by affection, kept current by the collection aggregates
+        top_chars = get_top_waifus(user_id, characters, "affection", 10)
         
         relationships_text = ""
-        for char in sorted_chars[:10]:  # Show top 10
+        for char in top_chars:
             affection = char.get("affection", 0)
             relationship = self.get_relationship_level(affection)
             relationships_text += f"💖 **{char['name']}** - {affection}/100 ({relationship})\n"
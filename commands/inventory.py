@@ -7,6 +7,37 @@ import asyncio
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from utils.helpers import format_number, validate_amount
+from utils.pagination import pagination_engine, PaginationSource
+
+# Items shown per inventory page
+INVENTORY_PAGE_SIZE = 10
+
+# Name keywords of each item category
+ITEM_CATEGORIES = {
+    "potions": ["potion", "elixir", "brew"],
+    "materials": ["ore", "cloth", "shard", "essence", "fragment"],
+    "scrolls": ["scroll", "tome", "codex", "book"],
+    "gems": ["gem", "crystal", "stone"],
+    "equipment": ["sword", "armor", "shield", "weapon"],
+    "consumables": ["potion", "scroll", "charm", "banner"]
+}
+
+
+def item_in_category(item_name: str, category: str) -> bool:
+    """Whether an item's name matches a category's keywords (or the category text itself)"""
+    keywords = ITEM_CATEGORIES.get(category.lower(), [category.lower()])
+    return any(keyword in item_name.lower() for keyword in keywords)
+
+
+pagination_engine.register_source(PaginationSource(
+    "inventory",
+    lambda user_id: data_manager.get_user_data(user_id).get("inventory", {}),
+    sort_keys={
+        "name": (lambda entry: entry[0].lower(), False),
+        "count": (lambda entry: entry[1] if isinstance(entry[1], (int, float)) else 0, True)
+    },
+    filters={"category": lambda entry, category: item_in_category(entry[0], category)}
+))
 
 class InventoryCommands(commands.Cog):
     """Inventory and item management commands"""
@@ -32,8 +63,7 @@ class InventoryCommands(commands.Cog):
             
             # Filter by category if specified
             if category:
-                filtered_items = self.filter_items_by_category(inventory, category)
-                if not filtered_items:
+                if not any(item_in_category(item_name, category) for item_name in inventory):
                     embed = self.embed_builder.warning_embed(
                         "Category Not Found",
                         f"No items found in category: {category}\n"
@@ -41,10 +71,11 @@ class InventoryCommands(commands.Cog):
                     )
                     await ctx.send(embed=embed)
                     return
-                inventory = filtered_items
             
-            # Create paginated inventory view
-            view = InventoryView(inventory, category)
+            # Create paginated inventory view over a cursor; only the visible page is built
+            cursor = pagination_engine.open_cursor("inventory", str(ctx.author.id), per_page=INVENTORY_PAGE_SIZE,
+                                                   filter=("category", category.lower()) if category else None)
+            view = InventoryView(cursor, category)
             embed = view.create_embed()
             
             await ctx.send(embed=embed, view=view)
@@ -276,23 +307,8 @@ class InventoryCommands(commands.Cog):
     
     def filter_items_by_category(self, inventory: dict, category: str) -> dict:
         """Filter inventory items by category"""
-        categories = {
-            "potions": ["potion", "elixir", "brew"],
-            "materials": ["ore", "cloth", "shard", "essence", "fragment"],
-            "scrolls": ["scroll", "tome", "codex", "book"],
-            "gems": ["gem", "crystal", "stone"],
-            "equipment": ["sword", "armor", "shield", "weapon"],
-            "consumables": ["potion", "scroll", "charm", "banner"]
-        }
-        
-        category_keywords = categories.get(category.lower(), [category.lower()])
-        
-        filtered = {}
-        for item_name, count in inventory.items():
-            if any(keyword in item_name.lower() for keyword in category_keywords):
-                filtered[item_name] = count
-        
-        return filtered
+        return {item_name: count for item_name, count in inventory.items()
+                if item_in_category(item_name, category)}
     
     def get_item_categories(self, inventory: dict) -> List[str]:
         """Get all available item categories"""
@@ -317,15 +333,18 @@ class InventoryCommands(commands.Cog):
 class InventoryView(discord.ui.View):
     """Paginated inventory view"""
     
-    def __init__(self, inventory: dict, category: str = None):
+    def __init__(self, cursor, category: str = None):
         super().__init__(timeout=300.0)
-        self.inventory = inventory
+        self.cursor_id = cursor.cursor_id
         self.category = category
-        self.page = 0
-        self.per_page = 10
-        self.items = list(inventory.items())
-        self.max_page = max(0, (len(self.items) - 1) // self.per_page)
         
+        self.refresh(cursor)
+    
+    def refresh(self, cursor):
+        """Load the cursor's current page"""
+        self.page_items = pagination_engine.get_page(cursor)
+        self.page = cursor.page
+        self.max_page = pagination_engine.page_count(cursor) - 1
         self.update_buttons()
     
     def update_buttons(self):
@@ -349,13 +368,9 @@ class InventoryView(discord.ui.View):
             color=0x9932CC
         )
         
-        start_idx = self.page * self.per_page
-        end_idx = start_idx + self.per_page
-        page_items = self.items[start_idx:end_idx]
-        
-        if page_items:
+        if self.page_items:
             items_text = ""
-            for item_name, count in page_items:
+            for _, (item_name, count) in self.page_items:
                 items_text += f"**{item_name}** x{count}\n"
             
             embed.add_field(
@@ -377,25 +392,34 @@ class InventoryView(discord.ui.View):
         
         return embed
     
-    @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.primary, custom_id="prev")
-    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            self.update_buttons()
+    async def turn_page(self, interaction: discord.Interaction, pages: int):
+        cursor = pagination_engine.get_cursor(self.cursor_id)
+        if cursor is None:
+            # Evicted after sitting idle
+            for item in self.children:
+                item.disabled = True
+            await interaction.response.edit_message(
+                embed=EmbedBuilder.warning_embed("Inventory Expired", "Use `!inventory` to open it again."),
+                view=self
+            )
+            self.stop()
+        elif pagination_engine.move(cursor, pages):
+            self.refresh(cursor)
             embed = self.create_embed()
             await interaction.response.edit_message(embed=embed, view=self)
         else:
             await interaction.response.defer()
     
+    async def on_timeout(self):
+        pagination_engine.close_cursor(self.cursor_id)
+    
+    @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.primary, custom_id="prev")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn_page(interaction, -1)
+    
     @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.primary, custom_id="next")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.page < self.max_page:
-            self.page += 1
-            self.update_buttons()
-            embed = self.create_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
-        else:
-            await interaction.response.defer()
+        await self.turn_page(interaction, 1)
 
 
 class GiveConfirmationView(discord.ui.View):
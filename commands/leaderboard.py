@@ -0,0 +1,169 @@
+# Leaderboard Commands for KoKoroMichi Advanced Bot
+import discord
+from discord.ext import commands
+from typing import Optional
+import time
+
+from core.embed_utils import EmbedBuilder
+from utils.helpers import format_number, calculate_level_from_xp
+from utils.leaderboard import leaderboard_service, LEADERBOARD_CATEGORIES
+
+# Entries per leaderboard page
+LEADERBOARD_PAGE_SIZE = 10
+
+# Seconds before a server's member list is re-synced into its boards
+GUILD_SYNC_INTERVAL = 3600
+
+# Friendly names for categories
+CATEGORY_ALIASES = {
+    "money": "gold", "xp": "level", "lvl": "level", "wins": "battles", "battle": "battles",
+    "rp": "arena", "ranked": "arena", "rating": "pvp", "summon": "summons", "collection": "power"
+}
+
+class LeaderboardCommands(commands.Cog):
+    """Global and per-server rankings"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.embed_builder = EmbedBuilder()
+
+    def resolve_category(self, category: str) -> Optional[str]:
+        """Match a category name or alias"""
+        category = category.lower()
+        category = CATEGORY_ALIASES.get(category, category)
+        return category if category in LEADERBOARD_CATEGORIES else None
+
+    def sync_guild(self, guild: Optional[discord.Guild]):
+        """Refresh a server's member list in the boards when it is stale"""
+        if guild is None:
+            return
+        last_sync = leaderboard_service.guild_synced.get(str(guild.id), 0)
+        if time.monotonic() - last_sync >= GUILD_SYNC_INTERVAL:
+            leaderboard_service.sync_guild(guild.id, [member.id for member in guild.members if not member.bot])
+
+    def format_score(self, category: str, score: float) -> str:
+        """Display value of a board score"""
+        if category == "level":
+            return f"Level {calculate_level_from_xp(int(score))} ({format_number(int(score))} XP)"
+        return format_number(int(score))
+
+    def get_display_name(self, ctx, user_id: str) -> str:
+        member = ctx.guild.get_member(int(user_id)) if ctx.guild else None
+        user = member or self.bot.get_user(int(user_id))
+        return user.display_name if user else f"User {user_id[-4:]}"
+
+    @commands.command(name="leaderboard", aliases=["lb", "rankings"])
+    async def leaderboard(self, ctx, category: str = "gold", *options: str):
+        """View the top players of a category (add 'global' for all servers, or a page number)"""
+        try:
+            category_key = self.resolve_category(category)
+            if not category_key:
+                embed = self.embed_builder.error_embed(
+                    "Unknown Category",
+                    f"Available categories: {', '.join(f'`{name}`' for name in LEADERBOARD_CATEGORIES)}"
+                )
+                await ctx.send(embed=embed)
+                return
+
+            scope_global = ctx.guild is None or any(option.lower() == "global" for option in options)
+            page = next((int(option) for option in options if option.isdigit()), 1)
+            page = max(1, page)
+            guild_id = None if scope_global else ctx.guild.id
+            if guild_id:
+                self.sync_guild(ctx.guild)
+
+            label = LEADERBOARD_CATEGORIES[category_key][0]
+            entries = leaderboard_service.get_top(category_key, LEADERBOARD_PAGE_SIZE,
+                                                  (page - 1) * LEADERBOARD_PAGE_SIZE, guild_id)
+            rank, score, total = leaderboard_service.get_rank(ctx.author.id, category_key, guild_id)
+            total_pages = max(1, (total + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE)
+
+            scope_name = "Global" if scope_global else ctx.guild.name
+            embed = self.embed_builder.create_embed(
+                title=f"🏆 {label} Leaderboard",
+                description=f"**{scope_name}** rankings • {total:,} players",
+                color=0xFFD700
+            )
+
+            if entries:
+                medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+                lines = [f"{medals.get(position, f'**#{position}**')} {self.get_display_name(ctx, user_id)} - "
+                         f"{self.format_score(category_key, entry_score)}"
+                         for position, user_id, entry_score in entries]
+                embed.add_field(name=f"Page {page}/{total_pages}", value="\n".join(lines), inline=False)
+            else:
+                embed.add_field(name=f"Page {page}/{total_pages}", value="No players on this page yet.", inline=False)
+
+            if rank is not None:
+                embed.add_field(
+                    name="📍 Your Rank",
+                    value=f"**#{rank:,}** of {total:,} - {self.format_score(category_key, score)}",
+                    inline=False
+                )
+
+            other_scope = "" if scope_global else " global"
+            embed.set_footer(text=f"Use '{ctx.clean_prefix}leaderboard {category_key}{other_scope}' • "
+                                  f"Categories: {', '.join(LEADERBOARD_CATEGORIES)}")
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Leaderboard Error",
+                "Unable to load the leaderboard. Please try again later."
+            )
+            await ctx.send(embed=embed)
+            print(f"Leaderboard command error: {e}")
+
+    @commands.command(name="rank", aliases=["myrank"])
+    async def rank(self, ctx, member: Optional[discord.Member] = None):
+        """View your rank in every leaderboard category"""
+        try:
+            target = member or ctx.author
+            if ctx.guild:
+                self.sync_guild(ctx.guild)
+
+            embed = self.embed_builder.create_embed(
+                title=f"📍 {target.display_name}'s Rankings",
+                color=0xFFD700
+            )
+
+            for category_key, (label, _) in LEADERBOARD_CATEGORIES.items():
+                rank, score, total = leaderboard_service.get_rank(target.id, category_key)
+                if rank is None:
+                    continue
+                value = f"🌍 #{rank:,} of {total:,}"
+                if ctx.guild:
+                    guild_rank, _, guild_total = leaderboard_service.get_rank(target.id, category_key, ctx.guild.id)
+                    if guild_rank is not None:
+                        value += f"\n🏰 #{guild_rank:,} of {guild_total:,}"
+                value += f"\n{self.format_score(category_key, score)}"
+                embed.add_field(name=label, value=value, inline=True)
+
+            if not embed.fields:
+                embed.description = "No rankings yet - play a few games to get on the boards!"
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Rank Error",
+                "Unable to load rankings. Please try again later."
+            )
+            await ctx.send(embed=embed)
+            print(f"Rank command error: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if not member.bot:
+            leaderboard_service.add_member(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        leaderboard_service.remove_member(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        leaderboard_service.sync_guild(guild.id, [])
+
+async def setup(bot):
+    await bot.add_cog(LeaderboardCommands(bot))
@@ -9,6 +9,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
+from utils.collection_stats import collection_stats
 
 class MishapsCommands(commands.Cog):
     """Random mishap events that add challenge and humor to the game"""
@@ -263,6 +264,8 @@ class MishapsCommands(commands.Cog):
             
             # Apply mishap effects (with insurance protection)
             original_impact = self.apply_mishap_effects(user_data, mishap, mishap_insurance > 0)
+            if original_impact.get("character"):
+                collection_stats.invalidate(str(ctx.author.id))
             
             if mishap_insurance > 0:
                 protection_items["mishap_insurance"] -= 1
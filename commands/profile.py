@@ -7,6 +7,34 @@ import asyncio
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from utils.helpers import format_number, calculate_level_from_xp, create_progress_bar
+from utils.collection_stats import collection_stats, RARITY_ORDER
+from utils.pagination import pagination_engine, PaginationSource
+
+# Characters shown per collection page
+COLLECTION_PAGE_SIZE = 5
+
+
+def _number(value) -> float:
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _rarity_rank(waifu: dict) -> int:
+    rarity = waifu.get("rarity", "N").split()[0]
+    return RARITY_ORDER.index(rarity) if rarity in RARITY_ORDER else -1
+
+
+pagination_engine.register_source(PaginationSource(
+    "collection",
+    lambda user_id: data_manager.get_user_data(user_id).get("claimed_waifus", []),
+    sort_keys={
+        "potential": (lambda w: _number(w.get("potential", 0)), True),
+        "level": (lambda w: _number(w.get("level", 1)), True),
+        "affection": (lambda w: _number(w.get("affection", 0)), True),
+        "rarity": (lambda w: (_rarity_rank(w), _number(w.get("potential", 0))), True),
+        "name": (lambda w: w.get("name", "").lower(), False)
+    },
+    filters={"rarity": lambda w, rarity: w.get("rarity", "N").split()[0].upper() == rarity}
+))
 
 class ProfileCommands(commands.Cog):
     """Profile management and user statistics"""
@@ -76,25 +104,18 @@ class ProfileCommands(commands.Cog):
             inline=True
         )
         
-        # Collection statistics
-        waifus = user_data.get("claimed_waifus", [])
-        waifu_count = len(waifus)
-        
-        # Count by rarity
-        rarity_counts = {}
-        for waifu in waifus:
-            rarity = waifu.get("rarity", "N").split()[0]  # Extract rarity tier
-            rarity_counts[rarity] = rarity_counts.get(rarity, 0) + 1
+        # Collection statistics (maintained aggregates, no pass over the collection)
+        collection = collection_stats.get_stats(str(user.id), user_data.get("claimed_waifus", []))
+        rarity_counts = collection["rarity_counts"]
         
-        collection_text = f"Total Waifus: **{waifu_count}**\n"
+        collection_text = f"Total Waifus: **{collection['count']}**\n"
         if rarity_counts:
             # Show top 3 rarities
-            sorted_rarities = sorted(rarity_counts.items(), 
-                                   key=lambda x: ["N", "R", "SR", "SSR", "UR", "LR", "Mythic"].index(x[0]) if x[0] in ["N", "R", "SR", "SSR", "UR", "LR", "Mythic"] else 0,
-                                   reverse=True)
-            for rarity, count in sorted_rarities[:3]:
-                collection_text += f"{rarity}: {count} | "
-            collection_text = collection_text.rstrip(" | ")
+            sorted_rarities = [(rarity, rarity_counts[rarity]) for rarity in reversed(RARITY_ORDER)
+                               if rarity in rarity_counts]
+            collection_text += " | ".join(f"{rarity}: {count}" for rarity, count in sorted_rarities[:3]) + "\n"
+            collection_text += f"Power: **{format_number(collection['total_power'])}**\n"
+            collection_text += f"Best: **{collection['top']['potential'][0]['name']}**"
         
         embed.add_field(
             name="💕 Waifu Collection",
@@ -152,9 +173,13 @@ class ProfileCommands(commands.Cog):
         return embed
     
     @commands.command(name="collection", aliases=["waifus", "characters"])
-    async def collection(self, ctx, page: int = 1):
-        """View your character collection with pagination"""
+    async def collection(self, ctx, page: Optional[int] = 1, sort_by: str = "potential",
+                         page_after_sort: Optional[int] = None):
+        """View your character collection with pagination (sort by potential, level, affection, rarity or name)"""
         try:
+            # Page stays the first argument; a sort can also come first (`!collection rarity 2`)
+            page = page_after_sort or page
+            
             user_data = data_manager.get_user_data(str(ctx.author.id))
             waifus = user_data.get("claimed_waifus", [])
             
@@ -166,11 +191,10 @@ class ProfileCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            # Sort waifus by potential/level
-            waifus.sort(key=lambda w: w.get("potential", 0), reverse=True)
-            
-            # Create paginated view
-            view = CollectionView(waifus, page - 1)
+            # The view holds a cursor over a shared sort index; pages are built as they are shown
+            cursor = pagination_engine.open_cursor("collection", str(ctx.author.id), sort_by.lower(),
+                                                   per_page=COLLECTION_PAGE_SIZE, page=page - 1)
+            view = CollectionView(cursor)
             embed = view.create_embed()
             
             await ctx.send(embed=embed, view=view)
@@ -226,15 +250,16 @@ class ProfileCommands(commands.Cog):
             )
             
             # Waifu collection statistics
-            waifus = user_data.get("claimed_waifus", [])
-            unique_elements = set(w.get("element", "Neutral") for w in waifus)
-            highest_level = max((w.get("level", 1) for w in waifus), default=1)
+            collection = collection_stats.get_stats(str(ctx.author.id), user_data.get("claimed_waifus", []))
+            top_level = collection["top"]["level"]
+            highest_level = top_level[0]["level"] if top_level else 1
             
             embed.add_field(
                 name="👥 Collection Stats",
-                value=f"Total Characters: {len(waifus)}\n"
-                      f"Unique Elements: {len(unique_elements)}\n"
+                value=f"Total Characters: {collection['count']}\n"
+                      f"Unique Elements: {len(collection['element_counts'])}\n"
                       f"Highest Level: {highest_level}\n"
+                      f"Collection Power: {format_number(collection['total_power'])}\n"
                       f"Achievements: {len(user_data.get('achievements', []))}",
                 inline=True
             )
@@ -307,14 +332,20 @@ class ProfileView(discord.ui.View):
 class CollectionView(discord.ui.View):
     """Paginated collection view"""
     
-    def __init__(self, waifus: list, page: int = 0):
+    def __init__(self, cursor):
         super().__init__(timeout=300.0)
-        self.waifus = waifus
-        self.page = page
-        self.per_page = 5
-        self.max_page = max(0, (len(waifus) - 1) // self.per_page)
+        self.cursor_id = cursor.cursor_id
         
-        # Update button states
+        # Only the visible page is kept; button states follow it
+        self.refresh(cursor)
+    
+    def refresh(self, cursor):
+        """Load the cursor's current page"""
+        self.page_waifus = pagination_engine.get_page(cursor)
+        self.page = cursor.page
+        self.max_page = pagination_engine.page_count(cursor) - 1
+        self.sort_by = cursor.sort_by
+        self.rarity_filter = cursor.filter[1] if cursor.filter else None
         self.update_buttons()
     
     def update_buttons(self):
@@ -328,17 +359,18 @@ class CollectionView(discord.ui.View):
     
     def create_embed(self) -> discord.Embed:
         """Create embed for current page"""
+        description = f"Your collected characters (Page {self.page + 1}/{self.max_page + 1})"
+        description += f"\nSorted by {self.sort_by}"
+        if self.rarity_filter:
+            description += f" • {self.rarity_filter} only"
+        
         embed = EmbedBuilder.create_embed(
             title="👥 Character Collection",
-            description=f"Your collected characters (Page {self.page + 1}/{self.max_page + 1})",
+            description=description,
             color=0xFF69B4
         )
         
-        start_idx = self.page * self.per_page
-        end_idx = start_idx + self.per_page
-        page_waifus = self.waifus[start_idx:end_idx]
-        
-        for i, waifu in enumerate(page_waifus, start_idx + 1):
+        for i, waifu in self.page_waifus:
             name = waifu.get("name", "Unknown")
             rarity = waifu.get("rarity", "N")
             level = waifu.get("level", 1)
@@ -353,32 +385,44 @@ class CollectionView(discord.ui.View):
                 inline=False
             )
         
-        if not page_waifus:
+        if not self.page_waifus:
             embed.description = "No characters found."
         
         return embed
     
-    @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.primary, custom_id="prev")
-    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Go to previous page"""
-        if self.page > 0:
-            self.page -= 1
-            self.update_buttons()
+    async def show_expired(self, interaction: discord.Interaction):
+        """Disable the buttons of a view whose cursor was evicted"""
+        for item in self.children:
+            item.disabled = True
+        await interaction.response.edit_message(
+            embed=EmbedBuilder.warning_embed("Collection Expired", "Use `!collection` to open it again."),
+            view=self
+        )
+        self.stop()
+    
+    async def turn_page(self, interaction: discord.Interaction, pages: int):
+        cursor = pagination_engine.get_cursor(self.cursor_id)
+        if cursor is None:
+            await self.show_expired(interaction)
+        elif pagination_engine.move(cursor, pages):
+            self.refresh(cursor)
             embed = self.create_embed()
             await interaction.response.edit_message(embed=embed, view=self)
         else:
             await interaction.response.defer()
     
+    async def on_timeout(self):
+        pagination_engine.close_cursor(self.cursor_id)
+    
+    @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.primary, custom_id="prev")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Go to previous page"""
+        await self.turn_page(interaction, -1)
+    
     @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.primary, custom_id="next")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Go to next page"""
-        if self.page < self.max_page:
-            self.page += 1
-            self.update_buttons()
-            embed = self.create_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
-        else:
-            await interaction.response.defer()
+        await self.turn_page(interaction, 1)
     
     @discord.ui.button(label="🔍 Filter", style=discord.ButtonStyle.secondary, custom_id="filter")
     async def filter_collection(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -405,31 +449,26 @@ class FilterModal(discord.ui.Modal, title="Filter Collection"):
     async def on_submit(self, interaction: discord.Interaction):
         """Apply filter"""
         try:
+            cursor = pagination_engine.get_cursor(self.collection_view.cursor_id)
+            if cursor is None:
+                await self.collection_view.show_expired(interaction)
+                return
+            
             filter_rarity = self.rarity.value.strip().upper()
+            previous_filter = cursor.filter
             
-            if filter_rarity:
-                # Filter waifus by rarity
-                filtered_waifus = [
-                    w for w in self.collection_view.waifus 
-                    if w.get("rarity", "N").split()[0].upper() == filter_rarity
-                ]
-                
-                if not filtered_waifus:
-                    await interaction.response.send_message(
-                        f"❌ No characters found with rarity: {filter_rarity}", 
-                        ephemeral=True
-                    )
-                    return
-                
-                self.collection_view.waifus = filtered_waifus
-            else:
-                # Reset to show all waifus - would need original list
-                pass
+            # An empty filter resets to the whole collection; either way back to the first page
+            pagination_engine.set_order(cursor, cursor.sort_by, ("rarity", filter_rarity) if filter_rarity else None)
+            
+            if filter_rarity and not pagination_engine.count(cursor):
+                pagination_engine.set_order(cursor, cursor.sort_by, previous_filter)
+                await interaction.response.send_message(
+                    f"❌ No characters found with rarity: {filter_rarity}", 
+                    ephemeral=True
+                )
+                return
             
-            # Reset to first page and update
-            self.collection_view.page = 0
-            self.collection_view.max_page = max(0, (len(self.collection_view.waifus) - 1) // self.collection_view.per_page)
-            self.collection_view.update_buttons()
+            self.collection_view.refresh(cursor)
             
             embed = self.collection_view.create_embed()
             await interaction.response.edit_message(embed=embed, view=self.collection_view)
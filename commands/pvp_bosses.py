@@ -1,15 +1,26 @@
 # PvP and Boss Battle Commands for KoKoroMichi Advanced Bot
 import discord
-from discord.ext import commands
-from typing import Optional, Dict, List, Any
+from discord.ext import commands, tasks
+from typing import Dict, Any
 import random
 import asyncio
 from datetime import datetime, timedelta
 
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
-from core.config import FEATURES
-from utils.helpers import format_number, calculate_battle_power
+from core.config import FEATURES, RAID_JOIN_WINDOW, RAID_MAX_PARTICIPANTS, BOSS_FLUSH_INTERVAL
+from utils.helpers import format_number
+from utils.power_cache import get_waifu_power
+from utils.rating_system import rating_system
+from utils.pvp_boss_manager import pvp_boss_manager
+from utils.raid_engine import RaidSimulation
+from utils.buff_snapshot import BuffSnapshot
+from utils.advanced_combat import battle_engine
+from utils.rng_service import rng_service, RNG_RAID
+from utils.top_k import top_k
+
+# Boss embed emoji by rarity
+BOSS_EMOJIS = {"legendary": "🐉", "epic": "💎", "rare": "👻"}
 
 class PvPBossCommands(commands.Cog):
     """Player vs Player duels and epic boss battles"""
@@ -19,60 +30,22 @@ class PvPBossCommands(commands.Cog):
         self.embed_builder = EmbedBuilder()
         self.active_duels = {}  # Track active PvP duels
         
-        # Boss templates
-        self.world_bosses = {
-            "shadow_dragon": {
-                "name": "Ancient Shadow Dragon",
-                "description": "A primordial dragon that devours light itself",
-                "hp": 50000,
-                "atk": 800,
-                "def": 400,
-                "special_abilities": ["Shadow Breath", "Dark Regeneration", "Eclipse Strike"],
-                "emoji": "🐉",
-                "required_players": 3,
-                "rewards": {
-                    "gold": (5000, 15000),
-                    "xp": (2000, 8000),
-                    "gems": (50, 150),
-                    "special_drops": ["Dragon Scale", "Shadow Essence", "Ancient Relic"]
-                },
-                "spawn_chance": 0.02
-            },
-            "crystal_golem": {
-                "name": "Crystalline Titan",
-                "description": "Massive golem made of pure magical crystals",
-                "hp": 35000,
-                "atk": 600,
-                "def": 600,
-                "special_abilities": ["Crystal Barrage", "Healing Aura", "Diamond Armor"],
-                "emoji": "💎",
-                "required_players": 2,
-                "rewards": {
-                    "gold": (3000, 10000),
-                    "xp": (1500, 6000),
-                    "gems": (30, 100),
-                    "special_drops": ["Crystal Core", "Gem Shard", "Titan's Heart"]
-                },
-                "spawn_chance": 0.03
-            },
-            "void_wraith": {
-                "name": "Lord of the Void",
-                "description": "Ethereal being from the space between dimensions",
-                "hp": 25000,
-                "atk": 1000,
-                "def": 200,
-                "special_abilities": ["Void Drain", "Phase Shift", "Reality Tear"],
-                "emoji": "👻",
-                "required_players": 2,
-                "rewards": {
-                    "gold": (2000, 8000),
-                    "xp": (1000, 5000),
-                    "gems": (25, 75),
-                    "special_drops": ["Void Essence", "Wraith Cloak", "Dimensional Key"]
-                },
-                "spawn_chance": 0.04
-            }
-        }
+        # Open raid waves per boss: everyone who joins within the window fights together
+        self.raid_waves: Dict[str, Dict[str, Any]] = {}
+    
+    async def cog_load(self):
+        self.flush_raid_state.start()
+    
+    def cog_unload(self):
+        self.flush_raid_state.cancel()
+        for wave in self.raid_waves.values():
+            wave["task"].cancel()
+        pvp_boss_manager.flush_active_bosses(force=True)
+    
+    @tasks.loop(seconds=BOSS_FLUSH_INTERVAL)
+    async def flush_raid_state(self):
+        """Write-behind for raid hits so a crash loses at most one interval of boss damage"""
+        pvp_boss_manager.flush_active_bosses(force=True)
     
     @commands.command(name="pvp_duel", aliases=["pvp", "challenge"])
     async def player_vs_player(self, ctx, opponent: discord.Member = None):
@@ -179,7 +152,7 @@ class PvPBossCommands(commands.Cog):
             
             # Show challenger's strongest character
             challenger_strongest = max(challenger_chars, key=lambda c: c.get("potential", 0))
-            challenger_power = calculate_battle_power(challenger_strongest)
+            challenger_power = get_waifu_power(challenger_strongest)
             
             embed.add_field(
                 name=f"🗡️ Challenger: {ctx.author.display_name}",
@@ -191,7 +164,7 @@ class PvPBossCommands(commands.Cog):
             
             # Show opponent's strongest character  
             opponent_strongest = max(opponent_chars, key=lambda c: c.get("potential", 0))
-            opponent_power = calculate_battle_power(opponent_strongest)
+            opponent_power = get_waifu_power(opponent_strongest)
             
             embed.add_field(
                 name=f"🛡️ Challenged: {opponent.display_name}",
@@ -257,12 +230,63 @@ class PvPBossCommands(commands.Cog):
             await ctx.send(embed=embed)
             print(f"Duel command error: {e}")
     
+    @commands.command(name="pvprating", aliases=["rating", "elo"])
+    async def pvp_rating(self, ctx, member: discord.Member = None):
+        """View a PvP rating, its deviation and recent rating history"""
+        try:
+            target = member or ctx.author
+            rating = rating_system.get_rating(str(target.id))
+            
+            embed = self.embed_builder.create_embed(
+                title=f"🥊 {target.display_name}'s PvP Rating",
+                color=0xFF4500
+            )
+            
+            rank_name = "Unranked"
+            pvp_config = data_manager._load_json(data_manager.data_dir / "pvp_bosses.json")
+            for rank_info in pvp_config.get("pvp_ranks", []):
+                if rank_info["min_rating"] <= rating["rating"] <= rank_info["max_rating"]:
+                    rank_name = rank_info["rank"]
+            
+            provisional = " (provisional)" if rating["provisional"] else ""
+            embed.add_field(
+                name="🏆 Rating",
+                value=f"**{rating['rating']:.0f}** ± {2 * rating['rd']:.0f}{provisional}\n"
+                      f"**Rank:** {rank_name}\n"
+                      f"**Rated Duels:** {rating['matches']}",
+                inline=True
+            )
+            
+            if rating["history"]:
+                history_text = "\n".join(f"Period {period}: {value} (±{2 * deviation})"
+                                          for period, value, deviation in rating["history"][-5:])
+                embed.add_field(name="📈 Recent Periods", value=history_text, inline=True)
+            
+            period_start = datetime.fromisoformat(rating_system.state["period_start"])
+            period_end = period_start + rating_system.period_length
+            hours_left = max(0, int((period_end - datetime.now()).total_seconds() // 3600))
+            embed.add_field(
+                name="⏳ Rating Period",
+                value=f"Duels are rated together at the end of each period (next update in ~{hours_left}h).",
+                inline=False
+            )
+            
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Rating Error",
+                "Unable to load PvP rating."
+            )
+            await ctx.send(embed=embed)
+            print(f"PvP rating error: {e}")
+    
     @commands.command(name="bosses", aliases=["world_boss", "raid"])
     async def boss_battles(self, ctx):
         """View active world bosses and join raids"""
         try:
-            game_data = data_manager.get_game_data()
-            active_bosses = game_data.get("active_bosses", [])
+            pvp_boss_manager.check_boss_spawns()
+            active_bosses = pvp_boss_manager.get_active_bosses()
             
             embed = self.embed_builder.create_embed(
                 title="🐉 World Boss Raids",
@@ -271,20 +295,22 @@ class PvPBossCommands(commands.Cog):
             )
             
             if active_bosses:
-                for boss_data in active_bosses:
-                    boss_info = self.world_bosses.get(boss_data["boss_type"], {})
-                    participants = len(boss_data.get("participants", []))
+                for boss in active_bosses:
+                    participants = len(boss.get("participants", []))
+                    wave = self.raid_waves.get(boss["boss_id"])
                     
-                    time_left = self.calculate_boss_time_remaining(boss_data["end_time"])
-                    hp_percentage = (boss_data["current_hp"] / boss_info["hp"]) * 100
+                    time_left = self.calculate_boss_time_remaining(boss["despawn_time"])
+                    hp_percentage = (boss["current_hp"] / boss["max_hp"]) * 100
+                    wave_text = f"**Next Wave:** {len(wave['participants'])} raiders ready\n" if wave else ""
                     
                     embed.add_field(
-                        name=f"{boss_info['emoji']} {boss_info['name']}",
-                        value=f"*{boss_info['description']}*\n"
+                        name=f"{BOSS_EMOJIS.get(boss.get('rarity'), '👹')} {boss['name']} (Lv.{boss['level']})",
+                        value=f"*{boss['description']}*\n"
                               f"**HP:** {hp_percentage:.1f}% remaining\n"
-                              f"**Participants:** {participants}/{boss_info['required_players']}\n"
+                              f"**Participants:** {participants}\n"
+                              f"{wave_text}"
                               f"**Time Left:** {time_left}\n"
-                              f"Use: `!join_raid {boss_data['boss_id'][:8]}`",
+                              f"Use: `!join_raid {boss['boss_id'][-6:]}`",
                         inline=True
                     )
             else:
@@ -299,9 +325,9 @@ class PvPBossCommands(commands.Cog):
             # Show boss spawn information
             embed.add_field(
                 name="🌟 Boss Information",
-                value="• Bosses require multiple players to defeat\n"
-                      "• Participants share epic rewards\n"
-                      "• Bosses have powerful special abilities\n"
+                value=f"• Raiders who join within {RAID_JOIN_WINDOW}s fight together in rounds\n"
+                      "• Participants share epic rewards by damage dealt\n"
+                      "• Bosses hit every raider with area attacks\n"
                       "• Rare bosses drop legendary items",
                 inline=False
             )
@@ -331,7 +357,7 @@ class PvPBossCommands(commands.Cog):
     
     @commands.command(name="join_raid", aliases=["attack_boss"])
     async def join_boss_raid(self, ctx, boss_id: str = None):
-        """Join an active world boss raid"""
+        """Join the next wave of a world boss raid"""
         try:
             if not boss_id:
                 embed = self.embed_builder.error_embed(
@@ -341,7 +367,8 @@ class PvPBossCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            user_data = data_manager.get_user_data(str(ctx.author.id))
+            user_id = str(ctx.author.id)
+            user_data = data_manager.get_user_data(user_id)
             user_characters = user_data.get("claimed_waifus", [])
             
             if not user_characters:
@@ -353,15 +380,7 @@ class PvPBossCommands(commands.Cog):
                 return
             
             # Find boss
-            game_data = data_manager.get_game_data()
-            active_bosses = game_data.get("active_bosses", [])
-            
-            target_boss = None
-            for boss in active_bosses:
-                if boss["boss_id"].startswith(boss_id):
-                    target_boss = boss
-                    break
-            
+            target_boss = pvp_boss_manager.find_active_boss(boss_id)
             if not target_boss:
                 embed = self.embed_builder.error_embed(
                     "Boss Not Found",
@@ -370,113 +389,164 @@ class PvPBossCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            # Check if user already joined this raid
-            participants = target_boss.get("participants", [])
-            if str(ctx.author.id) in [p["user_id"] for p in participants]:
+            # Check if user already joined this wave
+            wave = self.raid_waves.get(target_boss["boss_id"])
+            if wave and user_id in wave["participants"]:
                 embed = self.embed_builder.warning_embed(
                     "Already Joined",
-                    "You're already participating in this boss raid!"
+                    "You're already in the next wave of this raid!"
                 )
                 await ctx.send(embed=embed)
                 return
             
-            # Check if boss is still active
-            if target_boss["current_hp"] <= 0:
+            if wave and len(wave["participants"]) >= RAID_MAX_PARTICIPANTS:
                 embed = self.embed_builder.warning_embed(
-                    "Boss Defeated",
-                    "This boss has already been defeated!"
+                    "Raid Full",
+                    "This wave is full! Join the next one once it starts."
                 )
                 await ctx.send(embed=embed)
                 return
             
-            # Select strongest character for raid
-            strongest_char = max(user_characters, key=lambda c: c.get("potential", 0))
-            char_power = calculate_battle_power(strongest_char)
+            # Strongest character fights, with buffs fixed for the whole wave
+            strongest_char = max(user_characters, key=get_waifu_power)
+            snapshot = self.create_raid_snapshot(strongest_char, user_id, user_data)
             
-            # Calculate damage dealt
-            damage_dealt = int(char_power * random.uniform(0.8, 1.2))
+            if not wave:
+                wave = self.raid_waves[target_boss["boss_id"]] = {
+                    "participants": {},
+                    "starts_at": datetime.now() + timedelta(seconds=RAID_JOIN_WINDOW)
+                }
+                wave["task"] = asyncio.create_task(self.run_raid_wave(ctx.channel, target_boss["boss_id"]))
+            wave["participants"][user_id] = {"username": ctx.author.display_name, "snapshot": snapshot}
             
-            # Apply damage to boss
-            target_boss["current_hp"] = max(0, target_boss["current_hp"] - damage_dealt)
+            seconds_left = max(0, int((wave["starts_at"] - datetime.now()).total_seconds()))
+            embed = self.embed_builder.create_embed(
+                title=f"⚔️ Boss Raid: {target_boss['name']}",
+                description=f"**{strongest_char['name']}** readies for battle!",
+                color=0x8B0000
+            )
             
-            # Add participant
-            participant_data = {
-                "user_id": str(ctx.author.id),
-                "username": ctx.author.display_name,
-                "character_name": strongest_char["name"],
-                "damage_dealt": damage_dealt,
-                "joined_at": datetime.now().isoformat()
-            }
-            participants.append(participant_data)
+            embed.add_field(
+                name="👥 Next Wave",
+                value=f"**Raiders:** {len(wave['participants'])}\n"
+                      f"**Starts In:** {seconds_left}s\n"
+                      f"**Your Champion:** {strongest_char['name']}",
+                inline=True
+            )
             
-            # Check if boss is defeated
-            boss_info = self.world_bosses[target_boss["boss_type"]]
-            boss_defeated = target_boss["current_hp"] <= 0
+            embed.add_field(
+                name="🐉 Boss",
+                value=f"**HP:** {format_number(target_boss['current_hp'])}/{format_number(target_boss['max_hp'])}\n"
+                      f"**Level:** {target_boss['level']}",
+                inline=True
+            )
             
-            if boss_defeated:
-                # Distribute rewards to all participants
-                await self.distribute_boss_rewards(ctx, target_boss, boss_info, participants)
-                
-                # Remove boss from active list
-                active_bosses.remove(target_boss)
+            if snapshot.messages:
+                embed.add_field(name="✨ Active Buffs", value="\n".join(snapshot.messages), inline=False)
             
-            # Save game data
-            data_manager.save_game_data(game_data)
+            await ctx.send(embed=embed)
+            await self.log_pvp_boss_activity(ctx, "boss_attack", target_boss["name"])
+            
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Raid Error",
+                "Unable to join boss raid."
+            )
+            await ctx.send(embed=embed)
+            print(f"Join raid error: {e}")
+    
+    def create_raid_snapshot(self, character: Dict, user_id: str, user_data: Dict) -> BuffSnapshot:
+        """Buffed raid stats from the battle system (relic and trait bonuses only if it isn't loaded)"""
+        battle_cog = self.bot.get_cog("BattleCommands")
+        if battle_cog:
+            return battle_cog.buff_manager.create_snapshot(character, user_id, user_data)
+        snapshot = BuffSnapshot(character, user_id, user_data)
+        snapshot.stats = battle_engine.calculate_battle_stats(character)
+        snapshot.valid = True
+        return snapshot
+    
+    async def run_raid_wave(self, channel, boss_id: str):
+        """Play a raid wave once its join window closes"""
+        try:
+            await asyncio.sleep(RAID_JOIN_WINDOW)
+            wave = self.raid_waves.pop(boss_id, None)
+            boss = pvp_boss_manager.active_bosses.get("spawned_bosses", {}).get(boss_id)
+            if not wave or not boss:
+                return
+            
+            # One wave at a time per boss, from reading its HP until the damage is applied
+            async with pvp_boss_manager.get_boss_lock(boss_id):
+                if boss["status"] != "active":
+                    await channel.send(embed=self.embed_builder.warning_embed(
+                        "Raid Over", f"**{boss['name']}** is no longer active. The wave stands down."))
+                    return
+                
+                snapshots = [participant["snapshot"] for participant in wave["participants"].values()]
+                simulation = RaidSimulation(boss, snapshots, rng_service.stream(boss_id, RNG_RAID))
+                result = simulation.run()
+                success, message, applied = pvp_boss_manager.apply_raid_results(
+                    boss_id, result["breakdown"], result["boss_hp"], result["defeated"]
+                )
+            if not success:
+                await channel.send(embed=self.embed_builder.warning_embed("Raid Over", message))
+                return
             
-            # Create attack result embed
             embed = self.embed_builder.create_embed(
-                title=f"⚔️ Boss Raid: {boss_info['name']}",
-                description=f"**{strongest_char['name']}** unleashes a powerful attack!",
-                color=0x8B0000
+                title=f"⚔️ Raid Wave: {boss['name']}",
+                description=f"**{len(snapshots)}** raiders fought **{len(result['rounds'])}** rounds together!",
+                color=0x32CD32 if applied["boss_defeated"] else 0x8B0000
             )
             
+            log_lines = []
+            for round_info in result["rounds"]:
+                line = f"R{round_info['round']}: {format_number(round_info['damage'])} dmg"
+                if round_info["abilities"]:
+                    line += f" | {', '.join(round_info['abilities'])}"
+                if round_info["knocked_out"]:
+                    line += f" | 💀 {round_info['knocked_out']} down"
+                log_lines.append(line)
+            embed.add_field(name="📜 Battle Log", value="\n".join(log_lines) or "No rounds played", inline=False)
+            
+            standing = sum(1 for entry in result["breakdown"].values() if not entry["knocked_out"])
             embed.add_field(
-                name="💥 Attack Results",
-                value=f"**Damage Dealt:** {format_number(damage_dealt)}\n"
-                      f"**Boss HP:** {format_number(max(0, target_boss['current_hp']))}/{format_number(boss_info['hp'])}\n"
-                      f"**HP Remaining:** {(max(0, target_boss['current_hp']) / boss_info['hp'] * 100):.1f}%",
+                name="💥 Wave Results",
+                value=f"**Damage Dealt:** {format_number(applied['total_damage'])}\n"
+                      f"**Boss HP:** {format_number(applied['boss_hp_remaining'])}/{format_number(applied['boss_max_hp'])}\n"
+                      f"**Raiders Standing:** {standing}/{len(snapshots)}",
                 inline=True
             )
             
+            top_contributors = top_k(result["breakdown"].items(), 3, key=lambda item: item[1]["damage"])
             embed.add_field(
-                name="👥 Raid Progress",
-                value=f"**Participants:** {len(participants)}\n"
-                      f"**Required:** {boss_info['required_players']} minimum\n"
-                      f"**Your Champion:** {strongest_char['name']}",
+                name="🌟 Top Damage",
+                value="\n".join(f"{['🥇', '🥈', '🥉'][i]} **{wave['participants'][user_id]['username']}** "
+                                f"({entry['character']}): {format_number(entry['damage'])}"
+                                for i, (user_id, entry) in enumerate(top_contributors)),
                 inline=True
             )
             
-            if boss_defeated:
-                embed.add_field(
-                    name="🎉 BOSS DEFEATED!",
-                    value="The mighty foe has fallen! Rewards distributed to all participants!",
-                    inline=False
-                )
-                embed.color = 0x32CD32
-            else:
+            if not applied["boss_defeated"]:
                 embed.add_field(
                     name="⚡ Keep Fighting!",
-                    value="The boss still stands! More warriors needed!",
+                    value="The boss still stands! Join the next wave with `!join_raid`.",
                     inline=False
                 )
+            await channel.send(embed=embed)
             
-            await ctx.send(embed=embed)
-            await self.log_pvp_boss_activity(ctx, "boss_attack", f"{boss_info['name']} - {format_number(damage_dealt)} damage")
+            if applied["boss_defeated"]:
+                await self.distribute_boss_rewards(channel, boss, applied["rewards"])
             
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            embed = self.embed_builder.error_embed(
-                "Raid Error",
-                "Unable to join boss raid."
-            )
-            await ctx.send(embed=embed)
-            print(f"Join raid error: {e}")
+            print(f"Raid wave error: {e}")
     
     async def execute_duel(self, ctx, message, challenger, opponent, challenger_char, opponent_char):
         """Execute PvP duel between two players"""
         try:
             # Calculate battle powers
-            challenger_power = calculate_battle_power(challenger_char)
-            opponent_power = calculate_battle_power(opponent_char)
+            challenger_power = get_waifu_power(challenger_char)
+            opponent_power = get_waifu_power(opponent_char)
             
             # Add some randomness to battle
             challenger_final = challenger_power + random.randint(-200, 300)
@@ -502,9 +572,11 @@ class PvPBossCommands(commands.Cog):
             loser_data["gold"] = loser_data.get("gold", 0) + consolation_gold
             loser_data["xp"] = loser_data.get("xp", 0) + consolation_xp
             
-            # Update PvP stats
+            # Update PvP stats; ratings move when the rating period closes
             self.update_pvp_stats(winner_data, True, gold_reward)
             self.update_pvp_stats(loser_data, False, consolation_gold)
+            rating_gain, rating_loss = rating_system.preview_match(str(winner.id), str(loser.id))
+            rating_system.record_match(str(winner.id), str(loser.id), 1.0)
             
             # Save data
             data_manager.save_user_data(str(winner.id), winner_data)
@@ -534,7 +606,7 @@ class PvPBossCommands(commands.Cog):
                 name="🎁 Winner Rewards",
                 value=f"💰 Gold: +{format_number(gold_reward)}\n"
                       f"⭐ XP: +{format_number(xp_reward)}\n"
-                      f"🏆 PvP Points: +25",
+                      f"🏆 Rating: ~+{rating_gain}",
                 inline=True
             )
             
@@ -542,7 +614,7 @@ class PvPBossCommands(commands.Cog):
                 name="💙 Consolation Rewards",
                 value=f"💰 Gold: +{format_number(consolation_gold)}\n"
                       f"⭐ XP: +{format_number(consolation_xp)}\n"
-                      f"🏆 PvP Points: +10",
+                      f"🏆 Rating: ~-{rating_loss}",
                 inline=True
             )
             
@@ -552,107 +624,74 @@ class PvPBossCommands(commands.Cog):
         except Exception as e:
             print(f"Duel execution error: {e}")
     
-    async def distribute_boss_rewards(self, ctx, boss_data: Dict, boss_info: Dict, participants: List[Dict]):
-        """Distribute rewards to boss raid participants"""
+    async def distribute_boss_rewards(self, channel, boss: Dict, rewards: Dict[str, Dict]):
+        """Announce a boss defeat and notify participants of the rewards the manager paid out"""
         try:
-            rewards = boss_info["rewards"]
-            
-            for participant in participants:
-                user_id = participant["user_id"]
-                user_data = data_manager.get_user_data(user_id)
-                
-                # Calculate individual rewards based on damage contribution
-                damage_contribution = participant["damage_dealt"]
-                total_damage = sum(p["damage_dealt"] for p in participants)
-                contribution_percentage = damage_contribution / total_damage if total_damage > 0 else 0
-                
-                # Base rewards
-                base_gold = random.randint(rewards["gold"][0], rewards["gold"][1])
-                base_xp = random.randint(rewards["xp"][0], rewards["xp"][1])
-                base_gems = random.randint(rewards["gems"][0], rewards["gems"][1])
-                
-                # Apply contribution bonus (top contributors get more)
-                if contribution_percentage >= 0.3:  # Top contributor
-                    gold_reward = int(base_gold * 1.5)
-                    xp_reward = int(base_xp * 1.5)
-                    gem_reward = int(base_gems * 1.3)
-                    bonus_text = "🌟 Top Contributor Bonus!"
-                elif contribution_percentage >= 0.15:  # High contributor
-                    gold_reward = int(base_gold * 1.2)
-                    xp_reward = int(base_xp * 1.2)
-                    gem_reward = int(base_gems * 1.1)
-                    bonus_text = "⭐ High Contributor Bonus!"
-                else:  # Regular participant
-                    gold_reward = base_gold
-                    xp_reward = base_xp
-                    gem_reward = base_gems
-                    bonus_text = ""
-                
-                # Apply rewards
-                user_data["gold"] = user_data.get("gold", 0) + gold_reward
-                user_data["xp"] = user_data.get("xp", 0) + xp_reward
-                user_data["gems"] = user_data.get("gems", 0) + gem_reward
-                
-                # Update boss battle stats
-                boss_stats = user_data.setdefault("boss_battle_stats", {})
-                boss_stats["bosses_defeated"] = boss_stats.get("bosses_defeated", 0) + 1
-                boss_stats["total_damage"] = boss_stats.get("total_damage", 0) + damage_contribution
-                boss_stats["raids_joined"] = boss_stats.get("raids_joined", 0) + 1
-                
-                # Save data
-                data_manager.save_user_data(user_id, user_data)
-                
-                # Send individual reward notification
-                try:
-                    user = self.bot.get_user(int(user_id))
-                    if user:
-                        reward_embed = self.embed_builder.success_embed(
-                            "🐉 Boss Defeated!",
-                            f"**{boss_info['name']}** has been vanquished!"
-                        )
-                        
-                        reward_embed.add_field(
-                            name="🎁 Your Rewards",
-                            value=f"💰 Gold: +{format_number(gold_reward)}\n"
-                                  f"⭐ XP: +{format_number(xp_reward)}\n"
-                                  f"💎 Gems: +{gem_reward}\n"
-                                  f"{bonus_text}",
-                            inline=False
-                        )
-                        
-                        await user.send(embed=reward_embed)
-                except:
-                    pass  # Ignore if can't DM user
+            contributions = boss.get("contributions", {})
             
             # Announce boss defeat in the channel
             defeat_embed = self.embed_builder.create_embed(
-                title=f"🏆 {boss_info['name']} Defeated!",
-                description=f"The mighty **{boss_info['name']}** has fallen to the combined might of {len(participants)} heroes!",
+                title=f"🏆 {boss['name']} Defeated!",
+                description=f"The mighty **{boss['name']}** has fallen to the combined might of {len(rewards)} heroes! "
+                            f"Rewards distributed to all participants!",
                 color=0x32CD32
             )
             
             # Show top contributors
-            top_contributors = sorted(participants, key=lambda p: p["damage_dealt"], reverse=True)[:3]
+            top_contributors = top_k(rewards.items(), 3, key=lambda item: item[1]["damage"])
             contributors_text = ""
             
-            for i, contributor in enumerate(top_contributors):
+            for i, (user_id, reward) in enumerate(top_contributors):
                 medal = ["🥇", "🥈", "🥉"][i]
-                contributors_text += f"{medal} **{contributor['username']}** ({contributor['character_name']})\n"
-                contributors_text += f"   Damage: {format_number(contributor['damage_dealt'])}\n"
+                user = self.bot.get_user(int(user_id))
+                contributors_text += f"{medal} **{user.display_name if user else 'Unknown'}** ({reward['contribution']:.1%})\n"
+                contributors_text += f"   Damage: {format_number(reward['damage'])}\n"
             
             defeat_embed.add_field(
                 name="🌟 Top Contributors",
-                value=contributors_text,
+                value=contributors_text or "No contributors",
                 inline=False
             )
             
-            await ctx.send(embed=defeat_embed)
+            await channel.send(embed=defeat_embed)
+            
+            for user_id, reward in rewards.items():
+                # Send individual reward notification
+                try:
+                    user = self.bot.get_user(int(user_id))
+                    if user:
+                        contribution = contributions.get(user_id, {})
+                        items = reward["guaranteed_items"] + reward["rare_drops"]
+                        reward_embed = self.embed_builder.success_embed(
+                            "🐉 Boss Defeated!",
+                            f"**{boss['name']}** has been vanquished!"
+                        )
+                        
+                        reward_embed.add_field(
+                            name="📊 Your Contribution",
+                            value=f"**Damage:** {format_number(reward['damage'])} ({reward['contribution']:.1%})\n"
+                                  f"**Critical Hits:** {contribution.get('crits', 0)}\n"
+                                  f"**Damage Taken:** {format_number(contribution.get('damage_taken', 0))}",
+                            inline=True
+                        )
+                        
+                        reward_embed.add_field(
+                            name="🎁 Your Rewards",
+                            value=f"💰 Gold: +{format_number(reward['gold'])}\n"
+                                  f"⭐ XP: +{format_number(reward['xp'])}\n"
+                                  f"🎒 Items: {', '.join(items) if items else 'None'}",
+                            inline=True
+                        )
+                        
+                        await user.send(embed=reward_embed)
+                except:
+                    pass  # Ignore if can't DM user
             
         except Exception as e:
             print(f"Boss reward distribution error: {e}")
     
     def update_pvp_stats(self, user_data: Dict, won: bool, gold_earned: int):
-        """Update user's PvP statistics"""
+        """Update user's PvP statistics (the rating itself lives in the rating system)"""
         pvp_stats = user_data.setdefault("pvp_stats", {})
         
         pvp_stats["total_duels"] = pvp_stats.get("total_duels", 0) + 1
@@ -662,11 +701,9 @@ class PvPBossCommands(commands.Cog):
             pvp_stats["duels_won"] = pvp_stats.get("duels_won", 0) + 1
             pvp_stats["current_win_streak"] = pvp_stats.get("current_win_streak", 0) + 1
             pvp_stats["best_win_streak"] = max(pvp_stats.get("best_win_streak", 0), pvp_stats["current_win_streak"])
-            pvp_stats["ranking_points"] = pvp_stats.get("ranking_points", 1000) + 25
         else:
             pvp_stats["duels_lost"] = pvp_stats.get("duels_lost", 0) + 1
             pvp_stats["current_win_streak"] = 0
-            pvp_stats["ranking_points"] = max(800, pvp_stats.get("ranking_points", 1000) - 10)
     
     def calculate_boss_time_remaining(self, end_time: str) -> str:
         """Calculate time remaining for boss"""
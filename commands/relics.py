@@ -9,6 +9,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
+from utils.collection_stats import collection_stats
 
 class RelicsCommands(commands.Cog):
     """Ancient relics system with powerful equipment and buffs"""
@@ -177,6 +178,7 @@ class RelicsCommands(commands.Cog):
             
             # Apply stat bonuses
             self.apply_relic_stats(character, relic)
+            collection_stats.update_waifu(str(ctx.author.id), character)
             
             # Save data
             data_manager.save_user_data(str(ctx.author.id), user_data)
@@ -10,6 +10,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
+from utils.collection_stats import collection_stats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -278,7 +279,7 @@ class StoreCommands(commands.Cog):
             
             # Apply item effects
             for _ in range(quantity):
-                self.apply_item_effect(user_data, item_data)
+                self.apply_item_effect(str(ctx.author.id), user_data, item_data)
             
             # Update purchase history
             self.update_purchase_stats(user_data, item_id, quantity, total_cost)
@@ -451,8 +452,8 @@ class StoreCommands(commands.Cog):
         vip_items = user_data.get("inventory", {}).get("vip_pass", 0)
         return total_spent >= 50000 or vip_items > 0
     
-    def apply_item_effect(self, user_data: Dict, item_data: Dict):
-        """Apply item effect to user data"""
+    def apply_item_effect(self, user_id: str, user_data: Dict, item_data: Dict):
+        """Apply item effect to user data (and the player's collection aggregates)"""
         effect = item_data["effect"]
         effect_type = effect["type"]
         
@@ -473,6 +474,7 @@ class StoreCommands(commands.Cog):
                 stat = effect["stat"]
                 strongest[stat] = strongest.get(stat, 0) + effect["value"]
                 strongest["potential"] = strongest.get("potential", 0) + effect["value"] * 10
+                collection_stats.update_waifu(user_id, strongest)
         
         elif effect_type == "access":
             # Add access permissions
@@ -490,6 +492,7 @@ class StoreCommands(commands.Cog):
             if characters:
                 random_char = random.choice(characters)
                 random_char["affection"] = random_char.get("affection", 0) + effect["value"]
+                collection_stats.update_waifu(user_id, random_char)
         
         elif effect_type == "random_rewards":
             # Open mystery box
@@ -1,16 +1,24 @@
 # Summoning System Commands for KoKoroMichi Advanced Bot
 import discord
 from discord.ext import commands
-from typing import Optional, Dict, List
+from typing import Dict, List
 import random
 import asyncio
-from datetime import datetime
 
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
-from core.config import RARITY_TIERS, SUMMON_COST, BULK_SUMMON_DISCOUNT
-from utils.helpers import format_number, generate_random_stats, get_random_element
+from core.config import (
+    RARITY_TIERS, SUMMON_COST, BULK_SUMMON_DISCOUNT, DEFAULT_BANNER_ID,
+    PITY_SR_GUARANTEE, PITY_SSR_GUARANTEE, PITY_SOFT_BOOSTS
+)
+from utils.helpers import format_number
 from utils.channel_restriction import check_channel_restriction
+from utils.summon_engine import summon_engine
+from utils.rng_service import rng_service, RNG_SUMMON
+from utils.history import add_summons
+from utils.affinity_manager import affinity_manager
+from utils.collection_stats import collection_stats
+from utils.top_k import get_top_waifus
 
 class SummonCommands(commands.Cog):
     """Character summoning and gacha system"""
@@ -21,7 +29,7 @@ class SummonCommands(commands.Cog):
         self.active_summons = set()  # Prevent concurrent summons
     
     @commands.command(name="summon", aliases=["pull", "gacha"])
-    async def summon_character(self, ctx, amount: int = 1):
+    async def summon_character(self, ctx, amount: int = 1, banner_id: str = DEFAULT_BANNER_ID):
         """Summon new characters using the gacha system"""
         # Enforce channel restrictions for summon commands
         restriction_result = await check_channel_restriction(
@@ -40,6 +48,16 @@ class SummonCommands(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
+            # Validate banner
+            banner = summon_engine.get_banner(banner_id.lower())
+            if not banner or not banner.is_active():
+                embed = self.embed_builder.error_embed(
+                    "Unknown Banner",
+                    f"Banner `{banner_id}` is not available. Use `!banners` to see active banners."
+                )
+                await ctx.send(embed=embed)
+                return
+            
             # Check if user is already summoning
             if str(ctx.author.id) in self.active_summons:
                 embed = self.embed_builder.warning_embed(
@@ -71,21 +89,29 @@ class SummonCommands(commands.Cog):
                 # Show summoning animation
                 animation_msg = await ctx.send(embed=self.create_summoning_animation_embed(amount))
                 
-                # Perform summons
-                summoned_characters = []
-                for i in range(amount):
-                    character = await self.perform_single_summon(user_data)
-                    if character:
-                        summoned_characters.append(character)
-                    
-                    # Update animation every few summons
-                    if amount > 5 and i % 3 == 0:
-                        await animation_msg.edit(embed=self.create_summoning_animation_embed(amount, i + 1))
-                        await asyncio.sleep(0.5)
+                # Perform all summons in a single batch (pity applies in pull order) on a
+                # seeded stream so the batch can be replayed from the summon history
+                rng = rng_service.stream(ctx.author.id, RNG_SUMMON)
+                pity_before = dict(summon_engine.get_pity_state(user_data))
+                summoned_characters = await self.perform_batch_summon(user_data, amount, banner.banner_id, rng)
+                if not summoned_characters:
+                    embed = self.embed_builder.error_embed(
+                        "Summon Failed",
+                        "No characters could be summoned from this banner. Your gems were not spent."
+                    )
+                    await animation_msg.edit(embed=embed)
+                    return
+                
+                if amount > 5:
+                    await animation_msg.edit(embed=self.create_summoning_animation_embed(amount, amount))
+                    await asyncio.sleep(0.5)
                 
                 # Deduct cost and update user data
                 user_data["gems"] -= total_cost
                 user_data["claimed_waifus"].extend(summoned_characters)
+                for character in summoned_characters:
+                    affinity_manager.add_team_member(str(ctx.author.id), character["name"])
+                collection_stats.add_waifus(str(ctx.author.id), summoned_characters)
                 
                 # Update summoning statistics
                 user_data.setdefault("summon_stats", {})
@@ -93,6 +119,8 @@ class SummonCommands(commands.Cog):
                 user_data["summon_stats"]["gems_spent"] = user_data["summon_stats"].get("gems_spent", 0) + total_cost
                 
                 data_manager.save_user_data(str(ctx.author.id), user_data)
+                add_summons(str(ctx.author.id), summoned_characters, seed=rng.stream_seed,
+                            banner=banner.banner_id, pity=pity_before, batch_size=amount)
                 
                 # Show results
                 if amount == 1:
@@ -137,10 +165,9 @@ class SummonCommands(commands.Cog):
         
         # Show rarity rates
         rates_text = ""
-        for rarity, data in RARITY_TIERS.items():
-            emoji = data["emoji"]
-            chance = data["chance"]
-            rates_text += f"{emoji} **{rarity}**: {chance}%\n"
+        for rarity, chance in summon_engine.get_effective_rates().items():
+            emoji = RARITY_TIERS[rarity]["emoji"]
+            rates_text += f"{emoji} **{rarity}**: {chance:g}%\n"
         
         embed.add_field(
             name="🎯 Drop Rates",
@@ -163,12 +190,45 @@ class SummonCommands(commands.Cog):
         # Pity system info
         embed.add_field(
             name="🎁 Pity System",
-            value="• Guaranteed SR+ every 20 summons\n"
-                  "• Guaranteed SSR+ every 50 summons\n"
-                  "• Rates increase with consecutive summons",
+            value=f"• Guaranteed SR+ every {PITY_SR_GUARANTEE} summons\n"
+                  f"• Guaranteed SSR+ every {PITY_SSR_GUARANTEE} summons\n"
+                  f"• SSR+ rates increase after {min(PITY_SOFT_BOOSTS)} summons without one",
             inline=False
         )
         
+        # Active banners
+        banners_text = "\n".join(
+            f"• **{banner.name}** (`{banner.banner_id}`)" for banner in summon_engine.get_active_banners()
+        )
+        embed.add_field(
+            name="🎏 Active Banners",
+            value=banners_text or "None",
+            inline=False
+        )
+        
+        await ctx.send(embed=embed)
+    
+    @commands.command(name="banners", aliases=["summon_banners"])
+    async def summon_banners(self, ctx):
+        """Display active summon banners and their featured characters"""
+        embed = self.embed_builder.create_embed(
+            title="🎏 Summon Banners",
+            description="Use `!summon <amount> <banner>` to summon from a banner",
+            color=0x9370DB
+        )
+        
+        for banner in summon_engine.get_active_banners():
+            value = banner.description or "Standard summoning pool"
+            if banner.rate_up:
+                value += f"\n⬆️ Rate-up: {', '.join(banner.rate_up[:5])}"
+            if banner.ends_at:
+                value += f"\n⏱️ Ends: {banner.ends_at[:10]}"
+            embed.add_field(
+                name=f"{banner.name} (`{banner.banner_id}`)",
+                value=value,
+                inline=False
+            )
+        
         await ctx.send(embed=embed)
     
     def calculate_summon_cost(self, amount: int) -> int:
@@ -179,75 +239,14 @@ class SummonCommands(commands.Cog):
         else:
             return SUMMON_COST * amount
     
-    async def perform_single_summon(self, user_data: dict) -> Optional[Dict]:
-        """Perform a single character summon"""
+    async def perform_batch_summon(self, user_data: dict, amount: int,
+                                   banner_id: str = DEFAULT_BANNER_ID, rng=None) -> List[Dict]:
+        """Perform a batch of character summons"""
         try:
-            # Get all available characters
-            all_characters = data_manager.get_all_characters()
-            if not all_characters:
-                return None
-            
-            # Determine rarity using pity system
-            summon_count = user_data.get("summon_stats", {}).get("total_summons", 0)
-            rarity_tier = self.determine_rarity_with_pity(summon_count)
-            
-            # Select random character
-            base_character = random.choice(all_characters)
-            
-            # Generate stats based on rarity
-            stats = generate_random_stats(rarity_tier)
-            
-            # Create summoned character
-            summoned_character = {
-                "name": base_character.get("name", "Unknown"),
-                "rarity": f"{rarity_tier} {RARITY_TIERS[rarity_tier]['emoji']}",
-                "level": 1,
-                "exp": 0,
-                "max_exp": 100,
-                "hp": stats["hp"],
-                "atk": stats["atk"],
-                "def": stats["def"],
-                "potential": sum(stats.values()) + random.randint(0, 500),
-                "element": base_character.get("element", get_random_element()),
-                "skills": base_character.get("skills", []),
-                "fate": base_character.get("fate", []),
-                "affection": 0,
-                "summoned_at": datetime.now().isoformat(),
-                "relic": None
-            }
-            
-            return summoned_character
-            
+            return summon_engine.pull_many(user_data, amount, banner_id, rng)
         except Exception as e:
-            print(f"Single summon error: {e}")
-            return None
-    
-    def determine_rarity_with_pity(self, summon_count: int) -> str:
-        """Determine rarity tier with pity system"""
-        # Pity boosts
-        pity_boost = 0
-        if summon_count >= 50:
-            pity_boost += 5.0  # 5% boost after 50 summons
-        elif summon_count >= 20:
-            pity_boost += 2.0  # 2% boost after 20 summons
-        
-        # Generate random number
-        rand = random.uniform(0, 100)
-        cumulative = 0
-        
-        # Check each rarity tier
-        for rarity, data in RARITY_TIERS.items():
-            chance = data["chance"]
-            
-            # Apply pity boost to rare tiers
-            if rarity in ["SSR", "UR", "LR", "Mythic"]:
-                chance += pity_boost
-            
-            cumulative += chance
-            if rand <= cumulative:
-                return rarity
-        
-        return "N"  # Fallback
+            print(f"Batch summon error: {e}")
+            return []
     
     def get_rarity_tier(self, rarity_string: str) -> str:
         """Extract rarity tier from rarity string"""
@@ -373,8 +372,8 @@ class SummonCommands(commands.Cog):
             inline=True
         )
         
-        # Show best summons
-        best_characters = sorted(characters, key=lambda c: int(c.get("potential", 0)) if isinstance(c.get("potential", 0), (int, str)) else 0, reverse=True)[:3]
+        # Show best summons (of this batch, not the whole collection)
+        best_characters = get_top_waifus(None, characters, "potential", 3)
         best_text = ""
         for i, char in enumerate(best_characters, 1):
             name = char.get("name", "Unknown")
@@ -0,0 +1,386 @@
+# Arena Tournament Commands for KoKoroMichi Advanced Bot
+import discord
+from discord.ext import commands
+from typing import Optional, Dict, List, Any
+import asyncio
+import time
+from datetime import datetime
+
+from core.data_manager import data_manager
+from core.embed_utils import EmbedBuilder
+from core.config import TOURNAMENT_MIN_PLAYERS, TOURNAMENT_MAX_PLAYERS, TOURNAMENT_SIGNUP_MINUTES
+from utils.helpers import format_number
+from utils.tournament import tournament_manager
+
+# Matches shown per results page
+MATCHES_PER_PAGE = 10
+
+# Seconds between attempts to pay out a finished tournament whose reward save failed
+REWARD_RETRY_SECONDS = 60
+
+
+class TournamentResultsView(discord.ui.View):
+    """Paginated match results, one page of matches at a time"""
+
+    def __init__(self, title: str, lines: List[str]):
+        super().__init__(timeout=300.0)
+        self.title = title
+        self.lines = lines
+        self.page = 0
+        self.max_page = max(0, (len(lines) - 1) // MATCHES_PER_PAGE)
+        self.update_buttons()
+
+    def update_buttons(self):
+        """Update button states"""
+        for item in self.children:
+            if isinstance(item, discord.ui.Button):
+                if item.custom_id == "prev":
+                    item.disabled = (self.page <= 0)
+                elif item.custom_id == "next":
+                    item.disabled = (self.page >= self.max_page)
+
+    def create_embed(self) -> discord.Embed:
+        return EmbedBuilder.paginated_embed(self.title, self.lines, self.page, MATCHES_PER_PAGE)
+
+    @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.primary, custom_id="prev")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.page > 0:
+            self.page -= 1
+            self.update_buttons()
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
+        else:
+            await interaction.response.defer()
+
+    @discord.ui.button(label="▶️ Next", style=discord.ButtonStyle.primary, custom_id="next")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.page < self.max_page:
+            self.page += 1
+            self.update_buttons()
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
+        else:
+            await interaction.response.defer()
+
+
+class TournamentCommands(commands.Cog):
+    """Rating-seeded single elimination arena tournaments"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.embed_builder = EmbedBuilder()
+        self.start_tasks: Dict[str, asyncio.Task] = {}
+        self.reward_tasks: Dict[str, asyncio.Task] = {}
+
+    async def cog_load(self):
+        """Re-arm signup timers and unpaid rewards of tournaments from before a restart"""
+        for guild_id, tournament in tournament_manager.tournaments.items():
+            if tournament["status"] == "finished" and not tournament.get("rewarded"):
+                tournament_manager.distribute_rewards(guild_id)
+                if not tournament.get("rewarded"):
+                    self.schedule_reward_retry(guild_id)
+            elif tournament["status"] == "signup":
+                self.schedule_start(guild_id, tournament)
+            elif tournament["status"] == "running":
+                # Interrupted mid-run: replay it from the start
+                tournament["status"] = "signup"
+                tournament["rounds"] = []
+                tournament_manager.save()
+                self.schedule_start(guild_id, tournament)
+
+    def cog_unload(self):
+        for task in list(self.start_tasks.values()) + list(self.reward_tasks.values()):
+            task.cancel()
+
+    def schedule_start(self, guild_id: str, tournament: Dict[str, Any]):
+        """Start the tournament when its signup window closes"""
+        delay = max(0, (datetime.fromisoformat(tournament["signup_ends"]) - datetime.now()).total_seconds())
+        previous = self.start_tasks.pop(str(guild_id), None)
+        if previous:
+            previous.cancel()
+        self.start_tasks[str(guild_id)] = asyncio.create_task(self.start_after(str(guild_id), delay))
+
+    async def start_after(self, guild_id: str, delay: float):
+        await asyncio.sleep(delay)
+        self.start_tasks.pop(guild_id, None)
+        tournament = tournament_manager.get_tournament(guild_id)
+        if tournament and tournament["status"] == "signup":
+            await self.run_tournament(guild_id)
+
+    def schedule_reward_retry(self, guild_id: str):
+        """Keep retrying a finished tournament's payout until it is saved"""
+        if str(guild_id) not in self.reward_tasks:
+            self.reward_tasks[str(guild_id)] = asyncio.create_task(self.retry_rewards(str(guild_id)))
+
+    async def retry_rewards(self, guild_id: str):
+        try:
+            while True:
+                await asyncio.sleep(REWARD_RETRY_SECONDS)
+                tournament = tournament_manager.get_tournament(guild_id)
+                if not tournament or tournament["status"] != "finished" or tournament.get("rewarded"):
+                    return
+                tournament_manager.distribute_rewards(guild_id)
+                if tournament.get("rewarded"):
+                    channel = self.get_channel(tournament)
+                    if channel:
+                        await channel.send(embed=self.embed_builder.success_embed(
+                            "Tournament Rewards Paid",
+                            f"Rewards for Tournament #{tournament['id']} have been paid out."
+                        ))
+                    return
+        finally:
+            self.reward_tasks.pop(guild_id, None)
+
+    def can_manage(self, ctx, tournament: Optional[Dict[str, Any]] = None) -> bool:
+        """Server managers, or the organiser of this tournament"""
+        if ctx.author.guild_permissions.manage_guild:
+            return True
+        return bool(tournament) and tournament.get("created_by") == str(ctx.author.id)
+
+    def get_channel(self, tournament: Dict[str, Any]) -> Optional[discord.abc.Messageable]:
+        return self.bot.get_channel(int(tournament["channel_id"]))
+
+    def format_match(self, tournament: Dict[str, Any], match: Dict[str, Any]) -> str:
+        """One results line"""
+        entrants = tournament["entrants"]
+        seeds = {user_id: index + 1 for index, user_id in enumerate(tournament.get("seeds", []))}
+
+        def name(user_id):
+            return f"{entrants[user_id]['name']} (#{seeds.get(user_id, '?')})"
+
+        if match.get("bye"):
+            return f"⏩ {name(match['winner'])} advances (bye)"
+        loser = match["p2"] if match["winner"] == match["p1"] else match["p1"]
+        return f"⚔️ **{name(match['winner'])}** def. {name(loser)} in {match['turns']} turns"
+
+    def create_round_view(self, tournament: Dict[str, Any], round_index: int) -> TournamentResultsView:
+        round_info = tournament["rounds"][round_index]
+        lines = [self.format_match(tournament, match) for match in round_info["matches"]]
+        return TournamentResultsView(f"🏟️ Tournament #{tournament['id']} - {round_info['name']}", lines)
+
+    async def run_tournament(self, guild_id: str):
+        """Play a tournament, posting each round and the final standings"""
+        tournament = tournament_manager.get_tournament(guild_id)
+        channel = self.get_channel(tournament)
+
+        async def publish_round(tournament: Dict[str, Any], round_info: Dict[str, Any]):
+            if channel:
+                view = self.create_round_view(tournament, len(tournament["rounds"]) - 1)
+                await channel.send(embed=view.create_embed(), view=view)
+
+        try:
+            started = time.perf_counter()
+            if channel:
+                await channel.send(embed=self.embed_builder.info_embed(
+                    "Tournament Starting",
+                    f"**{len(tournament['entrants'])}** champions enter the bracket. Seeds follow PvP rating!"
+                ))
+            await tournament_manager.run_tournament(guild_id, on_round=publish_round)
+            rewards = tournament_manager.distribute_rewards(guild_id)
+            if not tournament.get("rewarded"):
+                self.schedule_reward_retry(guild_id)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            if channel:
+                await channel.send(embed=self.embed_builder.error_embed("Tournament Error", str(e)))
+            print(f"Tournament run error: {e}")
+            return
+
+        if channel:
+            await channel.send(embed=self.create_standings_embed(tournament, rewards, elapsed))
+
+    def create_standings_embed(self, tournament: Dict[str, Any], rewards: Dict[str, Dict[str, Any]],
+                               elapsed: float) -> discord.Embed:
+        entrants = tournament["entrants"]
+        champion = tournament["champion"]
+        embed = self.embed_builder.create_embed(
+            title=f"🏆 Tournament #{tournament['id']} Complete!",
+            description=f"**{entrants[champion]['name']}** is the Arena Champion!",
+            color=0xFFD700
+        )
+
+        medals = {"1st": "🥇", "2nd": "🥈", "3rd": "🥉"}
+        podium = []
+        for placement in ("1st", "2nd", "3rd"):
+            for user_id, reward in rewards.items():
+                if reward["placement"] == placement:
+                    extras = ", ".join(part for part in (reward.get("title"), reward.get("item")) if part)
+                    podium.append(f"{medals[placement]} **{entrants[user_id]['name']}** - "
+                                  f"{format_number(reward['gold'])} gold" + (f" ({extras})" if extras else ""))
+        if podium:
+            embed.add_field(name="🎖️ Podium", value="\n".join(podium), inline=False)
+
+        embed.add_field(
+            name="📊 Tournament",
+            value=f"**Players:** {len(entrants)}\n**Rounds:** {len(tournament['rounds'])}\n"
+                  f"**Simulated in:** {elapsed:.1f}s",
+            inline=True
+        )
+        embed.add_field(
+            name="🎁 Everyone Else",
+            value="Participation gold plus a bonus for every match won has been paid out." if tournament.get("rewarded")
+                  else "Rewards could not be saved yet and will be paid out shortly.",
+            inline=True
+        )
+        return embed
+
+    @commands.group(name="tournament", aliases=["tourney"], invoke_without_command=True)
+    async def tournament(self, ctx):
+        """View the current tournament"""
+        try:
+            if not ctx.guild:
+                await ctx.send(embed=self.embed_builder.error_embed("Server Only", "Tournaments are run per server."))
+                return
+            tournament = tournament_manager.get_tournament(ctx.guild.id)
+            prefix = ctx.clean_prefix
+
+            if not tournament or tournament["status"] in ("finished", "cancelled"):
+                embed = self.embed_builder.info_embed(
+                    "No Active Tournament",
+                    f"Server managers can open signups with `{prefix}tournament create [minutes] [max players]`."
+                )
+                if tournament and tournament["status"] == "finished":
+                    champion = tournament["entrants"][tournament["champion"]]["name"]
+                    embed.add_field(
+                        name=f"🏆 Last Champion (Tournament #{tournament['id']})",
+                        value=f"**{champion}** - see `{prefix}tournament bracket` for results",
+                        inline=False
+                    )
+                await ctx.send(embed=embed)
+                return
+
+            entrants = tournament["entrants"]
+            embed = self.embed_builder.create_embed(
+                title=f"🏟️ Arena Tournament #{tournament['id']}",
+                description="Single elimination - seeded by PvP rating",
+                color=0xFF4500
+            )
+            if tournament["status"] == "signup":
+                minutes_left = max(0, int((datetime.fromisoformat(tournament["signup_ends"])
+                                           - datetime.now()).total_seconds() // 60))
+                embed.add_field(
+                    name="📝 Signups Open",
+                    value=f"**Players:** {len(entrants)}/{tournament['max_players']}\n"
+                          f"**Starts in:** ~{minutes_left} min\n"
+                          f"Join with `{prefix}tournament join`",
+                    inline=False
+                )
+                top_seeds = tournament_manager.seed_entrants(tournament)[:8]
+                if top_seeds:
+                    embed.add_field(
+                        name="🌟 Top Seeds",
+                        value="\n".join(f"#{index + 1} {entrants[user_id]['name']} "
+                                        f"({entrants[user_id]['rating']:.0f})"
+                                        for index, user_id in enumerate(top_seeds)),
+                        inline=False
+                    )
+            else:
+                embed.add_field(
+                    name="⚔️ In Progress",
+                    value=f"Rounds played: {len(tournament['rounds'])}",
+                    inline=False
+                )
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            embed = self.embed_builder.error_embed(
+                "Tournament Error",
+                "Unable to load tournament information."
+            )
+            await ctx.send(embed=embed)
+            print(f"Tournament command error: {e}")
+
+    @tournament.command(name="create", aliases=["open"])
+    async def create_tournament(self, ctx, minutes: int = TOURNAMENT_SIGNUP_MINUTES,
+                                max_players: int = TOURNAMENT_MAX_PLAYERS):
+        """Open tournament signups for this server"""
+        if not ctx.guild or not self.can_manage(ctx):
+            await ctx.send(embed=self.embed_builder.error_embed(
+                "Access Denied", "Only server managers can open tournaments."))
+            return
+
+        minutes = max(1, min(minutes, 24 * 60))
+        success, message = tournament_manager.create_tournament(ctx.guild.id, ctx.channel.id, ctx.author.id,
+                                                                minutes, max_players)
+        if not success:
+            await ctx.send(embed=self.embed_builder.warning_embed("Tournament Exists", message))
+            return
+
+        tournament = tournament_manager.get_tournament(ctx.guild.id)
+        self.schedule_start(str(ctx.guild.id), tournament)
+        await ctx.send(embed=self.embed_builder.success_embed(
+            "Tournament Signups Open!",
+            f"Up to **{tournament['max_players']}** players can join in the next **{minutes}** minutes "
+            f"with `{ctx.clean_prefix}tournament join`.\n"
+            f"At least {TOURNAMENT_MIN_PLAYERS} players are needed."
+        ))
+
+    @tournament.command(name="join", aliases=["signup"])
+    async def join_tournament(self, ctx):
+        """Sign up with your strongest characters"""
+        if not ctx.guild:
+            return
+        user_data = data_manager.get_user_data(str(ctx.author.id))
+        success, message = tournament_manager.sign_up(ctx.guild.id, ctx.author.id, ctx.author.display_name,
+                                                      user_data)
+        if success:
+            await ctx.send(embed=self.embed_builder.success_embed("Signed Up!", message))
+        else:
+            await ctx.send(embed=self.embed_builder.error_embed("Signup Failed", message))
+
+    @tournament.command(name="leave", aliases=["withdraw"])
+    async def leave_tournament(self, ctx):
+        """Withdraw before the tournament starts"""
+        if ctx.guild and tournament_manager.withdraw(ctx.guild.id, ctx.author.id):
+            await ctx.send(embed=self.embed_builder.info_embed("Withdrawn", "You've left the tournament."))
+        else:
+            await ctx.send(embed=self.embed_builder.error_embed("Not Signed Up", "You're not in an open tournament."))
+
+    @tournament.command(name="start")
+    async def start_tournament(self, ctx):
+        """Close signups and start now"""
+        tournament = tournament_manager.get_tournament(ctx.guild.id) if ctx.guild else None
+        if not tournament or tournament["status"] != "signup":
+            await ctx.send(embed=self.embed_builder.error_embed("No Tournament", "There is no tournament waiting to start."))
+            return
+        if not self.can_manage(ctx, tournament):
+            await ctx.send(embed=self.embed_builder.error_embed(
+                "Access Denied", "Only the organiser or server managers can start the tournament."))
+            return
+
+        task = self.start_tasks.pop(str(ctx.guild.id), None)
+        if task:
+            task.cancel()
+        await self.run_tournament(str(ctx.guild.id))
+
+    @tournament.command(name="cancel")
+    async def cancel_tournament(self, ctx):
+        """Cancel a tournament that hasn't started"""
+        tournament = tournament_manager.get_tournament(ctx.guild.id) if ctx.guild else None
+        if not self.can_manage(ctx, tournament) or not tournament_manager.cancel(ctx.guild.id):
+            await ctx.send(embed=self.embed_builder.error_embed("Cannot Cancel", "There is no tournament you can cancel."))
+            return
+        task = self.start_tasks.pop(str(ctx.guild.id), None)
+        if task:
+            task.cancel()
+        await ctx.send(embed=self.embed_builder.info_embed("Tournament Cancelled", "Signups have been closed."))
+
+    @tournament.command(name="bracket", aliases=["results"])
+    async def tournament_bracket(self, ctx, round_number: int = None):
+        """Browse round results of the current or last tournament"""
+        tournament = tournament_manager.get_tournament(ctx.guild.id) if ctx.guild else None
+        if not tournament or not tournament.get("rounds"):
+            await ctx.send(embed=self.embed_builder.info_embed("No Results", "No tournament rounds have been played yet."))
+            return
+
+        rounds = tournament["rounds"]
+        round_index = len(rounds) - 1 if round_number is None else max(1, min(round_number, len(rounds))) - 1
+        view = self.create_round_view(tournament, round_index)
+        embed = view.create_embed()
+        embed.add_field(
+            name="📚 Rounds",
+            value=" • ".join(f"{index + 1}: {round_info['name']}" for index, round_info in enumerate(rounds)),
+            inline=False
+        )
+        await ctx.send(embed=embed, view=view)
+
+async def setup(bot):
+    await bot.add_cog(TournamentCommands(bot))
@@ -9,6 +9,7 @@ from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from core.config import FEATURES
 from utils.helpers import format_number
+from utils.collection_stats import collection_stats
 
 class TraitsCommands(commands.Cog):
     """Character trait system with personality and combat traits"""
@@ -122,6 +123,7 @@ class TraitsCommands(commands.Cog):
             
             # Apply trait effects
             self.apply_trait_effects(character, trait_data["effects"])
+            collection_stats.update_waifu(str(ctx.author.id), character)
             
             # Save data
             data_manager.save_user_data(str(ctx.author.id), user_data)
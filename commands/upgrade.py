@@ -7,6 +7,7 @@ import random
 from core.data_manager import data_manager
 from core.embed_utils import EmbedBuilder
 from utils.helpers import format_number, find_character_by_name, validate_amount
+from utils.collection_stats import collection_stats
 
 class UpgradeCommands(commands.Cog):
     """Character upgrade and enhancement system"""
@@ -84,6 +85,7 @@ class UpgradeCommands(commands.Cog):
             character["atk"] += stat_gains["atk"]
             character["def"] += stat_gains["def"]
             character["potential"] += stat_gains["potential"]
+            collection_stats.update_waifu(str(ctx.author.id), character)
             
             # Save changes
             data_manager.save_user_data(str(ctx.author.id), user_data)
@@ -253,6 +255,7 @@ class UpgradeCommands(commands.Cog):
             
             old_potential = character.get("potential", 1000)
             character["potential"] = old_potential + actual_gain
+            collection_stats.update_waifu(str(ctx.author.id), character)
             
             # Use material
             inventory[found_material] -= 1
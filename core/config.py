@@ -53,11 +53,21 @@ RARITY_TIERS = {
     "N": {"threshold": 0, "emoji": "🌿", "chance": 60.4, "multiplier": 1}
 }
 
+# Stat multiplier of an exclusive relic by its potential tier (see RARITY_TIERS thresholds)
+RELIC_TIER_MULTIPLIERS = {"Mythic": 3.0, "LR": 2.8, "UR": 2.5, "SSR": 2.2, "SR": 1.8, "R": 1.5, "N": 1.2}
+
 # Economy Settings
 SUMMON_COST = 50  # Gems cost per summon
 BULK_SUMMON_DISCOUNT = 0.1  # 10% discount for 10+ summons
 INVESTMENT_MULTIPLIER = 1.2  # Investment return rate
 
+# Summon Banners & Pity System (counters are pulls since the last SR+ / SSR+)
+DEFAULT_BANNER_ID = "standard"
+PITY_SR_GUARANTEE = 20  # Guaranteed SR+ every 20 summons
+PITY_SSR_GUARANTEE = 50  # Guaranteed SSR+ every 50 summons
+PITY_SOFT_BOOSTS = {20: 2.0, 40: 5.0}  # Pulls without SSR+ -> % added to each SSR+ tier
+PITY_BOOSTED_TIERS = ["SSR", "UR", "LR", "Mythic"]
+
 # Battle Settings
 BATTLE_XP_BASE = 50
 BATTLE_GOLD_BASE = 100
@@ -66,6 +76,37 @@ BATTLE_ROUNDS_MAX = 20
 CRIT_BASE_MULTIPLIER = 1.5
 LEVEL_STAT_GROWTH = {"hp": 10, "atk": 3, "def": 2, "speed": 1}
 
+# Simulation Executor (process pool for raids, tournaments and win estimates)
+SIM_POOL_WORKERS = int(os.getenv("KOKORO_SIM_WORKERS", "0"))  # 0 = CPU count - 1
+SIM_QUEUE_LIMIT = 32  # Jobs waiting beyond the busy workers before new ones are rejected
+SIM_JOB_TIMEOUT = 30  # Seconds
+SIM_INLINE_MAX_COST = 200  # Jobs up to this many unit-battles run in-process
+
+# PvP Ratings (Glicko-2, processed in rating periods)
+RATING_DEFAULT = 1000  # Starting rating (also the Glicko-2 scale origin)
+RATING_DEFAULT_RD = 350  # Starting rating deviation; inactive players decay back towards it
+RATING_DEFAULT_VOLATILITY = 0.06
+RATING_TAU = 0.5  # Constrains volatility changes between periods
+RATING_PERIOD_HOURS = 24
+RATING_HISTORY_LIMIT = 60  # Periods of history kept per player
+
+# Arena Tournaments (single elimination, seeded by PvP rating)
+TOURNAMENT_MIN_PLAYERS = 4
+TOURNAMENT_MAX_PLAYERS = 256
+TOURNAMENT_TEAM_SIZE = 3  # Strongest characters locked in at signup
+TOURNAMENT_SIGNUP_MINUTES = 30
+TOURNAMENT_MATCHES_PER_JOB = 16  # Matches simulated per worker job
+TOURNAMENT_PARTICIPATION_GOLD = 200
+TOURNAMENT_ROUND_WIN_GOLD = 300
+
+# World Boss Raids
+BOSS_FLUSH_INTERVAL = 30  # Seconds between writes of raid state (defeats and despawns write at once)
+RAID_JOIN_WINDOW = 60  # Seconds a raid wave stays open before its synchronized rounds are played
+RAID_MAX_ROUNDS = 10
+RAID_MAX_PARTICIPANTS = 500
+RAID_BOSS_DEFENSE_PER_LEVEL = 4
+RAID_BOSS_AOE_FACTOR = 0.2  # Share of boss damage each raider takes from its area attack
+
 # Rarity Weights for random generation
 RARITY_WEIGHTS = {
     "Mythic": 1,
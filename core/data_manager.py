@@ -3,7 +3,7 @@ import json
 import os
 import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
 import logging
 
@@ -25,6 +25,9 @@ class DataManager:
         self._cache = {}
         self._cache_expiry = {}
         
+        # Callbacks run after every successful profile save: callback(user_id, user_data)
+        self._save_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
@@ -131,10 +134,56 @@ class DataManager:
             user_data["last_active"] = datetime.now().isoformat()
             
             users_data[user_id] = user_data
-            return self._save_json(self.users_file, users_data)
+            saved = self._save_json(self.users_file, users_data)
         except Exception as e:
             self.logger.error(f"Error saving user data for {user_id}: {e}")
             return False
+        
+        if saved:
+            for listener in self._save_listeners:
+                try:
+                    listener(user_id, user_data)
+                except Exception as e:
+                    self.logger.error(f"Profile save listener failed for {user_id}: {e}")
+        return saved
+    
+    def save_many_user_data(self, updates: Dict[str, Dict[str, Any]]) -> bool:
+        """Save several profiles with a single write of the users file"""
+        if not updates:
+            return True
+        try:
+            users_data = self._load_json(self.users_file)
+            now = datetime.now().isoformat()
+            for user_id, user_data in updates.items():
+                user_data["last_active"] = now
+                users_data[user_id] = user_data
+            saved = self._save_json(self.users_file, users_data)
+        except Exception as e:
+            self.logger.error(f"Error saving {len(updates)} user profiles: {e}")
+            return False
+
+        if saved:
+            for user_id, user_data in updates.items():
+                for listener in self._save_listeners:
+                    try:
+                        listener(user_id, user_data)
+                    except Exception as e:
+                        self.logger.error(f"Profile save listener failed for {user_id}: {e}")
+        return saved
+
+    def add_save_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Register a callback for profile saves (used to keep derived indexes current)"""
+        if listener not in self._save_listeners:
+            self._save_listeners.append(listener)
+
+    def remove_save_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Unregister a save callback (for cogs that are unloaded)"""
+        if listener in self._save_listeners:
+            self._save_listeners.remove(listener)
+    
+    def get_all_user_data(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored profile keyed by user ID (for full rebuilds of derived indexes)"""
+        return self._load_json(self.users_file)
     
     def _create_default_profile(self) -> Dict[str, Any]:
         """Create a default user profile"""
@@ -5,7 +5,8 @@ from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime
 import logging
 
-from core.data_manager import data_manager
+from utils.skill_compiler import get_skill_effects, get_effect_value
+from utils.content_index import content_index
 from core.config import (
     BATTLE_ROUNDS_MAX, CRIT_BASE_MULTIPLIER, LEVEL_STAT_GROWTH, 
     RARITY_WEIGHTS
@@ -13,6 +14,16 @@ from core.config import (
 
 logger = logging.getLogger(__name__)
 
+# Chance that a skill activates on a turn, by skill rarity
+SKILL_ACTIVATION_CHANCE = {
+    "common": 0.3,
+    "uncommon": 0.4,
+    "rare": 0.5,
+    "epic": 0.6,
+    "legendary": 0.7,
+    "mythical": 0.8
+}
+
 class BattleEngine:
     """Advanced battle system with comprehensive mechanics"""
     
@@ -46,7 +57,7 @@ class BattleEngine:
             base_stats["hp"] += (level - 1) * LEVEL_STAT_GROWTH["hp"]
             base_stats["atk"] += (level - 1) * LEVEL_STAT_GROWTH["atk"]
             base_stats["def"] += (level - 1) * LEVEL_STAT_GROWTH["def"]
-            base_stats["crit"] += (level - 1) * LEVEL_STAT_GROWTH["crit"]
+            base_stats["crit"] += (level - 1) * LEVEL_STAT_GROWTH.get("crit", 0)
             
         # Apply relic bonuses
         battle_stats = self._apply_relic_bonuses(waifu, base_stats)
@@ -89,20 +100,7 @@ class BattleEngine:
         
     def _get_relic_multiplier(self, potential: int) -> float:
         """Get relic multiplier based on potential"""
-        rarity_tiers = [
-            {"min_potential": 7000, "multiplier": 3.0},  # Mythic
-            {"min_potential": 6000, "multiplier": 2.8},  # LR
-            {"min_potential": 5500, "multiplier": 2.5},  # UR
-            {"min_potential": 5000, "multiplier": 2.2},  # SSR
-            {"min_potential": 4000, "multiplier": 1.8},  # SR
-            {"min_potential": 3000, "multiplier": 1.5},  # R
-            {"min_potential": 0, "multiplier": 1.2},     # N
-        ]
-        
-        for tier in rarity_tiers:
-            if potential >= tier["min_potential"]:
-                return tier["multiplier"]
-        return 1.0
+        return content_index.get_relic_multiplier(potential)
         
     def _apply_trait_bonuses(self, waifu: Dict[str, Any], stats: Dict[str, float]) -> Dict[str, float]:
         """Apply trait bonuses to stats"""
@@ -112,31 +110,16 @@ class BattleEngine:
             
         boosted_stats = stats.copy()
         
-        # Get trait data
-        trait_data = data_manager.get_game_data("traits")
-        
         for trait_name in traits:
-            # Search for trait in all categories
-            trait_info = None
-            for category, trait_list in trait_data.get("trait_categories", {}).items():
-                for trait in trait_list:
-                    if trait.get("name") == trait_name:
-                        trait_info = trait
-                        break
-                if trait_info:
-                    break
-                    
-            if trait_info:
-                effects = trait_info.get("effects", {})
-                for effect_name, effect_value in effects.items():
-                    if effect_name == "damage_bonus":
-                        boosted_stats["atk"] = int(boosted_stats["atk"] * (1 + effect_value))
-                    elif effect_name == "defense_bonus":
-                        boosted_stats["def"] = int(boosted_stats["def"] * (1 + effect_value))
-                    elif effect_name == "crit_chance":
-                        boosted_stats["crit"] += effect_value * 100  # Convert to percentage
-                    elif effect_name == "healing_bonus":
-                        boosted_stats["hp"] = int(boosted_stats["hp"] * (1 + effect_value))
+            for effect_name, effect_value in content_index.get_trait_battle_effects(trait_name):
+                if effect_name == "damage_bonus":
+                    boosted_stats["atk"] = int(boosted_stats["atk"] * (1 + effect_value))
+                elif effect_name == "defense_bonus":
+                    boosted_stats["def"] = int(boosted_stats["def"] * (1 + effect_value))
+                elif effect_name == "crit_chance":
+                    boosted_stats["crit"] += effect_value * 100  # Convert to percentage
+                elif effect_name == "healing_bonus":
+                    boosted_stats["hp"] = int(boosted_stats["hp"] * (1 + effect_value))
                         
         return boosted_stats
         
@@ -177,8 +160,15 @@ class BattleEngine:
         
     def calculate_damage(self, attacker_stats: Dict[str, float], 
                         defender_stats: Dict[str, float],
-                        skill_modifiers: Dict[str, float] = None) -> Tuple[int, bool, List[str]]:
+                        skill_modifiers: Dict[str, float] = None, rng=None) -> Tuple[int, bool, List[str]]:
         """Calculate damage with advanced mechanics"""
+        final_damage, is_critical = self._roll_damage(attacker_stats, defender_stats, skill_modifiers, rng)
+        return final_damage, is_critical, self._format_damage_log(attacker_stats, defender_stats, is_critical)
+        
+    def _roll_damage(self, attacker_stats: Dict[str, float], defender_stats: Dict[str, float],
+                     skill_modifiers: Dict[str, float] = None, rng=None) -> Tuple[int, bool]:
+        """Damage and crit roll without building any log text"""
+        rng = rng or random
         base_attack = attacker_stats["atk"]
         defense = defender_stats["def"]
         crit_chance = attacker_stats["crit"]
@@ -189,7 +179,7 @@ class BattleEngine:
             crit_chance += skill_modifiers.get("crit_bonus", 0)
             
         # Calculate base damage with some randomness
-        damage_variance = random.uniform(0.85, 1.15)
+        damage_variance = rng.uniform(0.85, 1.15)
         base_damage = base_attack * damage_variance
         
         # Apply defense reduction
@@ -197,28 +187,39 @@ class BattleEngine:
         final_damage = base_damage * (1 - defense_reduction)
         
         # Check for critical hit
-        is_critical = random.random() < crit_chance
+        is_critical = rng.random() < crit_chance
         if is_critical:
             final_damage *= CRIT_BASE_MULTIPLIER
             
         # Apply elemental effectiveness
-        attacker_element = attacker_stats.get("element", "Neutral")
-        defender_element = defender_stats.get("element", "Neutral")
-        elemental_modifier, elemental_text = self._calculate_elemental_effectiveness(
-            attacker_element, defender_element)
-        final_damage *= elemental_modifier
+        final_damage *= self._get_elemental_modifier(
+            attacker_stats.get("element", "Neutral"), defender_stats.get("element", "Neutral"))
         
         # Ensure minimum damage
-        final_damage = max(1, int(final_damage))
+        return max(1, int(final_damage)), is_critical
         
-        # Combat log messages
+    def _format_damage_log(self, attacker_stats: Dict[str, float], defender_stats: Dict[str, float],
+                           is_critical: bool) -> List[str]:
+        """Combat log messages for one damage roll"""
+        _, elemental_text = self._calculate_elemental_effectiveness(
+            attacker_stats.get("element", "Neutral"), defender_stats.get("element", "Neutral"))
         combat_log = []
         if is_critical:
             combat_log.append("💥 Critical hit!")
         if elemental_text:
             combat_log.append(elemental_text)
-            
-        return final_damage, is_critical, combat_log
+        return combat_log
+        
+    def _get_elemental_modifier(self, attacker_element: str, defender_element: str) -> float:
+        """Elemental damage modifier without the description"""
+        element_data = self.element_chart.get(attacker_element)
+        if not element_data:
+            return 1.0
+        if defender_element in element_data["strong"]:
+            return 1.25
+        if defender_element in element_data["weak"]:
+            return 0.8
+        return 1.0
         
     def _calculate_elemental_effectiveness(self, attacker_element: str, 
                                          defender_element: str) -> Tuple[float, str]:
@@ -236,157 +237,162 @@ class BattleEngine:
             return 1.0, ""
             
     def process_skills(self, waifu: Dict[str, Any], 
-                      battle_context: Dict[str, Any]) -> Tuple[Dict[str, float], List[str]]:
+                      battle_context: Dict[str, Any], rng=None) -> Tuple[Dict[str, float], List[str]]:
         """Process waifu skills and return modifiers with descriptions"""
+        activations = []
+        skill_modifiers = self._roll_skills(waifu, rng, activations)
+        return skill_modifiers, [self._format_skill_activation(waifu, activation) for activation in activations]
+        
+    def _roll_skills(self, waifu: Dict[str, Any], rng=None,
+                     activations: Optional[List[Tuple]] = None) -> Dict[str, float]:
+        """Roll skill activations into turn modifiers; activated skills are appended to activations if given"""
+        rng = rng or random
         skills = waifu.get("skills", [])
         if not skills:
-            return {}, []
+            return {}
             
         skill_modifiers = {
             "damage_multiplier": 1.0,
             "healing_amount": 0,
             "crit_bonus": 0,
-            "defense_boost": 0
+            "defense_boost": 0,
+            "lifesteal": 0
         }
-        skill_log = []
         
-        for skill in skills:
-            skill_name = skill.get("name", "Unknown Skill")
-            effect = skill.get("effect", "").lower()
-            rarity = skill.get("rarity", "common")
+        for index, skill in enumerate(skills):
+            rarity = skill.get("rarity", "common") if isinstance(skill, dict) else "common"
             
             # Calculate skill activation chance based on rarity
-            activation_chance = {
-                "common": 0.3,
-                "uncommon": 0.4,
-                "rare": 0.5,
-                "epic": 0.6,
-                "legendary": 0.7,
-                "mythical": 0.8
-            }.get(rarity, 0.3)
-            
-            if random.random() < activation_chance:
-                # Parse skill effects
-                if "damage" in effect:
-                    damage_boost = self._extract_number_from_effect(effect, default=0.2)
-                    skill_modifiers["damage_multiplier"] += damage_boost
-                    skill_log.append(f"⚔️ {skill_name} activated! (+{int(damage_boost*100)}% damage)")
-                    
-                elif "heal" in effect:
-                    healing = self._extract_number_from_effect(effect, default=100)
-                    skill_modifiers["healing_amount"] += healing
-                    skill_log.append(f"💚 {skill_name} activated! (+{healing} HP)")
-                    
-                elif "crit" in effect:
-                    crit_boost = self._extract_number_from_effect(effect, default=0.1)
-                    skill_modifiers["crit_bonus"] += crit_boost
-                    skill_log.append(f"✨ {skill_name} activated! (+{int(crit_boost*100)}% crit chance)")
+            if rng.random() < SKILL_ACTIVATION_CHANCE.get(rarity, 0.3):
+                bonuses = self._apply_skill_effects(waifu, skill, skill_modifiers)
+                if activations is not None and any(bonuses):
+                    activations.append((index,) + bonuses)
                     
-                elif "defense" in effect or "shield" in effect:
-                    defense_boost = self._extract_number_from_effect(effect, default=0.15)
-                    skill_modifiers["defense_boost"] += defense_boost
-                    skill_log.append(f"🛡️ {skill_name} activated! (+{int(defense_boost*100)}% defense)")
-                    
-        return skill_modifiers, skill_log
-        
-    def _extract_number_from_effect(self, effect_text: str, default: float) -> float:
-        """Extract numerical values from skill effect descriptions"""
-        import re
-        
-        # Look for percentage values
-        percent_match = re.search(r'(\d+)%', effect_text)
-        if percent_match:
-            return float(percent_match.group(1)) / 100.0
-            
-        # Look for raw numbers
-        number_match = re.search(r'(\d+)', effect_text)
-        if number_match:
-            value = float(number_match.group(1))
-            # Assume values over 10 are absolute, others are multipliers
-            if value > 10:
-                return value
-            else:
-                return value / 100.0
+        return skill_modifiers
+        
+    def _apply_skill_effects(self, waifu: Dict[str, Any], skill: Any, 
+                             skill_modifiers: Dict[str, float]) -> Tuple[float, int, float, float, float]:
+        """Add an activated skill's compiled effects to the turn modifiers
+        
+        Returns (damage bonus, healing, crit bonus, defense bonus, lifesteal) for the combat log.
+        """
+        damage_bonus = crit_bonus = defense_bonus = lifesteal = 0.0
+        healing = 0
+        damage_scale = 0.0
+        
+        for effect in get_skill_effects(skill):
+            # Conditions are not tracked in 1v1 battles, so only unconditional effects apply
+            if effect.get("conditional") or effect.get("flat"):
+                continue
+            effect_type = effect["type"]
+            if effect_type == "damage":
+                damage_scale += get_effect_value(skill, effect, "scale")
+            elif effect_type == "stat" and effect.get("target") == "self":
+                value = get_effect_value(skill, effect) / 100
+                stat = effect["stat"]
+                if stat in ("atk", "dmg"):
+                    damage_bonus += value
+                elif stat == "crit":
+                    crit_bonus += value
+                elif stat in ("def", "p_res", "m_res"):
+                    defense_bonus += value
+                elif stat == "dmg_taken":
+                    defense_bonus -= value
+                elif stat == "leech":
+                    lifesteal += value
+            elif effect_type in ("shield", "reflect"):
+                defense_bonus += get_effect_value(skill, effect) / 100
+            elif effect_type == "lifesteal":
+                lifesteal += get_effect_value(skill, effect) / 100
+            elif effect_type == "heal":
+                healing += int(waifu.get(effect["scale_stat"], 0) * get_effect_value(skill, effect) / 100)
                 
-        return default
+        # Skill damage above a normal hit (180% P.DMG -> +80% damage this turn)
+        if damage_scale > 100:
+            damage_bonus += (damage_scale - 100) / 100
+            
+        skill_modifiers["damage_multiplier"] += damage_bonus
+        skill_modifiers["crit_bonus"] += crit_bonus
+        skill_modifiers["defense_boost"] += defense_bonus
+        skill_modifiers["lifesteal"] += lifesteal
+        skill_modifiers["healing_amount"] += healing
+        return damage_bonus, healing, crit_bonus, defense_bonus, lifesteal
+        
+    def _format_skill_activation(self, waifu: Dict[str, Any], activation: Tuple) -> str:
+        """Combat log line for an activated skill recorded by _roll_skills"""
+        index, damage_bonus, healing, crit_bonus, defense_bonus, lifesteal = activation
+        skill = waifu.get("skills", [])[index]
+        skill_name = skill.get("name", "Unknown Skill") if isinstance(skill, dict) else str(skill)
+        
+        parts = []
+        if damage_bonus:
+            parts.append(f"+{int(damage_bonus*100)}% damage")
+        if healing:
+            parts.append(f"+{healing} HP")
+        if crit_bonus:
+            parts.append(f"+{int(crit_bonus*100)}% crit chance")
+        if defense_bonus:
+            parts.append(f"+{int(defense_bonus*100)}% defense")
+        if lifesteal:
+            parts.append(f"{int(lifesteal*100)}% lifesteal")
+        return f"✨ {skill_name} activated! ({', '.join(parts)})"
         
     def simulate_battle(self, waifu1: Dict[str, Any], waifu2: Dict[str, Any],
-                       max_rounds: int = None) -> Dict[str, Any]:
-        """Simulate a complete battle between two waifus"""
+                       max_rounds: int = None, rng=None, headless: bool = False) -> Dict[str, Any]:
+        """Simulate a complete battle between two waifus
+        
+        Returns the structured outcome plus a compact event list (pass to render_battle for text).
+        Headless battles skip the event list; the outcome is identical for the same rng seed.
+        """
         max_rounds = max_rounds or BATTLE_ROUNDS_MAX
+        rng = rng or random
         
         # Calculate battle stats
         stats1 = self.calculate_battle_stats(waifu1)
         stats2 = self.calculate_battle_stats(waifu2)
+        fighters = (waifu1, waifu2)
+        stats = (stats1, stats2)
         
-        # Initialize battle state
-        current_hp1 = stats1["hp"]
-        current_hp2 = stats2["hp"]
+        # Initialize battle state (index 0 = fighter 1, index 1 = fighter 2)
+        hp = [stats1["hp"], stats2["hp"]]
+        damage_dealt = [0, 0]
+        events = None if headless else []
+        activations = None
         
-        battle_log = []
-        round_details = []
-        
-        battle_log.append(f"🏟️ **Battle begins between {waifu1.get('name', 'Fighter 1')} and {waifu2.get('name', 'Fighter 2')}!**")
-        battle_log.append(f"❤️ {waifu1.get('name')}: {current_hp1} HP | {waifu2.get('name')}: {current_hp2} HP")
-        battle_log.append("")
+        # Determine turn order based on speed
+        order = (0, 1) if stats1["speed"] >= stats2["speed"] else (1, 0)
         
+        round_num = 0
         for round_num in range(1, max_rounds + 1):
-            round_log = [f"🎯 **Round {round_num}**"]
-            
-            # Determine turn order based on speed
-            if stats1["speed"] >= stats2["speed"]:
-                first_attacker, first_defender = (waifu1, stats1, "current_hp1"), (waifu2, stats2, "current_hp2")
-                second_attacker, second_defender = (waifu2, stats2, "current_hp2"), (waifu1, stats1, "current_hp1")
-            else:
-                first_attacker, first_defender = (waifu2, stats2, "current_hp2"), (waifu1, stats1, "current_hp1")
-                second_attacker, second_defender = (waifu1, stats1, "current_hp1"), (waifu2, stats2, "current_hp2")
-                
-            # First attacker's turn
-            damage1, crit1, combat_log1, heal1 = self._process_turn(
-                first_attacker[0], first_attacker[1], first_defender[1])
-                
-            if first_attacker[2] == "current_hp1":
-                current_hp2 = max(0, current_hp2 - damage1)
-                current_hp1 = min(stats1["hp"], current_hp1 + heal1)
-            else:
-                current_hp1 = max(0, current_hp1 - damage1)
-                current_hp2 = min(stats2["hp"], current_hp2 + heal1)
-                
-            round_log.extend(combat_log1)
-            
-            # Check if battle ended
-            if current_hp1 <= 0 or current_hp2 <= 0:
-                round_details.append("\n".join(round_log))
-                break
-                
-            # Second attacker's turn
-            damage2, crit2, combat_log2, heal2 = self._process_turn(
-                second_attacker[0], second_attacker[1], second_defender[1])
-                
-            if second_attacker[2] == "current_hp1":
-                current_hp2 = max(0, current_hp2 - damage2)
-                current_hp1 = min(stats1["hp"], current_hp1 + heal2)
-            else:
-                current_hp1 = max(0, current_hp1 - damage2)
-                current_hp2 = min(stats2["hp"], current_hp2 + heal2)
+            for attacker in order:
+                defender = 1 - attacker
+                if events is not None:
+                    activations = []
+                skill_modifiers = self._roll_skills(fighters[attacker], rng, activations)
+                damage, is_critical = self._roll_damage(stats[attacker], stats[defender], skill_modifiers, rng)
+                healing = 0
+                if skill_modifiers:
+                    healing = skill_modifiers["healing_amount"] + int(damage * skill_modifiers["lifesteal"])
+                    
+                hp[defender] = max(0, hp[defender] - damage)
+                hp[attacker] = min(stats[attacker]["hp"], hp[attacker] + healing)
+                damage_dealt[attacker] += damage
                 
-            round_log.extend(combat_log2)
-            
-            # Add HP status
-            round_log.append(f"❤️ {waifu1.get('name')}: {self._create_hp_bar(current_hp1, stats1['hp'])}")
-            round_log.append(f"❤️ {waifu2.get('name')}: {self._create_hp_bar(current_hp2, stats2['hp'])}")
-            
-            round_details.append("\n".join(round_log))
-            
-            # Check if battle ended
-            if current_hp1 <= 0 or current_hp2 <= 0:
+                if events is not None:
+                    events.append((round_num, attacker, damage, is_critical, healing, hp[0], hp[1],
+                                   tuple(activations)))
+                    
+                # Check if battle ended
+                if hp[0] <= 0 or hp[1] <= 0:
+                    break
+            if hp[0] <= 0 or hp[1] <= 0:
                 break
                 
         # Determine winner
-        if current_hp1 > current_hp2:
+        if hp[0] > hp[1]:
             winner = waifu1.get("name", "Fighter 1")
             winner_id = 1
-        elif current_hp2 > current_hp1:
+        elif hp[1] > hp[0]:
             winner = waifu2.get("name", "Fighter 2")
             winner_id = 2
         else:
@@ -397,27 +403,75 @@ class BattleEngine:
         results = {
             "winner": winner,
             "winner_id": winner_id,
-            "final_hp": {"fighter1": current_hp1, "fighter2": current_hp2},
+            "final_hp": {"fighter1": hp[0], "fighter2": hp[1]},
             "total_rounds": round_num,
-            "battle_log": battle_log,
-            "round_details": round_details,
-            "stats": {"fighter1": stats1, "fighter2": stats2}
+            "damage_dealt": {"fighter1": damage_dealt[0], "fighter2": damage_dealt[1]},
+            "seed": getattr(rng, "stream_seed", None)
         }
+        if events is not None:
+            results["stats"] = {"fighter1": stats1, "fighter2": stats2}
+            results["events"] = events
         
         return results
         
+    def render_battle(self, results: Dict[str, Any], waifu1: Dict[str, Any],
+                      waifu2: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Render a simulated battle's events as (battle_log, round_details) text"""
+        fighters = (waifu1, waifu2)
+        stats = (results["stats"]["fighter1"], results["stats"]["fighter2"])
+        
+        battle_log = [
+            f"🏟️ **Battle begins between {waifu1.get('name', 'Fighter 1')} and {waifu2.get('name', 'Fighter 2')}!**",
+            f"❤️ {waifu1.get('name')}: {stats[0]['hp']} HP | {waifu2.get('name')}: {stats[1]['hp']} HP",
+            ""
+        ]
+        round_details = []
+        
+        round_log = None
+        current_round = None
+        turns_in_round = 0
+        for round_num, attacker, damage, is_critical, healing, hp1, hp2, activations in results.get("events", []):
+            if round_num != current_round:
+                if round_log is not None:
+                    round_details.append("\n".join(round_log))
+                current_round = round_num
+                round_log = [f"🎯 **Round {round_num}**"]
+                turns_in_round = 0
+            turns_in_round += 1
+            
+            attacker_name = fighters[attacker].get("name", "Unknown")
+            round_log.extend(self._format_skill_activation(fighters[attacker], activation)
+                             for activation in activations)
+            round_log.extend(self._format_damage_log(stats[attacker], stats[1 - attacker], is_critical))
+            damage_text = f"💥 {attacker_name} deals **{damage}** damage!"
+            if is_critical:
+                damage_text += " 💥"
+            round_log.append(damage_text)
+            if healing > 0:
+                round_log.append(f"💚 {attacker_name} recovers **{healing}** HP!")
+                
+            # HP status closes a full round, or one cut short by a knockout
+            if turns_in_round == 2 or hp1 <= 0 or hp2 <= 0:
+                round_log.append(f"❤️ {waifu1.get('name')}: {self._create_hp_bar(hp1, stats[0]['hp'])}")
+                round_log.append(f"❤️ {waifu2.get('name')}: {self._create_hp_bar(hp2, stats[1]['hp'])}")
+                
+        if round_log is not None:
+            round_details.append("\n".join(round_log))
+            
+        return battle_log, round_details
+        
     def _process_turn(self, attacker: Dict[str, Any], attacker_stats: Dict[str, float],
-                     defender_stats: Dict[str, float]) -> Tuple[int, bool, List[str], int]:
+                     defender_stats: Dict[str, float], rng=None) -> Tuple[int, bool, List[str], int]:
         """Process a single turn for an attacker"""
         combat_log = []
         
         # Process skills
-        skill_modifiers, skill_log = self.process_skills(attacker, {})
+        skill_modifiers, skill_log = self.process_skills(attacker, {}, rng)
         combat_log.extend(skill_log)
         
         # Calculate damage
         damage, is_critical, damage_log = self.calculate_damage(
-            attacker_stats, defender_stats, skill_modifiers)
+            attacker_stats, defender_stats, skill_modifiers, rng)
         combat_log.extend(damage_log)
         
         # Add damage message
@@ -428,7 +482,7 @@ class BattleEngine:
         combat_log.append(damage_text)
         
         # Calculate healing
-        healing = skill_modifiers.get("healing_amount", 0)
+        healing = skill_modifiers.get("healing_amount", 0) + int(damage * skill_modifiers.get("lifesteal", 0))
         if healing > 0:
             combat_log.append(f"💚 {attacker_name} recovers **{healing}** HP!")
             
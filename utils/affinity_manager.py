@@ -9,10 +9,17 @@ import random
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime
 
+# Affinity assumed for pairs without a stored relationship
+DEFAULT_AFFINITY = 50
+
 class AffinityManager:
     def __init__(self, affinity_file: str = "data/affinity.json"):
         self.affinity_file = affinity_file
         self.data = self.load_affinity_data()
+        
+        # Per-user team cohesion aggregates over every collection pair (derived, not saved):
+        # {"counts": {name: copies}, "members": n, "pairs": n*(n-1)/2, "deviation": sum(affinity - 50)}
+        self.cohesion: Dict[str, Dict[str, Any]] = {}
     
     def load_affinity_data(self) -> dict:
         """Load affinity data from JSON file"""
@@ -62,6 +69,14 @@ class AffinityManager:
         
         relationships = self.data["relationships"][user_id]
         
+        # Keep the team cohesion aggregate in sync (O(1))
+        aggregate = self.cohesion.get(user_id)
+        if aggregate is not None:
+            old_value = self._get_pair_value(relationships, waifu_a, waifu_b)
+            if old_value is None:
+                old_value = DEFAULT_AFFINITY
+            aggregate["deviation"] += self._get_pair_weight(aggregate, waifu_a, waifu_b) * (value - old_value)
+        
         # Initialize waifu relationships if not exists
         if waifu_a not in relationships:
             relationships[waifu_a] = {}
@@ -74,6 +89,100 @@ class AffinityManager:
         
         self.save_affinity_data()
     
+    # Team cohesion aggregates
+    
+    @staticmethod
+    def _get_pair_value(relationships: Dict, waifu_a: str, waifu_b: str) -> Optional[int]:
+        """Stored affinity of a pair read in name order (legacy data may be one-directional)"""
+        first, second = (waifu_a, waifu_b) if waifu_a <= waifu_b else (waifu_b, waifu_a)
+        return relationships.get(first, {}).get(second)
+    
+    @staticmethod
+    def _get_pair_weight(aggregate: Dict[str, Any], waifu_a: str, waifu_b: str) -> int:
+        """Number of collection pairs formed by two names (copies multiply)"""
+        counts = aggregate["counts"]
+        if waifu_a == waifu_b:
+            copies = counts.get(waifu_a, 0)
+            return copies * (copies - 1) // 2
+        return counts.get(waifu_a, 0) * counts.get(waifu_b, 0)
+    
+    def _get_member_deviation(self, user_id: str, aggregate: Dict[str, Any], waifu_name: str) -> int:
+        """Sum of (affinity - 50) between one copy of a waifu and the rest of the collection"""
+        relationships = self.data["relationships"].get(user_id, {})
+        counts = aggregate["counts"]
+        deviation = 0
+        for partner in relationships.get(waifu_name, {}):
+            copies = counts.get(partner, 0)
+            if partner == waifu_name:
+                copies -= 1
+            if copies > 0:
+                value = self._get_pair_value(relationships, waifu_name, partner)
+                if value is not None:
+                    deviation += copies * (value - DEFAULT_AFFINITY)
+        return deviation
+    
+    def rebuild_team_cohesion(self, user_id: str, waifu_names: List[str]) -> Dict[str, Any]:
+        """Recompute a user's cohesion aggregate from raw relationship data (O(n + relationships))"""
+        user_id = str(user_id)
+        counts: Dict[str, int] = {}
+        for name in waifu_names:
+            counts[name] = counts.get(name, 0) + 1
+        
+        members = len(waifu_names)
+        aggregate = {"counts": counts, "members": members, "pairs": members * (members - 1) // 2, "deviation": 0}
+        
+        relationships = self.data["relationships"].get(user_id, {})
+        for waifu_a, partners in relationships.items():
+            if waifu_a not in counts:
+                continue
+            for waifu_b in partners:
+                if waifu_b < waifu_a or waifu_b not in counts:
+                    continue  # Each pair is read once, in name order
+                weight = self._get_pair_weight(aggregate, waifu_a, waifu_b)
+                if weight:
+                    aggregate["deviation"] += weight * (partners[waifu_b] - DEFAULT_AFFINITY)
+        
+        self.cohesion[user_id] = aggregate
+        return aggregate
+    
+    def add_team_member(self, user_id: str, waifu_name: str):
+        """Update the cohesion aggregate for a newly obtained waifu"""
+        aggregate = self.cohesion.get(str(user_id))
+        if aggregate is None:
+            return  # Built from the collection on first read
+        aggregate["counts"][waifu_name] = aggregate["counts"].get(waifu_name, 0) + 1
+        aggregate["deviation"] += self._get_member_deviation(str(user_id), aggregate, waifu_name)
+        aggregate["pairs"] += aggregate["members"]
+        aggregate["members"] += 1
+    
+    def remove_team_member(self, user_id: str, waifu_name: str):
+        """Update the cohesion aggregate for a released waifu"""
+        aggregate = self.cohesion.get(str(user_id))
+        if aggregate is None:
+            return
+        if aggregate["counts"].get(waifu_name, 0) <= 0:
+            del self.cohesion[str(user_id)]  # Out of sync, rebuild on next read
+            return
+        aggregate["deviation"] -= self._get_member_deviation(str(user_id), aggregate, waifu_name)
+        aggregate["counts"][waifu_name] -= 1
+        if not aggregate["counts"][waifu_name]:
+            del aggregate["counts"][waifu_name]
+        aggregate["members"] -= 1
+        aggregate["pairs"] -= aggregate["members"]
+    
+    def get_team_cohesion(self, user_id: str, collection: Optional[List[Dict]] = None) -> Optional[float]:
+        """Average affinity over every pair in a user's collection (None with fewer than 2 waifus)
+        
+        O(1) while the aggregate matches the collection size; rebuilt from the collection otherwise.
+        """
+        user_id = str(user_id)
+        aggregate = self.cohesion.get(user_id)
+        if collection is not None and (aggregate is None or aggregate["members"] != len(collection)):
+            aggregate = self.rebuild_team_cohesion(user_id, [c.get("name", "") for c in collection])
+        if not aggregate or aggregate["pairs"] == 0:
+            return None
+        return DEFAULT_AFFINITY + aggregate["deviation"] / aggregate["pairs"]
+    
     def modify_affinity(self, user_id: str, waifu_a: str, waifu_b: str, change: int, event_type: str = "generic") -> Tuple[int, str]:
         """Modify affinity and return new value with story message"""
         current_affinity = self.get_affinity(user_id, waifu_a, waifu_b)
@@ -231,4 +340,7 @@ class AffinityManager:
             modifiers["reward_multiplier"] = low_penalty.get("reward_multiplier", 0.8)
             modifiers["description"] = "Poor cooperation due to rivalries."
         
-        return modifiers
\ No newline at end of file
+        return modifiers
+
+# Global affinity manager instance
+affinity_manager = AffinityManager()
@@ -0,0 +1,170 @@
+# Battle Replays for KoKoroMichi Bot
+import os
+import json
+import zlib
+import base64
+import struct
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any, Callable, Iterator
+
+from core.config import DATA_DIR, BATTLE_ROUNDS_MAX
+
+logger = logging.getLogger(__name__)
+
+# Replays kept per user (oldest dropped first)
+MAX_REPLAYS_PER_USER = 25
+
+# Event: (turn, actor 0/1, skill id or -1, damage, critical, healing)
+EVENT_STRUCT = struct.Struct("<HBhIBI")
+NO_SKILL = -1
+
+# Stats the duel damage roll reads, in the order they are stored
+REPLAY_STATS = ("atk", "def", "crit", "element")
+
+
+# Event stream encoding
+
+def encode_events(events: List[Tuple]) -> str:
+    """Pack an event stream into a compressed base64 string"""
+    packed = b"".join(
+        EVENT_STRUCT.pack(turn, actor, skill, damage, int(critical), healing)
+        for turn, actor, skill, damage, critical, healing in events
+    )
+    return base64.b64encode(zlib.compress(packed, 9)).decode("ascii")
+
+
+def decode_events(data: str) -> List[Tuple]:
+    """Unpack an event stream written by encode_events"""
+    packed = zlib.decompress(base64.b64decode(data))
+    return [(turn, actor, skill, damage, bool(critical), healing)
+            for turn, actor, skill, damage, critical, healing in EVENT_STRUCT.iter_unpack(packed)]
+
+
+def pack_fighter(name: str, character: Dict[str, Any], stats: Dict[str, Any]) -> List[Any]:
+    """Compact fighter record: name, level, starting HP, then the battle stats"""
+    return [name, character.get("level", 1), character.get("hp", 100)] + [stats.get(stat) for stat in REPLAY_STATS]
+
+
+def unpack_fighter(fighter: List[Any]) -> Tuple[str, int, int, Dict[str, Any]]:
+    """(name, level, starting HP, battle stats) from a packed fighter record"""
+    name, level, hp = fighter[:3]
+    return name, level, hp, dict(zip(REPLAY_STATS, fighter[3:]))
+
+
+# Duel loop
+
+def run_duel(engine, stats: Tuple[Callable[[], Dict[str, Any]], Callable[[], Dict[str, Any]]],
+             hp: Tuple[int, int], rng, max_rounds: int = BATTLE_ROUNDS_MAX) -> Dict[str, Any]:
+    """Player-first 1v1 loop used by battle commands; stats are read through getters each turn"""
+    player_hp, opponent_hp = hp
+    events = []
+    round_num = 1
+    while player_hp > 0 and opponent_hp > 0 and round_num <= max_rounds:
+        damage, is_critical = engine._roll_damage(stats[0](), stats[1](), rng=rng)
+        opponent_hp = max(0, opponent_hp - damage)
+        events.append((round_num, 0, NO_SKILL, damage, is_critical, 0))
+        if opponent_hp <= 0:
+            break
+
+        damage, is_critical = engine._roll_damage(stats[1](), stats[0](), rng=rng)
+        player_hp = max(0, player_hp - damage)
+        events.append((round_num, 1, NO_SKILL, damage, is_critical, 0))
+        round_num += 1
+
+    return {
+        "events": events,
+        "player_hp": player_hp,
+        "opponent_hp": opponent_hp,
+        "rounds": round_num
+    }
+
+
+def iter_duel_log(engine, names: Tuple[str, str], stats: Tuple[Dict[str, Any], Dict[str, Any]],
+                  hp: Tuple[int, int], events: List[Tuple],
+                  messages: Tuple[List[str], List[str]] = ((), ())) -> Iterator[Tuple[Tuple, List[str], int, int]]:
+    """Yield (event, log lines, player HP, opponent HP) for each event of a duel"""
+    current_hp = list(hp)
+    for event in events:
+        turn, actor, _, damage, is_critical, healing = event
+        target = 1 - actor
+        current_hp[target] = max(0, current_hp[target] - damage)
+        current_hp[actor] += healing
+
+        lines = [f"Round {turn}: {names[actor]} deals {damage} damage!"]
+        combat_log = engine._format_damage_log(stats[actor], stats[target], is_critical) + list(messages[actor])
+        lines.extend(f"  {entry}" for entry in combat_log if entry)
+        yield event, lines, current_hp[0], current_hp[1]
+
+
+class ReplayStore:
+    """Size-bounded per-user battle replays, one small JSON file per user"""
+
+    def __init__(self, replay_dir: str = str(DATA_DIR / "replays"),
+                 max_per_user: int = MAX_REPLAYS_PER_USER):
+        self.replay_dir = replay_dir
+        self.max_per_user = max_per_user
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def _get_file(self, user_id: str) -> str:
+        return os.path.join(self.replay_dir, f"{user_id}.json")
+
+    def load_user_replays(self, user_id: str) -> Dict[str, Any]:
+        """Replays of one user ({"next_id": n, "replays": [...]})"""
+        user_id = str(user_id)
+        if user_id in self._cache:
+            return self._cache[user_id]
+
+        data = {"next_id": 1, "replays": []}
+        file_path = self._get_file(user_id)
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.warning(f"Error loading replays for {user_id}: {e}")
+        self._cache[user_id] = data
+        return data
+
+    def save_user_replays(self, user_id: str):
+        """Write one user's replays"""
+        user_id = str(user_id)
+        try:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            with open(self._get_file(user_id), 'w', encoding='utf-8') as f:
+                json.dump(self._cache[user_id], f, separators=(",", ":"), ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Error saving replays for {user_id}: {e}")
+
+    def add_replay(self, user_id: str, mode: str, seed: int, fighters: List[List[Any]],
+                   result: Dict[str, Any]) -> int:
+        """Store a duel from run_duel; returns its replay id"""
+        data = self.load_user_replays(user_id)
+        replay_id = data["next_id"]
+        data["next_id"] = replay_id + 1
+        data["replays"].append({
+            "id": replay_id,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "mode": mode,
+            "seed": seed,
+            "fighters": fighters,
+            "rounds": result["rounds"],
+            "events": encode_events(result["events"])
+        })
+        data["replays"] = data["replays"][-self.max_per_user:]
+        self.save_user_replays(user_id)
+        return replay_id
+
+    def get_replay(self, user_id: str, replay_id: int) -> Optional[Dict[str, Any]]:
+        """A stored replay by id (None if unknown or already dropped)"""
+        for replay in self.load_user_replays(user_id)["replays"]:
+            if replay["id"] == replay_id:
+                return replay
+        return None
+
+    def list_replays(self, user_id: str) -> List[Dict[str, Any]]:
+        """Stored replays of a user, newest first"""
+        return list(reversed(self.load_user_replays(user_id)["replays"]))
+
+# Global replay store instance
+replay_store = ReplayStore()
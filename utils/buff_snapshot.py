@@ -0,0 +1,283 @@
+# Battle Buff Snapshots for KoKoroMichi Bot
+import time
+import weakref
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from core.data_manager import data_manager
+
+logger = logging.getLogger(__name__)
+
+# Guild faction stat bonuses (multipliers, crit is additive)
+FACTION_BONUSES = {
+    "celestial": {"atk": 1.2, "crit": 5},
+    "shadow": {"atk": 1.3, "speed": 1.2},
+    "elemental": {"magic": 1.25, "hp": 1.15},
+    "arcane": {"magic": 1.3, "def": 1.2}
+}
+
+
+def _parse_expiry(expires_at: Any) -> Optional[float]:
+    """Convert an ISO expiry timestamp to epoch seconds (None if missing or invalid)"""
+    if not expires_at:
+        return None
+    try:
+        return datetime.fromisoformat(expires_at).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class BuffSnapshot:
+    """A participant's fully buffed battle stats, computed once at battle start"""
+
+    def __init__(self, character: Dict[str, Any], user_id: Optional[str] = None,
+                 user_data: Optional[Dict[str, Any]] = None):
+        self.character = character
+        self.user_id = user_id
+        self.user_data = user_data
+        self.stats: Dict[str, Any] = character
+        self.messages: List[str] = []
+        self.expires_at: Optional[float] = None  # Earliest expiry of any applied timed buff
+        self.valid = False
+
+    def is_valid(self, now: Optional[float] = None) -> bool:
+        """Check the snapshot is current (not invalidated and no applied buff has expired)"""
+        if not self.valid:
+            return False
+        if self.expires_at is None:
+            return True
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def invalidate(self):
+        """Force the snapshot to be recomputed before its next use"""
+        self.valid = False
+
+
+class BuffManager:
+    """Computes guild, pet, dream, affinity, relic and trait buffs into battle snapshots"""
+
+    def __init__(self, battle_engine, guild_manager, pet_manager, dream_manager, affinity_manager):
+        self.battle_engine = battle_engine
+        self.guild_manager = guild_manager
+        self.pet_manager = pet_manager
+        self.dream_manager = dream_manager
+        self.affinity_manager = affinity_manager
+
+        # Snapshots in use per user so buff changes can invalidate running battles
+        self._active_snapshots: Dict[str, weakref.WeakSet] = {}
+
+    # Snapshots
+
+    def create_snapshot(self, character: Dict[str, Any], user_id: Optional[str] = None,
+                        user_data: Optional[Dict[str, Any]] = None) -> BuffSnapshot:
+        """Compute a participant's buffed stats once for a battle"""
+        snapshot = BuffSnapshot(character, user_id, user_data)
+        self.refresh(snapshot)
+        if user_id:
+            self._active_snapshots.setdefault(str(user_id), weakref.WeakSet()).add(snapshot)
+        return snapshot
+
+    def refresh(self, snapshot: BuffSnapshot, now: Optional[float] = None) -> BuffSnapshot:
+        """Recompute a snapshot in place if it was invalidated or a buff expired"""
+        if snapshot.is_valid(now):
+            return snapshot
+        snapshot.stats = self.apply_all_buffs(snapshot.character, snapshot.user_id, snapshot.user_data)
+        snapshot.messages = self.get_active_buffs_display(snapshot.stats, snapshot.user_id)
+        snapshot.expires_at = self.get_buff_expiry(snapshot.character, snapshot.user_id)
+        snapshot.valid = True
+        return snapshot
+
+    def invalidate_user(self, user_id: str, user_data: Optional[Dict[str, Any]] = None):
+        """Invalidate every active snapshot of a user (profile save listener: guild, pet and
+        relic changes are all saved to the profile)"""
+        snapshots = self._active_snapshots.get(str(user_id))
+        if not snapshots:
+            self._active_snapshots.pop(str(user_id), None)
+            return
+        for snapshot in list(snapshots):
+            snapshot.invalidate()
+
+    def get_dream_buffs(self, user_id: str) -> List[Dict[str, Any]]:
+        """A user's dream buffs (DreamManager stores a list with "expires"; older data maps IDs to
+        buffs with "expires_at")"""
+        dream_buffs = self.dream_manager.user_dreams.get("dream_buffs", {}).get(user_id, [])
+        return list(dream_buffs.values()) if isinstance(dream_buffs, dict) else list(dream_buffs)
+
+    def get_buff_expiry(self, character: Dict[str, Any], user_id: Optional[str]) -> Optional[float]:
+        """Earliest future expiry among the timed buffs that apply to a participant"""
+        if not user_id:
+            return None
+        now = time.time()
+        expiries = []
+        for buff_data in self.get_dream_buffs(user_id):
+            expiry = _parse_expiry(buff_data.get("expires_at") or buff_data.get("expires"))
+            if expiry is not None and expiry > now:
+                expiries.append(expiry)
+        for buff_data in character.get("temporary_buffs", {}).values():
+            if isinstance(buff_data, dict):
+                expiry = _parse_expiry(buff_data.get("expires_at"))
+                if expiry is not None and expiry > now:
+                    expiries.append(expiry)
+        return min(expiries) if expiries else None
+
+    # Buff sources
+
+    def apply_all_buffs(self, character: Dict, user_id: str = None, user_data: Dict = None) -> Dict:
+        """Apply all available buffs to character stats"""
+        if not user_id:
+            # NPC, ghost and arena opponents have no player buffs but still need derived battle stats
+            return self.battle_engine.calculate_battle_stats(character)
+
+        # Start with base character stats
+        enhanced_stats = character.copy()
+
+        enhanced_stats = self.apply_guild_buffs(enhanced_stats, user_id)
+        enhanced_stats = self.apply_pet_buffs(enhanced_stats, user_id)
+        enhanced_stats = self.apply_dream_buffs(enhanced_stats, user_id)
+        enhanced_stats = self.apply_affinity_buffs(enhanced_stats, user_id, user_data)
+
+        # Apply relic and trait bonuses (using battle engine)
+        enhanced_stats = self.battle_engine.calculate_battle_stats(enhanced_stats)
+
+        return enhanced_stats
+
+    def apply_guild_buffs(self, stats: Dict, user_id: str) -> Dict:
+        """Apply guild membership bonuses"""
+        try:
+            if user_id in self.guild_manager.user_guilds.get("memberships", {}):
+                guild_id = self.guild_manager.user_guilds["memberships"][user_id]
+                guild = self.guild_manager.user_guilds["guilds"].get(guild_id, {})
+
+                faction = guild.get("faction", "")
+                if faction in FACTION_BONUSES:
+                    for stat, multiplier in FACTION_BONUSES[faction].items():
+                        if stat in stats:
+                            if stat == "crit":
+                                stats[stat] = stats.get(stat, 5) + multiplier
+                            else:
+                                stats[stat] = int(stats.get(stat, 50) * multiplier)
+
+        except Exception as e:
+            logger.warning(f"Guild buff error: {e}")
+
+        return stats
+
+    def apply_pet_buffs(self, stats: Dict, user_id: str) -> Dict:
+        """Apply active pet bonuses"""
+        try:
+            user_pets = self.pet_manager.get_user_pets(user_id)
+            active_pets = self.pet_manager.user_pets.get("active_pets", {}).get(user_id, [])
+            if not active_pets:
+                return stats
+
+            species_by_name = {species["name"]: species
+                               for species in self.pet_manager.pet_data.get("pet_species", [])}
+
+            for pet in user_pets:
+                if pet.get("pet_id") not in active_pets:
+                    continue
+                species = species_by_name.get(pet.get("species", ""))
+                if not species:
+                    continue
+                abilities = {ability["name"]: ability for ability in species.get("abilities", [])}
+                for ability_name in pet.get("unlocked_abilities", []):
+                    ability = abilities.get(ability_name)
+                    if not ability:
+                        continue
+                    for effect_type, value in ability.get("effect", {}).items():
+                        if effect_type == "damage_bonus":
+                            stats["atk"] = int(stats.get("atk", 50) * (1 + value))
+                        elif effect_type == "damage_reduction":
+                            stats["def"] = int(stats.get("def", 30) * (1 + value))
+                        elif effect_type == "crit_chance_bonus":
+                            stats["crit"] = stats.get("crit", 5) + (value * 100)
+                        elif effect_type == "dodge_chance":
+                            stats["speed"] = int(stats.get("speed", 50) * (1 + value))
+
+        except Exception as e:
+            logger.warning(f"Pet buff error: {e}")
+
+        return stats
+
+    def apply_dream_buffs(self, stats: Dict, user_id: str) -> Dict:
+        """Apply active dream event buffs"""
+        try:
+            now = time.time()
+
+            for buff_data in self.get_dream_buffs(user_id):
+                expires_at = buff_data.get("expires_at") or buff_data.get("expires")
+                if expires_at:
+                    expiry = _parse_expiry(expires_at)
+                    if expiry is None or now > expiry:
+                        continue  # Skip expired or malformed buff
+
+                for effect, value in buff_data.get("effects", {}).items():
+                    if effect == "combat_power":
+                        stats["atk"] = int(stats.get("atk", 50) * (1 + value))
+                    elif effect == "defense_boost":
+                        stats["def"] = int(stats.get("def", 30) * (1 + value))
+                    elif effect == "hp_boost":
+                        stats["hp"] = int(stats.get("hp", 100) * (1 + value))
+
+        except Exception as e:
+            logger.warning(f"Dream buff error: {e}")
+
+        return stats
+
+    def apply_affinity_buffs(self, stats: Dict, user_id: str, user_data: Dict = None) -> Dict:
+        """Apply bonuses from character relationships"""
+        try:
+            # General affinity bonus based on the average over every character pair,
+            # read from the affinity manager's incrementally maintained aggregate
+            if user_data is None:
+                user_data = data_manager.get_user_data(user_id)
+            avg_affinity = self.affinity_manager.get_team_cohesion(
+                user_id, user_data.get("claimed_waifus", [])
+            )
+
+            if avg_affinity is not None and avg_affinity > 70:  # High team cohesion bonus
+                stats["atk"] = int(stats.get("atk", 50) * 1.15)
+                stats["def"] = int(stats.get("def", 30) * 1.1)
+
+        except Exception as e:
+            logger.warning(f"Affinity buff error: {e}")
+
+        return stats
+
+    def get_active_buffs_display(self, character: Dict, user_id: str) -> List[str]:
+        """Get display messages for active buffs"""
+        buff_messages = []
+
+        try:
+            if user_id and user_id in self.guild_manager.user_guilds.get("memberships", {}):
+                guild_id = self.guild_manager.user_guilds["memberships"][user_id]
+                guild = self.guild_manager.user_guilds["guilds"].get(guild_id, {})
+                faction = guild.get("faction", "")
+                if faction:
+                    buff_messages.append(f"🏰 Guild ({faction.title()}) buffs active!")
+
+            active_pets = self.pet_manager.user_pets.get("active_pets", {}).get(user_id, [])
+            if active_pets:
+                buff_messages.append(f"🐾 Pet companion buffs active ({len(active_pets)} pets)!")
+
+            now = time.time()
+            active_dream_buffs = 0
+            for buff_data in self.get_dream_buffs(user_id):
+                expiry = _parse_expiry(buff_data.get("expires_at") or buff_data.get("expires"))
+                if expiry is not None and now <= expiry:
+                    active_dream_buffs += 1
+
+            if active_dream_buffs > 0:
+                buff_messages.append(f"🌙 Dream buffs active ({active_dream_buffs} effects)!")
+
+            if character.get("traits"):
+                buff_messages.append(f"✨ Character traits active ({len(character['traits'])} traits)!")
+
+            if character.get("relic") or character.get("equipped_relic"):
+                buff_messages.append("🏺 Relic bonuses active!")
+
+        except Exception as e:
+            logger.warning(f"Buff display error: {e}")
+
+        return buff_messages
@@ -0,0 +1,175 @@
+# Collection Statistics for KoKoroMichi Bot
+import heapq
+import bisect
+import logging
+from typing import Dict, List, Optional, Any
+
+from utils.power_cache import get_waifu_power
+
+logger = logging.getLogger(__name__)
+
+# Characters kept in each top list
+COLLECTION_TOP_SIZE = 10
+
+# Fields with a maintained top list
+TOP_FIELDS = ("potential", "level", "affection", "power")
+
+# Rarity tiers from lowest to highest
+RARITY_ORDER = ["N", "R", "SR", "SSR", "UR", "LR", "Mythic"]
+
+
+def get_waifu_key(waifu: Dict[str, Any]) -> str:
+    """Identity of a character record within a collection (names alone can repeat)"""
+    return f"{waifu.get('name', '')}|{waifu.get('summoned_at') or waifu.get('obtained_at', '')}"
+
+
+def _summarize(waifu: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields the aggregates are built from"""
+    potential = waifu.get("potential", 0)
+    return {
+        "key": get_waifu_key(waifu),
+        "name": waifu.get("name", "Unknown"),
+        "rarity": waifu.get("rarity", "N").split()[0],
+        "element": waifu.get("element", "Neutral"),
+        "potential": potential if isinstance(potential, (int, float)) else 0,
+        "level": waifu.get("level", 1),
+        "affection": waifu.get("affection", 0),
+        "power": get_waifu_power(waifu)
+    }
+
+
+class CollectionStatsManager:
+    """Per-user collection aggregates: rarity and element counts, total power and top lists
+
+    Kept current by add_waifus, update_waifu and remove_waifu; rebuilt from the collection on
+    first read or whenever the stored size no longer matches it.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def rebuild(self, user_id: str, collection: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Recompute a user's aggregates from their collection (O(n))"""
+        aggregate = {"count": 0, "members": {}, "duplicates": set(), "rarity_counts": {}, "element_counts": {},
+                     "total_power": 0, "top": {field: [] for field in TOP_FIELDS}}
+        for waifu in collection:
+            summary = _summarize(waifu)
+            if summary["key"] in aggregate["members"]:
+                # Records that can't be told apart; changes to them force a rebuild
+                aggregate["duplicates"].add(summary["key"])
+                summary["key"] += f"#{aggregate['count']}"
+            self._add(aggregate, summary)
+        for field in TOP_FIELDS:
+            self._refill(aggregate, field)
+        self.stats[str(user_id)] = aggregate
+        return aggregate
+
+    def get_stats(self, user_id: str, collection: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """A user's aggregates; O(1) while they match the collection size"""
+        user_id = str(user_id)
+        aggregate = self.stats.get(user_id)
+        if collection is not None and (aggregate is None or aggregate["count"] != len(collection)):
+            aggregate = self.rebuild(user_id, collection)
+        return aggregate
+
+    def invalidate(self, user_id: str):
+        """Drop a user's aggregates (for changes to characters that can't be identified)"""
+        self.stats.pop(str(user_id), None)
+
+    # Incremental updates
+
+    def add_waifus(self, user_id: str, waifus: List[Dict[str, Any]]):
+        """Update the aggregates for newly obtained characters"""
+        aggregate = self.stats.get(str(user_id))
+        if aggregate is None:
+            return  # Built from the collection on first read
+        for waifu in waifus:
+            summary = _summarize(waifu)
+            if summary["key"] in aggregate["members"]:
+                self.invalidate(user_id)
+                return
+            self._add(aggregate, summary)
+            for field in TOP_FIELDS:
+                self._offer(aggregate["top"][field], field, summary)
+
+    def remove_waifu(self, user_id: str, waifu: Dict[str, Any]):
+        """Update the aggregates for a released character"""
+        aggregate = self.stats.get(str(user_id))
+        if aggregate is None:
+            return
+        key = get_waifu_key(waifu)
+        summary = aggregate["members"].get(key)
+        if summary is None or key in aggregate["duplicates"]:
+            self.invalidate(user_id)  # Out of sync, rebuild on next read
+            return
+        self._remove(aggregate, summary)
+        for field in TOP_FIELDS:
+            if self._drop(aggregate["top"][field], summary["key"]):
+                self._refill(aggregate, field)
+
+    def update_waifu(self, user_id: str, waifu: Dict[str, Any]):
+        """Update the aggregates after a character's stats or affection change"""
+        aggregate = self.stats.get(str(user_id))
+        if aggregate is None:
+            return
+        key = get_waifu_key(waifu)
+        old = aggregate["members"].get(key)
+        if old is None or key in aggregate["duplicates"]:
+            self.invalidate(user_id)
+            return
+        new = _summarize(waifu)
+        self._remove(aggregate, old)
+        self._add(aggregate, new)
+        for field in TOP_FIELDS:
+            top = aggregate["top"][field]
+            if not self._drop(top, old["key"]):
+                self._offer(top, field, new)
+            elif new[field] >= old[field] or len(top) + 1 >= aggregate["count"]:
+                self._offer(top, field, new)  # Can only have moved up
+            else:
+                self._refill(aggregate, field)  # An outside character may now outrank it
+
+    # Internals
+
+    @staticmethod
+    def _add(aggregate: Dict[str, Any], summary: Dict[str, Any]):
+        aggregate["members"][summary["key"]] = summary
+        aggregate["count"] += 1
+        aggregate["total_power"] += summary["power"]
+        for field, value in (("rarity_counts", summary["rarity"]), ("element_counts", summary["element"])):
+            aggregate[field][value] = aggregate[field].get(value, 0) + 1
+
+    @staticmethod
+    def _remove(aggregate: Dict[str, Any], summary: Dict[str, Any]):
+        del aggregate["members"][summary["key"]]
+        aggregate["count"] -= 1
+        aggregate["total_power"] -= summary["power"]
+        for field, value in (("rarity_counts", summary["rarity"]), ("element_counts", summary["element"])):
+            aggregate[field][value] -= 1
+            if not aggregate[field][value]:
+                del aggregate[field][value]
+
+    @staticmethod
+    def _offer(top: List[Dict[str, Any]], field: str, summary: Dict[str, Any]):
+        """Insert into a top list if it ranks, keeping it sorted and capped"""
+        if len(top) >= COLLECTION_TOP_SIZE and summary[field] <= top[-1][field]:
+            return
+        position = bisect.bisect_left([-entry[field] for entry in top], -summary[field])
+        top.insert(position, summary)
+        del top[COLLECTION_TOP_SIZE:]
+
+    @staticmethod
+    def _drop(top: List[Dict[str, Any]], key: str) -> bool:
+        for position, entry in enumerate(top):
+            if entry["key"] == key:
+                del top[position]
+                return True
+        return False
+
+    @staticmethod
+    def _refill(aggregate: Dict[str, Any], field: str):
+        aggregate["top"][field] = heapq.nlargest(COLLECTION_TOP_SIZE, aggregate["members"].values(),
+                                                 key=lambda summary: summary[field])
+
+# Global collection statistics instance
+collection_stats = CollectionStatsManager()
@@ -6,50 +6,12 @@ from datetime import datetime
 from discord import File, Embed
 
 from core.config import CHARACTERS_DIR
+from utils.skill_compiler import render_skill_field, get_skill_effects
+from utils.content_index import content_index
+from utils.power_cache import get_waifu_power
+from utils.matchmaking import matchmaking_service
 USERS_FILE = os.path.join(os.path.dirname(__file__), '../data/users.json')
 
-# -------------------
-# RARITY TIERS FOR RELIC BOOSTS
-# -------------------
-RARITY_TIERS = [
-    {
-        "name": "Mythic 🌈✨✨",
-        "min_potential": 7000,
-        "multiplier": 3.0
-    },
-    {
-        "name": "LR ⚡",
-        "min_potential": 6000,
-        "multiplier": 2.8
-    },
-    {
-        "name": "UR 🌟",
-        "min_potential": 5500,
-        "multiplier": 2.5
-    },
-    {
-        "name": "SSR 🌈✨",
-        "min_potential": 5000,
-        "multiplier": 2.2
-    },
-    {
-        "name": "SR 🔥",
-        "min_potential": 4000,
-        "multiplier": 1.8
-    },
-    {
-        "name": "R 🔧",
-        "min_potential": 3000,
-        "multiplier": 1.5
-    },
-    {
-        "name": "N 🌿",
-        "min_potential": 0,
-        "multiplier": 1.2
-    },
-]
-
-
 # -------------------
 # DAMAGE & COMBAT
 # -------------------
@@ -120,7 +82,16 @@ def get_waifu_by_name(user, name):
     return None
 
 
-def random_bot_waifu(users, exclude_id):
+def random_bot_waifu(users, exclude_id, power=None):
+    """Another player's waifu, matched by power when given (users is the fallback pool)"""
+    if power is None and users:
+        power = max((get_waifu_power(w) for w in users.get(exclude_id, {}).get("claimed_waifus", [])),
+                    default=None)
+    if power is not None:
+        ghost = matchmaking_service.find_player_opponent(power, exclude_user=exclude_id)
+        if ghost:
+            return ghost["champion"]
+
     candidates = []
     for uid, data in users.items():
         if uid == exclude_id:
@@ -198,11 +169,7 @@ def get_relic_multiplier(waifu):
         return 1.0
 
     # Use potential to find multiplier tier
-    potential = equipped.get("potential", 0)
-    for tier in RARITY_TIERS:
-        if potential >= tier["min_potential"]:
-            return tier["multiplier"]
-    return 1.0
+    return content_index.get_relic_multiplier(equipped.get("potential", 0))
 
 
 def apply_relic_boosts(waifu):
@@ -227,12 +194,29 @@ def parse_skill_effects(waifu):
     for skill in waifu.get('skills', []):
         effects.append({
             'name': skill.get('name', 'Unnamed'),
-            'effect': skill.get('effect', ''),
-            'rarity': skill.get('rarity', 'Normal')
+            'effect': render_skill_field(skill, 'effect'),
+            'rarity': skill.get('rarity', 'Normal'),
+            'effects': get_skill_effects(skill)
         })
     return effects
 
 
+def get_skill_categories(skill):
+    """Which simulation bonuses (damage, heal, buff) a skill's compiled effects grant"""
+    categories = set()
+    for effect in get_skill_effects(skill):
+        effect_type = effect['type']
+        if effect_type in ('damage', 'damage_bonus') or (
+                effect_type == 'stat' and effect['stat'] == 'dmg'):
+            categories.add('damage')
+        if effect_type in ('heal', 'lifesteal'):
+            categories.add('heal')
+        if effect_type in ('stat', 'state') and effect.get('target', 'self') == 'self' \
+                and effect.get('value', 0) >= 0:
+            categories.add('buff')
+    return categories
+
+
 # -------------------
 # RANDOM SUGGESTIONS / EVENTS
 # -------------------
@@ -286,19 +270,19 @@ def simulate_round(attacker,
     attacker_skill_log = []
     if include_skills:
         for skill in attacker.get('skills', []):
-            effect_text = skill.get('effect', '').lower()
+            categories = get_skill_categories(skill)
             skill_name = skill.get('name', 'Unnamed')
-            if 'damage' in effect_text:
+            if 'damage' in categories:
                 extra = int(atk_stats['atk'] * random.uniform(0.03, 0.08))
                 dmg1 += extra
                 attacker_skill_log.append(
                     f"{attacker['name']} used {skill_name} (+{extra} dmg)")
-            if 'heal' in effect_text:
+            if 'heal' in categories:
                 heal = int(atk_stats['hp'] * random.uniform(0.05, 0.12))
                 hp1_change += heal
                 attacker_skill_log.append(
                     f"{attacker['name']} used {skill_name} (+{heal} HP)")
-            if 'buff' in effect_text:
+            if 'buff' in categories:
                 buff = int(atk_stats['atk'] * random.uniform(0.05, 0.10))
                 dmg1 += buff
                 attacker_skill_log.append(
@@ -307,19 +291,19 @@ def simulate_round(attacker,
     defender_skill_log = []
     if include_skills:
         for skill in defender.get('skills', []):
-            effect_text = skill.get('effect', '').lower()
+            categories = get_skill_categories(skill)
             skill_name = skill.get('name', 'Unnamed')
-            if 'damage' in effect_text:
+            if 'damage' in categories:
                 extra = int(def_stats['atk'] * random.uniform(0.03, 0.08))
                 dmg2 += extra
                 defender_skill_log.append(
                     f"{defender['name']} used {skill_name} (+{extra} dmg)")
-            if 'heal' in effect_text:
+            if 'heal' in categories:
                 heal = int(def_stats['hp'] * random.uniform(0.05, 0.12))
                 hp2_change += heal
                 defender_skill_log.append(
                     f"{defender['name']} used {skill_name} (+{heal} HP)")
-            if 'buff' in effect_text:
+            if 'buff' in categories:
                 buff = int(def_stats['atk'] * random.uniform(0.05, 0.10))
                 dmg2 += buff
                 defender_skill_log.append(
@@ -0,0 +1,415 @@
+# Combat Benchmarks for KoKoroMichi Bot
+#
+# Usage: python -m utils.combat_benchmark [--suite buffs|combat|all] [--iterations N] [--seed N]
+#        python -m utils.combat_benchmark --golden          (check seeded battles against the golden file)
+#        python -m utils.combat_benchmark --update-golden   (after an intended behaviour change)
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+import tracemalloc
+from typing import Dict, List, Optional, Callable, Any
+
+from core.config import BATTLE_ROUNDS_MAX, DATA_DIR
+from utils.advanced_combat import BattleEngine
+from utils.affinity_manager import affinity_manager
+from utils.battle_replay import run_duel
+from utils.buff_snapshot import BuffManager
+from utils.content_index import content_index
+from utils.dream_manager import DreamManager
+from utils.guild_manager import GuildManager
+from utils.helpers import generate_random_stats
+from utils.pet_manager import PetManager
+from utils.rng_service import RNGStream
+from utils.summon_engine import summon_engine, get_catalog_rarity
+from utils import team_battle
+
+BENCHMARK_USER_ID = "benchmark-user"
+
+# Golden seeded battles; regenerate with --update-golden only for intended behaviour changes
+GOLDEN_FILE = DATA_DIR / "combat_golden.json"
+GOLDEN_SEED = 20250101
+GOLDEN_BATTLES = 20
+
+# Mirror matches run by --golden; team 1's share of decisive wins must stay within tolerance of 50%
+MIRROR_BATTLES = 1000
+MIRROR_TOLERANCE = 0.05
+
+# Fixture collections never depend on the clock
+FIXTURE_TIMESTAMP = "2025-01-01T00:00:00"
+
+# Calls per measurement traced for allocations (tracing is slow)
+ALLOCATION_SAMPLE = 50
+
+
+def create_benchmark_collection(size: int, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Build an in-memory profile with a summoned collection of the given size"""
+    rng = random.Random(seed)
+    user_data: Dict[str, Any] = {"claimed_waifus": []}
+    while len(user_data["claimed_waifus"]) < size:
+        user_data["claimed_waifus"].extend(
+            summon_engine.pull_many(user_data, min(50, size - len(user_data["claimed_waifus"])), rng=rng)
+        )
+    return user_data
+
+
+def create_buff_manager() -> BuffManager:
+    """Buff manager wired to the real guild, pet, dream and affinity data"""
+    return BuffManager(BattleEngine(), GuildManager(), PetManager(), DreamManager(), affinity_manager)
+
+
+def _run_battle(buff_manager: BuffManager, player: Dict[str, Any], opponent: Dict[str, Any],
+                user_data: Dict[str, Any], rng: random.Random, use_snapshots: bool) -> int:
+    """Run one 1v1 battle loop like the battle cog; returns rounds fought"""
+    engine = buff_manager.battle_engine
+    player_hp = player.get("hp", 100)
+    opponent_hp = opponent.get("hp", 100)
+
+    if use_snapshots:
+        player_snapshot = buff_manager.create_snapshot(player, BENCHMARK_USER_ID, user_data)
+        opponent_snapshot = buff_manager.create_snapshot(opponent, None)
+
+    round_num = 1
+    while player_hp > 0 and opponent_hp > 0 and round_num <= BATTLE_ROUNDS_MAX:
+        if use_snapshots:
+            now = time.time()
+            buff_manager.refresh(player_snapshot, now)
+            buff_manager.refresh(opponent_snapshot, now)
+            attacker, defender = player_snapshot.stats, opponent_snapshot.stats
+        else:
+            # Previous behaviour: every buff source recomputed for both sides each turn
+            attacker = buff_manager.apply_all_buffs(player, BENCHMARK_USER_ID, user_data)
+            defender = buff_manager.apply_all_buffs(opponent, BENCHMARK_USER_ID, user_data)
+        damage, _, _ = engine.calculate_damage(attacker, defender, rng=rng)
+        opponent_hp -= damage
+        if opponent_hp <= 0:
+            break
+
+        if use_snapshots:
+            attacker, defender = opponent_snapshot.stats, player_snapshot.stats
+        else:
+            attacker = buff_manager.apply_all_buffs(opponent, None)
+            defender = buff_manager.apply_all_buffs(player, None)
+        damage, _, _ = engine.calculate_damage(attacker, defender, rng=rng)
+        player_hp -= damage
+        round_num += 1
+    return min(round_num, BATTLE_ROUNDS_MAX)
+
+
+def benchmark_buff_snapshots(collection_size: int = 300, battles: int = 20,
+                             seed: Optional[int] = None) -> Dict[str, float]:
+    """Compare per-battle cost of per-turn buff recomputation against battle snapshots"""
+    buff_manager = create_buff_manager()
+    user_data = create_benchmark_collection(collection_size, seed)
+    player = max(user_data["claimed_waifus"], key=lambda c: c.get("potential", 0))
+    # Tanky, harmless opponent so every battle runs the full round limit
+    opponent = dict(player, name="Benchmark Dummy", hp=player.get("hp", 100) * 50, atk=1)
+
+    results = {}
+    for label, use_snapshots in (("per_turn", False), ("snapshot", True)):
+        rng = random.Random(seed)
+        rounds = 0
+        start = time.perf_counter()
+        for _ in range(battles):
+            rounds += _run_battle(buff_manager, player, opponent, user_data, rng, use_snapshots)
+        elapsed = time.perf_counter() - start
+        results[f"{label}_ms_per_battle"] = elapsed / battles * 1000
+        results[f"{label}_rounds"] = rounds / battles
+
+    results["speedup"] = (results["per_turn_ms_per_battle"] / results["snapshot_ms_per_battle"]
+                          if results["snapshot_ms_per_battle"] else 0.0)
+    return results
+
+
+# Catalog fixtures
+
+def create_catalog_fixtures(seed: int = GOLDEN_SEED) -> List[Dict[str, Any]]:
+    """One owned character per assets/characters entry, with seeded stats, levels, traits and relics"""
+    rng = random.Random(seed)
+    trait_names = sorted(content_index.traits)
+    fixtures = []
+    for character in sorted(summon_engine.catalog, key=lambda c: c["name"]):
+        tier = get_catalog_rarity(character)
+        stats = generate_random_stats(tier, rng)
+        stats["potential"] = sum(stats.values()) + rng.randint(0, 500)
+        waifu = summon_engine._build_owned_character(character, tier, stats, FIXTURE_TIMESTAMP, rng)
+        waifu["level"] = rng.randint(1, 40)
+        waifu["crit"] = rng.randint(5, 25)
+        waifu["speed"] = rng.randint(40, 80)
+        if trait_names:
+            waifu["traits"] = rng.sample(trait_names, rng.randint(0, 2))
+        exclusive_relic = character.get("exclusive_relic")
+        if exclusive_relic and rng.random() < 0.3:
+            waifu["exclusive_relic"] = exclusive_relic
+            waifu["relic"] = {"name": exclusive_relic, "potential": rng.randint(1000, 20000)}
+        fixtures.append(waifu)
+    return fixtures
+
+
+def _get_simulate_round():
+    """utils.combact.simulate_round (None without discord.py)"""
+    try:
+        from utils.combact import simulate_round
+    except ImportError:
+        return None
+    return simulate_round
+
+
+# Combat benchmarks
+
+def measure(operation: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """Throughput of an operation plus its average peak traced allocation per call"""
+    iterations = max(1, iterations)
+    operation()  # Warm caches before timing
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.perf_counter() - start
+
+    sample = min(iterations, ALLOCATION_SAMPLE)
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    peak_total = 0
+    for _ in range(sample):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        operation()
+        peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    if not already_tracing:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "us_per_op": elapsed / iterations * 1e6,
+        "bytes_per_op": peak_total / sample
+    }
+
+
+def benchmark_combat(iterations: int = 2000, seed: int = GOLDEN_SEED) -> Dict[str, Dict[str, float]]:
+    """Ops/sec and allocations for each combat hot path over catalog fixtures"""
+    engine = BattleEngine()
+    teams = team_battle.TeamBattleEngine(engine)
+    fixtures = create_catalog_fixtures(seed)
+    stats = [engine.calculate_battle_stats(waifu) for waifu in fixtures]
+    rng = random.Random(seed)
+    matchups = [(index, (index * 7 + 3) % len(fixtures)) for index in range(len(fixtures))]
+    pairs = itertools.cycle(matchups)
+    stat_pairs = itertools.cycle([(stats[a], stats[b]) for a, b in matchups])
+    waifus = itertools.cycle(fixtures)
+    battle = engine.simulate_battle(fixtures[0], fixtures[1], rng=RNGStream(seed))
+    battles = max(1, iterations // 10)
+
+    def pair():
+        a, b = next(pairs)
+        return fixtures[a], fixtures[b]
+
+    cases = [
+        ("calculate_battle_stats", lambda: engine.calculate_battle_stats(next(waifus)), iterations),
+        ("calculate_damage", lambda: engine.calculate_damage(*next(stat_pairs), rng=rng), iterations),
+        ("calculate_damage (no log)", lambda: engine._roll_damage(*next(stat_pairs), rng=rng), iterations),
+        ("process_skills", lambda: engine.process_skills(next(waifus), {}, rng), iterations),
+        ("simulate_battle", lambda: engine.simulate_battle(*pair(), rng=rng), battles),
+        ("simulate_battle (headless)", lambda: engine.simulate_battle(*pair(), rng=rng, headless=True), battles),
+        ("render_battle", lambda: engine.render_battle(battle, fixtures[0], fixtures[1]), battles),
+        ("run_duel", lambda: run_duel(engine, tuple((lambda s=s: s) for s in next(stat_pairs)),
+                                      (500, 500), rng), battles),
+        ("team battle 3v3", lambda: teams.simulate_battle(fixtures[:3], fixtures[3:6], rng=rng,
+                                                          headless=True), battles),
+        ("team battle 5v5", lambda: teams.simulate_battle(fixtures[:5], fixtures[5:10], rng=rng,
+                                                          headless=True), battles),
+        ("raid 40v1", lambda: teams.simulate_battle(fixtures[:40], [_create_raid_boss(fixtures[-1])], rng=rng,
+                                                    headless=True), max(1, battles // 10)),
+    ]
+
+    simulate_round = _get_simulate_round()
+    if simulate_round:
+        cases.append(("combact.simulate_round", lambda: simulate_round(*pair()), iterations))
+
+    return {name: measure(operation, count) for name, operation, count in cases}
+
+
+def create_npc_opponent(player: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """An NPC record shaped like the battle cog's: base stats only, no crit or speed"""
+    return {
+        "name": "Golden NPC",
+        "level": max(1, player.get("level", 1) + rng.randint(-1, 2)),
+        "hp": max(50, player.get("hp", 100) + rng.randint(-20, 30)),
+        "atk": max(30, player.get("atk", 50) + rng.randint(-15, 25)),
+        "def": max(20, player.get("def", 30) + rng.randint(-10, 20)),
+        "element": rng.choice(["Fire", "Water", "Earth", "Air", "Light", "Dark", "Neutral"]),
+        "potential": max(500, player.get("potential", 1000) + rng.randint(-500, 300))
+    }
+
+
+def _create_raid_boss(base: Dict[str, Any]) -> Dict[str, Any]:
+    """A single high-HP unit for raid benchmarks"""
+    return dict(base, name="Raid Boss", hp=base.get("hp", 500) * 400, atk=base.get("atk", 50) * 4, skills=[])
+
+
+# Golden regression battles
+
+def _golden_entry(payload: Any, summary: str) -> Dict[str, str]:
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return {"digest": hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16], "summary": summary}
+
+
+def run_golden_battles(seed: int = GOLDEN_SEED, battles: int = GOLDEN_BATTLES) -> Dict[str, Dict[str, str]]:
+    """Digest of every seeded golden case (battle outcomes, rendered logs, damage and skill rolls)"""
+    engine = BattleEngine()
+    teams = team_battle.TeamBattleEngine(engine)
+    buff_manager = create_buff_manager()
+    backend = "numpy" if team_battle.np is not None else "python"
+    fixtures = create_catalog_fixtures(seed)
+    pick = random.Random(seed)
+    cases = {}
+
+    for index in range(battles):
+        waifu1, waifu2 = pick.sample(fixtures, 2)
+        full = engine.simulate_battle(waifu1, waifu2, rng=RNGStream(index))
+        headless = engine.simulate_battle(waifu1, waifu2, rng=RNGStream(index), headless=True)
+        cases[f"duel-{index:02d}"] = _golden_entry(
+            {"results": full, "headless": headless, "render": engine.render_battle(full, waifu1, waifu2)},
+            f"{waifu1['name']} vs {waifu2['name']}: {full['winner']} in {full['total_rounds']} rounds"
+        )
+
+        stats1, stats2 = engine.calculate_battle_stats(waifu1), engine.calculate_battle_stats(waifu2)
+        rng = RNGStream(index)
+        rolls = [engine.calculate_damage(stats1, stats2, rng=rng) for _ in range(25)]
+        rolls += [engine.process_skills(waifu1, {}, rng) for _ in range(25)]
+        cases[f"rolls-{index:02d}"] = _golden_entry(
+            {"stats": [stats1, stats2], "rolls": rolls}, f"{waifu1['name']} damage and skill rolls"
+        )
+
+        duel = run_duel(engine, (lambda: stats1, lambda: stats2),
+                        (waifu1.get("hp", 100), waifu2.get("hp", 100)), RNGStream(index))
+        cases[f"battle-loop-{index:02d}"] = _golden_entry(
+            duel, f"{waifu1['name']} vs {waifu2['name']}: {len(duel['events'])} turns"
+        )
+
+        # NPC vs player through buff snapshots, as the battle cog runs PvE, arena and ghost battles
+        npc = create_npc_opponent(waifu1, RNGStream(index))
+        player_snapshot = buff_manager.create_snapshot(waifu1, BENCHMARK_USER_ID, {"claimed_waifus": [waifu1]})
+        npc_snapshot = buff_manager.create_snapshot(npc, None)
+        npc_duel = run_duel(engine, (lambda: player_snapshot.stats, lambda: npc_snapshot.stats),
+                            (waifu1.get("hp", 100), npc["hp"]), RNGStream(index))
+        cases[f"npc-duel-{index:02d}"] = _golden_entry(
+            {"stats": [player_snapshot.stats, npc_snapshot.stats], "duel": npc_duel},
+            f"{waifu1['name']} vs NPC: {len(npc_duel['events'])} turns"
+        )
+
+        size = 3 if index % 2 == 0 else 5
+        team1, team2 = pick.sample(fixtures, size), pick.sample(fixtures, size)
+        team = teams.simulate_battle(team1, team2, rng=RNGStream(index))
+        cases[f"team-{size}v{size}-{backend}-{index:02d}"] = _golden_entry(
+            {"results": team, "render": teams.render_battle(team, team1, team2)},
+            f"{size}v{size}: {team['winner']} in {team['total_rounds']} rounds"
+        )
+
+    simulate_round = _get_simulate_round()
+    if simulate_round:
+        for index in range(battles):
+            waifu1, waifu2 = pick.sample(fixtures, 2)
+            random.seed(index)  # simulate_round draws from the global random module
+            cases[f"round-{index:02d}"] = _golden_entry(
+                simulate_round(waifu1, waifu2), f"{waifu1['name']} vs {waifu2['name']} round"
+            )
+    return cases
+
+
+def check_mirror_balance(battles: int = MIRROR_BATTLES, seed: int = GOLDEN_SEED) -> Dict[str, float]:
+    """Team 1's win rate when both sides field the same equal-speed team (should be ~50%)"""
+    teams = team_battle.TeamBattleEngine(BattleEngine())
+    fixtures = create_catalog_fixtures(seed)
+    pick = random.Random(seed)
+    wins = [0, 0, 0]
+    for index in range(battles):
+        team = [dict(waifu, speed=50) for waifu in pick.sample(fixtures, 3 if index % 2 == 0 else 5)]
+        result = teams.simulate_battle(team, [dict(waifu) for waifu in team], rng=RNGStream(index), headless=True)
+        wins[result["winner_id"]] += 1
+    decisive = wins[1] + wins[2]
+    return {"team1_win_rate": wins[1] / decisive if decisive else 0.5, "draws": wins[0]}
+
+
+def load_golden() -> Dict[str, Dict[str, str]]:
+    """Golden case digests from GOLDEN_FILE (empty if missing)"""
+    if not GOLDEN_FILE.exists():
+        return {}
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f).get("cases", {})
+
+
+def save_golden(cases: Dict[str, Dict[str, str]]):
+    """Write golden digests, keeping cases this environment cannot run (e.g. the other team backend)"""
+    golden = load_golden()
+    golden.update(cases)
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"seed": GOLDEN_SEED, "battles": GOLDEN_BATTLES, "cases": dict(sorted(golden.items()))},
+                  f, indent=2, ensure_ascii=False)
+
+
+def check_golden(cases: Dict[str, Dict[str, str]], golden: Dict[str, Dict[str, str]]) -> Dict[str, List[str]]:
+    """Compare computed cases with the golden file: changed, new and skipped case names"""
+    return {
+        "changed": [name for name, case in cases.items() if name in golden and golden[name]["digest"] != case["digest"]],
+        "new": [name for name in cases if name not in golden],
+        "skipped": [name for name in golden if name not in cases]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="KoKoroMichi combat benchmarks")
+    parser.add_argument("--suite", choices=["buffs", "combat", "all"], default="all", help="Benchmarks to run")
+    parser.add_argument("--collection", type=int, default=300, help="Waifus in the buff benchmark collection")
+    parser.add_argument("--battles", type=int, default=20, help="Battles per buff measurement")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per combat measurement")
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed")
+    parser.add_argument("--golden", action="store_true", help="Check golden seeded battles instead of benchmarking")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the golden file")
+    args = parser.parse_args(argv)
+
+    if args.golden or args.update_golden:
+        cases = run_golden_battles()
+        if _get_simulate_round() is None:
+            # Kept as-is in the golden file and not counted as mismatches
+            print("  round-NN cases skipped: utils.combact needs discord.py")
+        if args.update_golden:
+            save_golden(cases)
+            print(f"Wrote {len(cases)} golden cases to {GOLDEN_FILE}")
+            return 0
+        golden = load_golden()
+        result = check_golden(cases, golden)
+        for name in result["changed"]:
+            print(f"  CHANGED {name}: {cases[name]['summary']} (was: {golden[name]['summary']})")
+        for name in result["new"]:
+            print(f"  NEW     {name}: {cases[name]['summary']}")
+        print(f"Golden battles: {len(cases) - len(result['changed']) - len(result['new'])} match, "
+              f"{len(result['changed'])} changed, {len(result['new'])} new, {len(result['skipped'])} skipped")
+        mirror = check_mirror_balance()
+        balanced = abs(mirror["team1_win_rate"] - 0.5) <= MIRROR_TOLERANCE
+        print(f"Mirror matches: team 1 wins {mirror['team1_win_rate']:.1%} of {MIRROR_BATTLES} "
+              f"({'ok' if balanced else 'UNBALANCED'})")
+        return 1 if result["changed"] or result["new"] or not balanced else 0
+
+    if args.suite in ("combat", "all"):
+        print(f"Combat benchmark ({len(summon_engine.catalog)} catalog fixtures, {args.iterations} iterations)")
+        for name, result in benchmark_combat(args.iterations, args.seed).items():
+            print(f"  {name:<34} {result['ops_per_sec']:>12,.0f} ops/s {result['us_per_op']:>10.1f} us/op "
+                  f"{result['bytes_per_op'] / 1024:>8.1f} KiB/op")
+
+    if args.suite in ("buffs", "all"):
+        buffs = benchmark_buff_snapshots(args.collection, args.battles, args.seed)
+        print(f"Buff snapshot benchmark ({args.collection}-waifu collection, {args.battles} battles)")
+        print(f"  per-turn buffs: {buffs['per_turn_ms_per_battle']:.2f} ms/battle "
+              f"({buffs['per_turn_rounds']:.1f} rounds)")
+        print(f"  snapshot buffs: {buffs['snapshot_ms_per_battle']:.2f} ms/battle "
+              f"({buffs['snapshot_rounds']:.1f} rounds)")
+        print(f"  speedup: {buffs['speedup']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
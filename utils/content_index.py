@@ -0,0 +1,154 @@
+# Content Lookup Indexes for KoKoroMichi Bot
+import json
+import time
+import bisect
+import logging
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple, Any, Mapping
+
+from core.config import DATA_DIR, RELICS_DIR, RARITY_TIERS, RELIC_TIER_MULTIPLIERS
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the content files for changes
+CONTENT_RELOAD_CHECK_INTERVAL = 30
+
+# Trait effects that change battle stats
+BATTLE_TRAIT_EFFECTS = ("damage_bonus", "defense_bonus", "crit_chance", "healing_bonus")
+
+
+def freeze(value: Any) -> Any:
+    """Read-only view of loaded JSON (dicts become mapping proxies, lists become tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ContentIndex:
+    """Immutable name-keyed indexes for traits, relic tiers and relics, rebuilt when content files change"""
+
+    def __init__(self, data_dir: Path = DATA_DIR, relics_dir: Path = RELICS_DIR):
+        self.traits_file = data_dir / "traits.json"
+        self.game_data_file = data_dir / "game_data.json"
+        self.relics_dir = relics_dir
+
+        self.traits: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+        self.trait_battle_effects: Mapping[str, Tuple[Tuple[str, float], ...]] = MappingProxyType({})
+        self.relics: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+        self.relic_tier_thresholds: Tuple[int, ...] = ()
+        self.relic_tier_multipliers: Tuple[float, ...] = ()
+
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+        self.reload()
+
+    # Loading
+
+    def _load_json(self, file_path: Path) -> Dict[str, Any]:
+        """Read a content file (empty dict if missing or invalid)"""
+        try:
+            if file_path.exists():
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+        return {}
+
+    def _get_source_files(self) -> List[Path]:
+        """Every file the indexes are built from"""
+        files = [self.traits_file, self.game_data_file]
+        if self.relics_dir.exists():
+            files.extend(sorted(self.relics_dir.glob("*.json")))
+        return files
+
+    def _read_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for file_path in self._get_source_files():
+            try:
+                mtimes[str(file_path)] = file_path.stat().st_mtime
+            except OSError:
+                continue
+        return mtimes
+
+    def reload(self):
+        """Rebuild every index from the content files"""
+        mtimes = self._read_mtimes()
+        game_data = self._load_json(self.game_data_file)
+
+        # Traits: data/traits.json, falling back to the game_data.json section
+        trait_data = self._load_json(self.traits_file) or game_data.get("traits", {})
+        traits = {}
+        for trait_list in trait_data.get("trait_categories", {}).values():
+            for trait in trait_list:
+                name = trait.get("name")
+                if name and name not in traits:  # First category wins, like the old linear search
+                    traits[name] = trait
+
+        trait_battle_effects = {
+            name: tuple((effect, value) for effect, value in trait.get("effects", {}).items()
+                        if effect in BATTLE_TRAIT_EFFECTS)
+            for name, trait in traits.items()
+        }
+
+        # Relics: game_data.json catalog, overridden by individual data/relics files
+        relics = dict(game_data.get("relics", {}))
+        if self.relics_dir.exists():
+            for relic_file in sorted(self.relics_dir.glob("*.json")):
+                relic = self._load_json(relic_file)
+                if relic:
+                    relics[relic.get("name", relic_file.stem)] = relic
+
+        # Relic tiers: potential thresholds from the rarity tiers (game_data.json "relic_tiers" overrides)
+        tier_multipliers = dict(RELIC_TIER_MULTIPLIERS)
+        tier_multipliers.update(game_data.get("relic_tiers", {}))
+        tiers = sorted((RARITY_TIERS[tier]["threshold"], float(multiplier))
+                       for tier, multiplier in tier_multipliers.items() if tier in RARITY_TIERS)
+
+        self.traits = freeze(traits)
+        self.trait_battle_effects = MappingProxyType(trait_battle_effects)
+        self.relics = freeze(relics)
+        self.relic_tier_thresholds = tuple(threshold for threshold, _ in tiers)
+        self.relic_tier_multipliers = tuple(multiplier for _, multiplier in tiers)
+        self._mtimes = mtimes
+        self._last_check = time.monotonic()
+        logger.info(f"Content indexes loaded: {len(traits)} traits, {len(relics)} relics, {len(tiers)} relic tiers")
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if any content file changed (checked at most once per interval); returns True if reloaded"""
+        now = time.monotonic()
+        if not force and now - self._last_check < CONTENT_RELOAD_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        if self._read_mtimes() == self._mtimes:
+            return False
+        self.reload()
+        return True
+
+    # Lookups
+
+    def get_trait(self, name: str) -> Optional[Mapping[str, Any]]:
+        """Trait definition by name"""
+        self.refresh()
+        return self.traits.get(name)
+
+    def get_trait_battle_effects(self, name: str) -> Tuple[Tuple[str, float], ...]:
+        """(effect, value) pairs of a trait that modify battle stats"""
+        self.refresh()
+        return self.trait_battle_effects.get(name, ())
+
+    def get_relic(self, name: str) -> Optional[Mapping[str, Any]]:
+        """Relic catalog entry by name"""
+        self.refresh()
+        return self.relics.get(name)
+
+    def get_relic_multiplier(self, potential: int) -> float:
+        """Relic stat multiplier for a relic's potential"""
+        self.refresh()
+        index = bisect.bisect_right(self.relic_tier_thresholds, potential) - 1
+        return self.relic_tier_multipliers[index] if index >= 0 else 1.0
+
+# Global content index instance
+content_index = ContentIndex()
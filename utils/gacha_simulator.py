@@ -0,0 +1,152 @@
+# Gacha Monte Carlo Simulator & Summon Benchmark for KoKoroMichi Bot
+#
+# Usage: python -m utils.gacha_simulator [--pulls N] [--batch N] [--banner ID] [--seed N] [--bench-only]
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Optional, Any
+
+from core.config import SUMMON_COST, BULK_SUMMON_DISCOUNT, DEFAULT_BANNER_ID
+from utils.summon_engine import summon_engine, RARITY_ORDER, SR_PLUS, SSR_PLUS
+import utils.summon_engine as summon_engine_module
+
+
+def get_batch_cost(batch_size: int) -> int:
+    """Gem cost of one !summon call of the given size (mirrors the summon command)"""
+    if batch_size >= 10:
+        return int(SUMMON_COST * batch_size * (1 - BULK_SUMMON_DISCOUNT))
+    return SUMMON_COST * batch_size
+
+
+def simulate_rates(total_pulls: int, batch_size: int = 10, banner_id: str = DEFAULT_BANNER_ID,
+                   players: int = 1, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Run pulls through the engine's pity walk and collect effective rate statistics
+
+    The pity walk is sequential per player, and !summon-sized batches (below NUMPY_MIN_BATCH)
+    draw their uniforms in pure Python too, so the default run does not use NumPy.
+    """
+    rng = random.Random(seed)
+    counts = {tier: 0 for tier in RARITY_ORDER}
+    triggers: Dict[str, int] = {}
+    pity_states = [{"since_sr": 0, "since_ssr": 0} for _ in range(max(1, players))]
+
+    batches = max(1, total_pulls // batch_size)
+    start = time.perf_counter()
+    for b in range(batches):
+        pity = pity_states[b % len(pity_states)]
+        for tier in summon_engine.roll_rarities(pity, batch_size, banner_id, rng, triggers):
+            counts[tier] += 1
+    elapsed = time.perf_counter() - start
+
+    pulls = batches * batch_size
+    ssr_plus = sum(counts[tier] for tier in SSR_PLUS)
+    sr_plus = sum(counts[tier] for tier in SR_PLUS)
+    gems_spent = batches * get_batch_cost(batch_size)
+    return {
+        "banner": banner_id,
+        "pulls": pulls,
+        "batch_size": batch_size,
+        "counts": counts,
+        "rates": {tier: counts[tier] / pulls * 100 for tier in RARITY_ORDER},
+        "nominal_rates": summon_engine.get_effective_rates(banner_id),
+        "sr_plus_rate": sr_plus / pulls * 100,
+        "ssr_plus_rate": ssr_plus / pulls * 100,
+        "triggers": {name: value / pulls * 100 for name, value in triggers.items()},
+        "gems_per_ssr_plus": gems_spent / ssr_plus if ssr_plus else float("inf"),
+        "pulls_per_ssr_plus": pulls / ssr_plus if ssr_plus else float("inf"),
+        "elapsed": elapsed,
+        "pulls_per_second": pulls / elapsed if elapsed else 0.0
+    }
+
+
+def benchmark_pull_many(total_pulls: int, batch_size: int = 50, banner_id: str = DEFAULT_BANNER_ID,
+                        seed: Optional[int] = None) -> Dict[str, float]:
+    """Measure end-to-end summon throughput (rarity, character pick, stats, records)"""
+    rng = random.Random(seed)
+    user_data: Dict[str, Any] = {}
+    batches = max(1, total_pulls // batch_size)
+
+    start = time.perf_counter()
+    for _ in range(batches):
+        summon_engine.pull_many(user_data, batch_size, banner_id, rng)
+    batch_elapsed = time.perf_counter() - start
+
+    single_pulls = min(batches * batch_size, 100000)
+    start = time.perf_counter()
+    for _ in range(single_pulls):
+        summon_engine.pull(user_data, banner_id, rng)
+    single_elapsed = time.perf_counter() - start
+
+    return {
+        "batch_pulls_per_second": batches * batch_size / batch_elapsed if batch_elapsed else 0.0,
+        "single_pulls_per_second": single_pulls / single_elapsed if single_elapsed else 0.0,
+        "batch_call_ms": batch_elapsed / batches * 1000
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format a rate simulation report for the terminal"""
+    lines = [
+        f"Banner: {report['banner']}  |  {report['pulls']:,} pulls in batches of {report['batch_size']}",
+        "",
+        f"{'Tier':<8}{'Nominal %':>12}{'Effective %':>14}{'Count':>12}"
+    ]
+    for tier in reversed(RARITY_ORDER):
+        if tier not in report["nominal_rates"] and not report["counts"][tier]:
+            continue
+        lines.append(f"{tier:<8}{report['nominal_rates'].get(tier, 0.0):>12.3f}"
+                     f"{report['rates'][tier]:>14.3f}{report['counts'][tier]:>12,}")
+
+    lines += [
+        "",
+        f"SR+ rate:  {report['sr_plus_rate']:.3f}%",
+        f"SSR+ rate: {report['ssr_plus_rate']:.3f}%",
+        f"Pulls per SSR+: {report['pulls_per_ssr_plus']:.2f}",
+        f"Gems per SSR+:  {report['gems_per_ssr_plus']:.1f}",
+        "",
+        "Pity triggers (% of pulls):"
+    ]
+    for name in ("sr_guarantee", "ssr_guarantee", "soft_pity", "soft_pity_hits"):
+        lines.append(f"  {name:<16}{report['triggers'].get(name, 0.0):.3f}%")
+    lines += ["", f"Rarity walk throughput: {report['pulls_per_second']:,.0f} pulls/sec"]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="KoKoroMichi gacha simulator and summon benchmark")
+    parser.add_argument("--pulls", type=int, default=1_000_000, help="Total pulls to simulate")
+    parser.add_argument("--batch", type=int, default=10,
+                        help="Pulls per !summon call (the rate simulation runs in pure Python; NumPy "
+                             f"only samples batches of {summon_engine_module.NUMPY_MIN_BATCH}+ pulls)")
+    parser.add_argument("--players", type=int, default=1, help="Independent pity states to rotate through")
+    parser.add_argument("--banner", default=DEFAULT_BANNER_ID, help="Banner id to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible runs")
+    parser.add_argument("--bench-pulls", type=int, default=200_000, help="Pulls for the pull_many benchmark")
+    parser.add_argument("--bench-only", action="store_true", help="Skip the rate simulation")
+    args = parser.parse_args(argv)
+
+    if not summon_engine.get_banner(args.banner):
+        print(f"Unknown banner: {args.banner}")
+        return 1
+    if args.batch < 1 or args.pulls < 1:
+        print("--pulls and --batch must be positive")
+        return 1
+
+    numpy_batches = summon_engine_module.np is not None and args.batch >= summon_engine_module.NUMPY_MIN_BATCH
+    print(f"Rate simulation backend: {'NumPy' if numpy_batches else 'pure Python'}")
+    print(f"Catalog: {len(summon_engine.catalog)} characters\n")
+
+    if not args.bench_only:
+        print(format_report(simulate_rates(args.pulls, args.batch, args.banner, args.players, args.seed)))
+        print()
+
+    bench = benchmark_pull_many(args.bench_pulls, 50, args.banner, args.seed)
+    print(f"pull_many (x50): {bench['batch_pulls_per_second']:,.0f} pulls/sec "
+          f"({bench['batch_call_ms']:.3f} ms per call)")
+    print(f"pull (single):   {bench['single_pulls_per_second']:,.0f} pulls/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
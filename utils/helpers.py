@@ -69,10 +69,15 @@ def calculate_battle_power(hp: int, atk: int, defense: int, level: int = 1) -> i
     level_multiplier = 1 + (level - 1) * 0.1
     return int(base_power * level_multiplier)
 
-def get_random_element() -> str:
+def calculate_waifu_power(waifu: Dict[str, Any]) -> int:
+    """Battle power of a character record"""
+    return calculate_battle_power(waifu.get("hp", 100), waifu.get("atk", 50), waifu.get("def", 30),
+                                  waifu.get("level", 1))
+
+def get_random_element(rng=None) -> str:
     """Get a random element type"""
     elements = ["Fire", "Water", "Earth", "Air", "Light", "Dark", "Neutral"]
-    return random.choice(elements)
+    return (rng or random).choice(elements)
 
 def check_elemental_advantage(attacker_element: str, defender_element: str) -> float:
     """Check elemental advantage and return damage multiplier"""
@@ -92,24 +97,26 @@ def check_elemental_advantage(attacker_element: str, defender_element: str) -> f
     else:
         return 1.0   # No advantage
 
-def generate_random_stats(rarity_tier: str) -> Dict[str, int]:
+# Base stat ranges (inclusive) rolled for newly summoned characters
+RARITY_STAT_RANGES = {
+    "Mythic": {"hp": (180, 220), "atk": (90, 110), "def": (80, 100)},
+    "LR": {"hp": (160, 200), "atk": (80, 100), "def": (70, 90)},
+    "UR": {"hp": (140, 180), "atk": (70, 90), "def": (60, 80)},
+    "SSR": {"hp": (120, 160), "atk": (60, 80), "def": (50, 70)},
+    "SR": {"hp": (100, 140), "atk": (50, 70), "def": (40, 60)},
+    "R": {"hp": (80, 120), "atk": (40, 60), "def": (30, 50)},
+    "N": {"hp": (60, 100), "atk": (30, 50), "def": (20, 40)}
+}
+
+def generate_random_stats(rarity_tier: str, rng=None) -> Dict[str, int]:
     """Generate random stats based on rarity tier"""
-    base_stats = {
-        "Mythic": {"hp": (180, 220), "atk": (90, 110), "def": (80, 100)},
-        "LR": {"hp": (160, 200), "atk": (80, 100), "def": (70, 90)},
-        "UR": {"hp": (140, 180), "atk": (70, 90), "def": (60, 80)},
-        "SSR": {"hp": (120, 160), "atk": (60, 80), "def": (50, 70)},
-        "SR": {"hp": (100, 140), "atk": (50, 70), "def": (40, 60)},
-        "R": {"hp": (80, 120), "atk": (40, 60), "def": (30, 50)},
-        "N": {"hp": (60, 100), "atk": (30, 50), "def": (20, 40)}
-    }
-    
-    stats_range = base_stats.get(rarity_tier, base_stats["N"])
+    rng = rng or random
+    stats_range = RARITY_STAT_RANGES.get(rarity_tier, RARITY_STAT_RANGES["N"])
     
     return {
-        "hp": random.randint(*stats_range["hp"]),
-        "atk": random.randint(*stats_range["atk"]),
-        "def": random.randint(*stats_range["def"])
+        "hp": rng.randint(*stats_range["hp"]),
+        "atk": rng.randint(*stats_range["atk"]),
+        "def": rng.randint(*stats_range["def"])
     }
 
 def create_progress_bar(current: int, maximum: int, length: int = 10) -> str:
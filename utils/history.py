@@ -1,31 +1,96 @@
-import json, os, datetime
+import json, os, re, datetime
 
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), '..', 'data',
-                            'history.json')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data')
 
+# Summon records, one JSON object per line, appended as summons happen
+HISTORY_FILE = os.path.join(DATA_PATH, 'history.jsonl')
 
-def add_summon(user_id, waifu_name, rarity, timestamp=None):
-    if timestamp is None:
-        timestamp = datetime.datetime.now().isoformat()
+# Records written before the log format; read but never rewritten
+LEGACY_HISTORY_FILE = os.path.join(DATA_PATH, 'history.json')
+
+# Size at which the log is moved to the next numbered archive (HISTORY_FILE + '.1', '.2', ...)
+HISTORY_MAX_BYTES = 5 * 1024 * 1024
+
+
+def _archive_numbers():
+    """Numbers of the rotated logs on disk, oldest first"""
+    prefix = os.path.basename(HISTORY_FILE) + '.'
+    try:
+        names = os.listdir(os.path.dirname(HISTORY_FILE))
+    except OSError:
+        return []
+    return sorted(int(name[len(prefix):]) for name in names
+                  if name.startswith(prefix) and re.fullmatch(r'\d+', name[len(prefix):]))
 
-    # Load existing history
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+
+def load_history():
+    """Every summon record: legacy entries, the archived logs, then the current log"""
+    history = []
+    if os.path.exists(LEGACY_HISTORY_FILE):
+        with open(LEGACY_HISTORY_FILE, 'r', encoding='utf-8') as f:
             try:
-                history = json.load(f)
+                history.extend(json.load(f))
             except json.JSONDecodeError:
-                history = []
-    else:
-        history = []
-
-    # Append new summon entry
-    history.append({
-        "user_id": user_id,
-        "waifu_name": waifu_name,
-        "rarity": rarity,
-        "timestamp": timestamp
-    })
-
-    # Save back to file
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=4, ensure_ascii=False)
+                pass
+    archives = [f"{HISTORY_FILE}.{number}" for number in _archive_numbers()]
+    for path in archives + [HISTORY_FILE]:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    history.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Partly written record
+    return history
+
+
+def append_history(entries):
+    """Append records to the log in one write, archiving it once it grows past HISTORY_MAX_BYTES
+
+    Archives are never overwritten or deleted: their seeds are needed to replay old summons.
+    """
+    try:
+        if os.path.getsize(HISTORY_FILE) >= HISTORY_MAX_BYTES:
+            number = (_archive_numbers() or [0])[-1] + 1
+            os.replace(HISTORY_FILE, f"{HISTORY_FILE}.{number}")
+    except OSError:
+        pass  # No log yet
+    lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+        f.write(lines)
+
+
+def add_summon(user_id, waifu_name, rarity, timestamp=None, seed=None,
+               banner=None, pity=None):
+    add_summons(user_id, [{"name": waifu_name, "rarity": rarity}], timestamp,
+                seed, banner, pity)
+
+
+def add_summons(user_id, summons, timestamp=None, seed=None, banner=None,
+                pity=None, batch_size=None):
+    """Append a batch of summons; seed, banner, the pity state before the
+    batch and batch_size (pulls drawn, including any that produced no
+    character) are enough to replay it with the summon engine"""
+    if timestamp is None:
+        timestamp = datetime.datetime.now().isoformat()
+
+    entries = []
+    for index, summon in enumerate(summons):
+        entry = {
+            "user_id": user_id,
+            "waifu_name": summon.get("name", "Unknown"),
+            "rarity": summon.get("rarity", "N"),
+            "timestamp": timestamp
+        }
+        if seed is not None:
+            entry["seed"] = seed
+            entry["pull_index"] = index
+            entry["batch_size"] = len(summons) if batch_size is None else batch_size
+        if banner is not None:
+            entry["banner"] = banner
+        if pity is not None:
+            entry["pity_before"] = pity
+        entries.append(entry)
+
+    append_history(entries)
@@ -0,0 +1,313 @@
+# Leaderboards for KoKoroMichi Bot
+import json
+import time
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple, Any, Callable, Iterable
+
+# Optional: without it, board updates fall back to O(n) list inserts and removals
+try:
+    from sortedcontainers import SortedList
+except ImportError:
+    SortedList = None
+
+from core.config import DATA_DIR
+from core.data_manager import data_manager
+from utils.power_cache import get_collection_power
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of the persisted scores (also written on shutdown)
+LEADERBOARD_SAVE_INTERVAL = 60
+
+# Scope name of the bot-wide boards
+GLOBAL_SCOPE = "global"
+
+
+# Category -> (display name, score function); a score of None keeps the user off that board,
+# and categories without a score function are set through set_external_scores
+LEADERBOARD_CATEGORIES: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Optional[float]]]] = {
+    "gold": ("💰 Gold", lambda user_data: user_data.get("gold", 0)),
+    "level": ("⭐ Level", lambda user_data: user_data.get("xp", 0)),  # Level follows XP, so XP breaks ties
+    "battles": ("⚔️ Battle Wins", lambda user_data: user_data.get("battle_stats", {}).get("battles_won", 0)),
+    "arena": ("🏟️ Arena Points",
+              lambda user_data: user_data["arena_stats"].get("ranking_points", 1000)
+              if user_data.get("arena_stats") else None),
+    "pvp": ("🥊 PvP Rating", None),  # Fed by the rating system after each rating period
+    "summons": ("🎲 Total Summons", lambda user_data: user_data.get("summon_stats", {}).get("total_summons", 0)),
+    "power": ("💪 Collection Power", get_collection_power),
+}
+
+
+class _SortedKeys(list):
+    """Minimal SortedList stand-in over bisect (O(log n) searches, O(n) inserts and removals)"""
+
+    def add(self, key):
+        bisect.insort(self, key)
+
+    def remove(self, key):
+        del self[bisect.bisect_left(self, key)]
+
+    def bisect_left(self, key) -> int:
+        return bisect.bisect_left(self, key)
+
+
+def create_sorted_list():
+    """Empty SortedList (or the bisect stand-in without sortedcontainers)"""
+    return SortedList() if SortedList is not None else _SortedKeys()
+
+
+class Leaderboard:
+    """One ranking kept sorted on (-score, user_id) for O(log n) rank lookups and top-K slices
+
+    Score updates are O(log n) with sortedcontainers and O(n) with the bisect fallback.
+    """
+
+    def __init__(self):
+        self.keys = create_sorted_list()
+        self.scores: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def update(self, user_id: str, score: Optional[float]):
+        """Set a user's score (None removes them)"""
+        old = self.scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self.keys.remove((-old, user_id))
+            del self.scores[user_id]
+        if score is not None:
+            self.keys.add((-score, user_id))
+            self.scores[user_id] = score
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, score) for a page of the board"""
+        return [(offset + index + 1, user_id, -negative_score)
+                for index, (negative_score, user_id) in enumerate(self.keys[offset:offset + limit])]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based position of a user (None if not on the board); ties share the best rank"""
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self.keys.bisect_left((-score, "")) + 1
+
+
+class LeaderboardService:
+    """Global and per-server leaderboards, updated from every profile save
+
+    Boards are loaded (or rebuilt from every profile) on first use rather than at import.
+    """
+
+    def __init__(self, leaderboard_file: str = str(DATA_DIR / "leaderboards.json")):
+        self.leaderboard_file = leaderboard_file
+        self.boards: Dict[Tuple[str, str], Leaderboard] = {}
+        self.user_scores: Dict[str, Dict[str, float]] = {}
+        self.guild_members: Dict[str, set] = {}
+        self.user_guilds: Dict[str, set] = {}
+        self.guild_synced: Dict[str, float] = {}
+        self.external_sources: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    # Persistence
+
+    def _ensure_loaded(self):
+        """Load the persisted boards (or rebuild them) and pull external scores, once"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.load():
+            self.rebuild()
+        for category, provider in self.external_sources.items():
+            self.set_external_scores(category, provider())
+
+    def add_external_source(self, category: str, provider: Callable[[], Dict[str, float]]):
+        """Register the current scores of an externally fed category, read when the boards load"""
+        self.external_sources[category] = provider
+        if self._loaded:
+            self.set_external_scores(category, provider())
+
+    def load(self) -> bool:
+        """Rebuild boards from the persisted scores; False if there is nothing to load"""
+        try:
+            with open(self.leaderboard_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Error loading leaderboards: {e}")
+            return False
+
+        self.boards = {}
+        self.user_scores = {}
+        self.guild_members = {}
+        self.user_guilds = {}
+        for guild_id, members in data.get("guilds", {}).items():
+            for user_id in members:
+                self.guild_members.setdefault(guild_id, set()).add(user_id)
+                self.user_guilds.setdefault(user_id, set()).add(guild_id)
+        for user_id, scores in data.get("scores", {}).items():
+            self._set_scores(user_id, {category: score for category, score in scores.items()
+                                       if category in LEADERBOARD_CATEGORIES})
+        logger.info(f"Leaderboards loaded: {len(self.user_scores)} users, {len(self.guild_members)} servers")
+        return True
+
+    def save(self):
+        """Write scores and server memberships"""
+        if not self._loaded:
+            return  # Nothing loaded, nothing changed
+        data = {
+            "scores": self.user_scores,
+            "guilds": {guild_id: sorted(members) for guild_id, members in self.guild_members.items()}
+        }
+        try:
+            with open(self.leaderboard_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Error saving leaderboards: {e}")
+
+    def _maybe_save(self):
+        if self._dirty and time.monotonic() - self._last_save >= LEADERBOARD_SAVE_INTERVAL:
+            self.save()
+
+    def rebuild(self):
+        """Full rescan of every profile (externally fed categories are re-sent by their owners)"""
+        self.boards = {}
+        self.user_scores = {}
+        for user_id, user_data in data_manager.get_all_user_data().items():
+            self._set_scores(user_id, self.compute_scores(user_data))
+        self._dirty = True
+        self.save()
+        logger.info(f"Leaderboards rebuilt from {len(self.user_scores)} profiles")
+
+    # Updates
+
+    @staticmethod
+    def compute_scores(user_data: Dict[str, Any]) -> Dict[str, float]:
+        """Every category score for a profile (categories without a score are left out)"""
+        scores = {}
+        for category, (_, score_function) in LEADERBOARD_CATEGORIES.items():
+            if score_function is None:
+                continue
+            try:
+                score = score_function(user_data)
+            except (TypeError, ValueError, AttributeError):
+                score = None
+            if score is not None:
+                scores[category] = score
+        return scores
+
+    def _get_board(self, scope: str, category: str) -> Leaderboard:
+        board = self.boards.get((scope, category))
+        if board is None:
+            board = self.boards[(scope, category)] = Leaderboard()
+        return board
+
+    def _set_scores(self, user_id: str, scores: Dict[str, float]) -> bool:
+        """Apply a user's scores to the global and server boards; True if anything changed"""
+        old_scores = self.user_scores.get(user_id, {})
+        if scores == old_scores:
+            return False
+        scopes = [GLOBAL_SCOPE] + sorted(self.user_guilds.get(user_id, ()))
+        for category in LEADERBOARD_CATEGORIES:
+            score = scores.get(category)
+            if score == old_scores.get(category):
+                continue
+            for scope in scopes:
+                self._get_board(scope, category).update(user_id, score)
+        self.user_scores[user_id] = scores
+        return True
+
+    def _merge_external(self, user_id: str, scores: Dict[str, float]) -> Dict[str, float]:
+        """Carry over the externally fed scores a profile cannot provide"""
+        old_scores = self.user_scores.get(user_id, {})
+        for category, (_, score_function) in LEADERBOARD_CATEGORIES.items():
+            if score_function is None and category in old_scores:
+                scores[category] = old_scores[category]
+        return scores
+
+    def on_profile_saved(self, user_id: str, user_data: Dict[str, Any]):
+        """Profile save listener"""
+        self._ensure_loaded()
+        user_id = str(user_id)
+        if self._set_scores(user_id, self._merge_external(user_id, self.compute_scores(user_data))):
+            self._dirty = True
+        self._maybe_save()
+
+    def set_external_scores(self, category: str, scores: Dict[str, float]):
+        """Bulk update of a category that is not derived from profiles"""
+        self._ensure_loaded()
+        for user_id, score in scores.items():
+            user_scores = dict(self.user_scores.get(str(user_id), {}))
+            user_scores[category] = score
+            if self._set_scores(str(user_id), user_scores):
+                self._dirty = True
+        self._maybe_save()
+
+    def add_member(self, guild_id: Any, user_id: Any):
+        """Put a user on a server's boards"""
+        self._ensure_loaded()
+        guild_id, user_id = str(guild_id), str(user_id)
+        if user_id in self.guild_members.get(guild_id, ()):
+            return
+        self.guild_members.setdefault(guild_id, set()).add(user_id)
+        self.user_guilds.setdefault(user_id, set()).add(guild_id)
+        for category, score in self.user_scores.get(user_id, {}).items():
+            self._get_board(guild_id, category).update(user_id, score)
+        self._dirty = True
+
+    def remove_member(self, guild_id: Any, user_id: Any):
+        """Take a user off a server's boards"""
+        self._ensure_loaded()
+        guild_id, user_id = str(guild_id), str(user_id)
+        if user_id not in self.guild_members.get(guild_id, ()):
+            return
+        self.guild_members[guild_id].discard(user_id)
+        self.user_guilds.get(user_id, set()).discard(guild_id)
+        for category in LEADERBOARD_CATEGORIES:
+            board = self.boards.get((guild_id, category))
+            if board is not None:
+                board.update(user_id, None)
+        self._dirty = True
+
+    def sync_guild(self, guild_id: Any, member_ids: Iterable[Any]):
+        """Make a server's boards match its current member list"""
+        self._ensure_loaded()
+        guild_id = str(guild_id)
+        members = {str(member_id) for member_id in member_ids}
+        for user_id in list(self.guild_members.get(guild_id, ())):
+            if user_id not in members:
+                self.remove_member(guild_id, user_id)
+        for user_id in members:
+            if user_id in self.user_scores:
+                self.add_member(guild_id, user_id)
+        self.guild_synced[guild_id] = time.monotonic()
+        self._maybe_save()
+
+    # Queries
+
+    def get_top(self, category: str, limit: int = 10, offset: int = 0,
+                guild_id: Any = None) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, score) entries of a global or server board"""
+        self._ensure_loaded()
+        board = self.boards.get((str(guild_id) if guild_id else GLOBAL_SCOPE, category))
+        return board.top(limit, offset) if board else []
+
+    def get_rank(self, user_id: Any, category: str, guild_id: Any = None) -> Tuple[Optional[int], Optional[float], int]:
+        """(rank, score, board size) for a user"""
+        self._ensure_loaded()
+        board = self.boards.get((str(guild_id) if guild_id else GLOBAL_SCOPE, category))
+        if board is None:
+            return None, None, 0
+        user_id = str(user_id)
+        return board.rank(user_id), board.scores.get(user_id), len(board)
+
+# Global leaderboard service instance
+leaderboard_service = LeaderboardService()
+data_manager.add_save_listener(leaderboard_service.on_profile_saved)
@@ -0,0 +1,183 @@
+# Matchmaking Index for KoKoroMichi Bot
+import random
+import logging
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+
+from core.data_manager import data_manager
+from utils.power_cache import get_waifu_power
+from utils.leaderboard import create_sorted_list
+
+logger = logging.getLogger(__name__)
+
+# Characters that make up a player's indexed team
+MATCH_TEAM_SIZE = 3
+
+# Opponent search window as a fraction of the target score; doubled until enough candidates are found
+MATCH_WINDOW = 0.1
+MATCH_MAX_WINDOW = 0.8
+MATCH_MIN_CANDIDATES = 3
+
+# Key above every entry id, for inclusive upper bounds
+_MAX_ID = "\U0010ffff"
+
+
+class MatchmakingIndex:
+    """Entries sorted by a numeric score for O(log n) closest-opponent queries"""
+
+    def __init__(self):
+        self.keys = create_sorted_list()
+        self.entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def update(self, entry_id: str, score: Optional[float], entry: Optional[Dict[str, Any]] = None):
+        """Add, move or (with score None) remove an entry"""
+        old = self.entries.pop(entry_id, None)
+        if old is not None:
+            self.keys.remove((old[0], entry_id))
+        if score is not None:
+            self.keys.add((score, entry_id))
+            self.entries[entry_id] = (score, entry)
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(entry_id)
+        return entry[1] if entry else None
+
+    def closest(self, score: float, limit: int = 5, exclude: Iterable[str] = ()) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """The `limit` entries nearest to `score` as (score, entry_id, entry), nearest first"""
+        exclude = set(exclude)
+        below = self.keys.bisect_left((score, ""))
+        above = below
+        found = []
+        while len(found) < limit and (below > 0 or above < len(self.keys)):
+            # Step outwards on whichever side is nearer
+            if above >= len(self.keys) or (below > 0 and score - self.keys[below - 1][0] <= self.keys[above][0] - score):
+                below -= 1
+                key_score, entry_id = self.keys[below]
+            else:
+                key_score, entry_id = self.keys[above]
+                above += 1
+            if entry_id not in exclude:
+                found.append((key_score, entry_id, self.entries[entry_id][1]))
+        return found
+
+    def _bounds(self, low: float, high: float) -> Tuple[int, int]:
+        """Key positions of the entries scored in [low, high]"""
+        return self.keys.bisect_left((low, "")), self.keys.bisect_left((high, _MAX_ID))
+
+    def within(self, low: float, high: float, exclude: Iterable[str] = ()) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """Entries scored in [low, high]"""
+        exclude = set(exclude)
+        start, end = self._bounds(low, high)
+        return [(key_score, entry_id, self.entries[entry_id][1])
+                for key_score, entry_id in self.keys[start:end] if entry_id not in exclude]
+
+    def find_match(self, score: float, rng=None, exclude: Iterable[str] = (), window: float = MATCH_WINDOW,
+                   max_window: float = MATCH_MAX_WINDOW, min_candidates: int = MATCH_MIN_CANDIDATES,
+                   absolute: bool = False) -> Optional[Tuple[float, str, Dict[str, Any]]]:
+        """Random entry near `score`, widening the window until enough candidates are found
+
+        Windows are a fraction of the score, or plain score units when absolute is set. Falls back
+        to the single closest entry if even the widest window is too sparse. Only positions are
+        counted, so each attempt is O(log n) however many entries the window holds.
+        """
+        rng = rng or random
+        exclude = set(exclude)
+        width = window
+        while True:
+            span = width if absolute else abs(score) * width
+            low, high = score - span, score + span
+            start, end = self._bounds(low, high)
+            excluded = sum(1 for entry_id in exclude
+                           if entry_id in self.entries and low <= self.entries[entry_id][0] <= high)
+            if end - start - excluded >= min_candidates or width >= max_window or width <= 0:
+                break
+            width = min(max_window, width * 2)
+
+        if end - start > excluded:
+            # Random position, stepping past excluded entries
+            position = rng.randrange(start, end)
+            while True:
+                key_score, entry_id = self.keys[position]
+                if entry_id not in exclude:
+                    return key_score, entry_id, self.entries[entry_id][1]
+                position = start if position + 1 >= end else position + 1
+        closest = self.closest(score, 1, exclude)
+        return closest[0] if closest else None
+
+
+class MatchmakingService:
+    """Indexes of player teams (updated on profile save) and NPC templates"""
+
+    def __init__(self):
+        self.player_power = MatchmakingIndex()  # user_id -> strongest character
+        self.team_power = MatchmakingIndex()  # user_id -> best MATCH_TEAM_SIZE characters
+        self.player_rating = MatchmakingIndex()  # user_id -> arena ranking points
+        self.npc_templates: Dict[str, MatchmakingIndex] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """Index every stored profile"""
+        self.player_power = MatchmakingIndex()
+        self.team_power = MatchmakingIndex()
+        self.player_rating = MatchmakingIndex()
+        for user_id, user_data in data_manager.get_all_user_data().items():
+            self.update_player(user_id, user_data)
+        logger.info(f"Matchmaking index built: {len(self.player_power)} players")
+
+    def update_player(self, user_id: str, user_data: Dict[str, Any]):
+        """Profile save listener: refresh a player's cached team and power scores"""
+        user_id = str(user_id)
+        ranked = sorted(((get_waifu_power(waifu), index) for index, waifu
+                         in enumerate(user_data.get("claimed_waifus", []))), reverse=True)[:MATCH_TEAM_SIZE]
+        if not ranked:
+            self.player_power.update(user_id, None)
+            self.team_power.update(user_id, None)
+            self.player_rating.update(user_id, None)
+            return
+
+        waifus = user_data["claimed_waifus"]
+        # Copies freeze the stats the scores were computed from
+        team = [dict(waifus[index]) for _, index in ranked]
+        powers = [power for power, _ in ranked]
+        rating = user_data.get("arena_stats", {}).get("ranking_points", 1000)
+        entry = {"user_id": user_id, "champion": team[0], "team": team, "powers": powers,
+                 "power": powers[0], "team_power": sum(powers), "rating": rating}
+        self.player_power.update(user_id, powers[0], entry)
+        self.team_power.update(user_id, entry["team_power"], entry)
+        self.player_rating.update(user_id, rating, entry)
+
+    def register_npc_templates(self, pool: str, templates: List[Dict[str, Any]], score_key: str = "level"):
+        """Index a fixed list of NPC opponents by one of their fields"""
+        index = self.npc_templates[pool] = MatchmakingIndex()
+        for position, template in enumerate(templates):
+            index.update(f"{pool}:{position}", template[score_key], template)
+
+    # Queries
+
+    def find_player_opponent(self, power: float, exclude_user: Optional[str] = None, rng=None,
+                             team: bool = False) -> Optional[Dict[str, Any]]:
+        """Another player's champion (or team, by team power) close to `power`"""
+        index = self.team_power if team else self.player_power
+        match = index.find_match(power, rng, exclude=[str(exclude_user)] if exclude_user else ())
+        return match[2] if match else None
+
+    def find_rated_opponent(self, rating: float, exclude_user: Optional[str] = None, rng=None,
+                            window: float = 100) -> Optional[Dict[str, Any]]:
+        """Another player close in arena rating (window in rating points)"""
+        match = self.player_rating.find_match(rating, rng, exclude=[str(exclude_user)] if exclude_user else (),
+                                              window=window, max_window=window * 8, absolute=True)
+        return match[2] if match else None
+
+    def find_npc(self, pool: str, score: float, rng=None, window: float = 20) -> Optional[Dict[str, Any]]:
+        """NPC template of a registered pool near `score` (window in score units)"""
+        index = self.npc_templates.get(pool)
+        if not index:
+            return None
+        match = index.find_match(score, rng, window=window, max_window=window, min_candidates=1, absolute=True)
+        return match[2] if match else None
+
+# Global matchmaking service instance
+matchmaking_service = MatchmakingService()
+data_manager.add_save_listener(matchmaking_service.update_player)
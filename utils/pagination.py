@@ -0,0 +1,180 @@
+# Cursor Pagination for KoKoroMichi Bot
+import time
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any, Callable, Union, Sequence, Mapping
+
+from core.data_manager import data_manager
+
+logger = logging.getLogger(__name__)
+
+# Seconds an unused cursor is kept before it is evicted
+PAGINATION_IDLE_SECONDS = 600
+
+# Sort indexes kept for users without an open cursor
+PAGINATION_MAX_INDEXES = 256
+
+Items = Union[Sequence[Any], Mapping[str, Any]]
+
+
+class PaginationSource:
+    """A per-user item list or mapping with named sort orders and filters
+
+    sort_keys maps a name to (key function, descending); filters maps a name to a
+    predicate(item, value). For mappings, the functions receive (key, value) pairs.
+    """
+
+    def __init__(self, name: str, loader: Callable[[str], Items],
+                 sort_keys: Dict[str, Tuple[Callable[[Any], Any], bool]],
+                 filters: Optional[Dict[str, Callable[[Any, str], bool]]] = None,
+                 default_sort: Optional[str] = None):
+        self.name = name
+        self.loader = loader
+        self.sort_keys = sort_keys
+        self.filters = filters or {}
+        self.default_sort = default_sort or next(iter(sort_keys))
+
+
+class PageCursor:
+    """Position of one open view: which ordering of whose items, and the page shown"""
+
+    __slots__ = ("cursor_id", "source", "user_id", "sort_by", "filter", "page", "per_page", "last_used")
+
+    def __init__(self, cursor_id: int, source: str, user_id: str, sort_by: str,
+                 filter: Optional[Tuple[str, str]], per_page: int, page: int = 0):
+        self.cursor_id = cursor_id
+        self.source = source
+        self.user_id = user_id
+        self.sort_by = sort_by
+        self.filter = filter
+        self.page = page
+        self.per_page = per_page
+        self.last_used = time.monotonic()
+
+
+class PaginationEngine:
+    """Cursors over shared, precomputed sort indexes; pages are materialized only when shown
+
+    A sort index (item positions or keys in display order) is built once per user, source,
+    ordering and filter and shared by every cursor on it, so an open view only holds its
+    cursor. Indexes are dropped when the user's profile is saved.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, PaginationSource] = {}
+        self.cursors: Dict[int, PageCursor] = {}
+        self._indexes: "OrderedDict[Tuple, Tuple[int, List[Any]]]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def register_source(self, source: PaginationSource):
+        self.sources[source.name] = source
+
+    # Cursors
+
+    def open_cursor(self, source: str, user_id: str, sort_by: Optional[str] = None, per_page: int = 10,
+                    filter: Optional[Tuple[str, str]] = None, page: int = 0) -> PageCursor:
+        """Start paging through a user's items; the page is clamped on first render"""
+        self.evict_idle()
+        if sort_by not in self.sources[source].sort_keys:
+            sort_by = self.sources[source].default_sort
+        cursor = PageCursor(next(self._ids), source, str(user_id), sort_by, filter, per_page, max(0, page))
+        self.cursors[cursor.cursor_id] = cursor
+        return cursor
+
+    def get_cursor(self, cursor_id: int) -> Optional[PageCursor]:
+        """An open cursor (None once closed or evicted), marked as used"""
+        cursor = self.cursors.get(cursor_id)
+        if cursor:
+            cursor.last_used = time.monotonic()
+        return cursor
+
+    def close_cursor(self, cursor_id: int):
+        self.cursors.pop(cursor_id, None)
+
+    def evict_idle(self, max_idle: float = PAGINATION_IDLE_SECONDS):
+        """Drop cursors unused for max_idle seconds, then unreferenced indexes over the cap"""
+        cutoff = time.monotonic() - max_idle
+        for cursor_id in [cursor_id for cursor_id, cursor in self.cursors.items() if cursor.last_used < cutoff]:
+            del self.cursors[cursor_id]
+
+        excess = len(self._indexes) - PAGINATION_MAX_INDEXES
+        if excess > 0:
+            in_use = {self._index_key(cursor) for cursor in self.cursors.values()}
+            for key in [key for key in self._indexes if key not in in_use][:excess]:
+                del self._indexes[key]
+
+    # Navigation
+
+    def set_order(self, cursor: PageCursor, sort_by: Optional[str] = None,
+                  filter: Optional[Tuple[str, str]] = None):
+        """Switch a cursor's ordering and filter, back to the first page"""
+        if sort_by in self.sources[cursor.source].sort_keys:
+            cursor.sort_by = sort_by
+        cursor.filter = filter
+        cursor.page = 0
+
+    def move(self, cursor: PageCursor, pages: int) -> bool:
+        """Step the cursor by whole pages; False if it was already at that end"""
+        target = min(max(0, cursor.page + pages), self.page_count(cursor) - 1)
+        moved = target != cursor.page
+        cursor.page = target
+        return moved
+
+    def count(self, cursor: PageCursor) -> int:
+        return len(self._get_index(cursor, self.sources[cursor.source].loader(cursor.user_id)))
+
+    def page_count(self, cursor: PageCursor) -> int:
+        return max(1, -(-self.count(cursor) // cursor.per_page))
+
+    def get_page(self, cursor: PageCursor) -> List[Tuple[int, Any]]:
+        """The (rank, item) pairs of the cursor's current page"""
+        items = self.sources[cursor.source].loader(cursor.user_id)
+        index = self._get_index(cursor, items)
+        cursor.page = min(cursor.page, max(0, (len(index) - 1) // cursor.per_page))
+        start = cursor.page * cursor.per_page
+        if isinstance(items, Mapping):
+            return [(start + offset + 1, (key, items[key]))
+                    for offset, key in enumerate(index[start:start + cursor.per_page])]
+        return [(start + offset + 1, items[position])
+                for offset, position in enumerate(index[start:start + cursor.per_page])]
+
+    # Sort indexes
+
+    @staticmethod
+    def _index_key(cursor: PageCursor) -> Tuple:
+        return cursor.source, cursor.user_id, cursor.sort_by, cursor.filter
+
+    def _get_index(self, cursor: PageCursor, items: Items) -> List[Any]:
+        """Positions (keys for mappings) of the cursor's items in display order, built once"""
+        key = self._index_key(cursor)
+        cached = self._indexes.get(key)
+        if cached is not None and cached[0] == len(items):
+            self._indexes.move_to_end(key)
+            return cached[1]
+
+        source = self.sources[cursor.source]
+        sort_key, descending = source.sort_keys[cursor.sort_by]
+        if isinstance(items, Mapping):
+            entries = list(items.items())
+            ids = [name for name, _ in entries]
+        else:
+            entries = items
+            ids = range(len(items))
+        matches = source.filters.get(cursor.filter[0]) if cursor.filter else None
+        order = [i for i in range(len(entries)) if not matches or matches(entries[i], cursor.filter[1])]
+        order.sort(key=lambda i: sort_key(entries[i]), reverse=descending)
+
+        index = [ids[i] for i in order]
+        self._indexes[key] = (len(items), index)
+        return index
+
+    def invalidate_user(self, user_id: str, user_data: Optional[Dict[str, Any]] = None):
+        """Profile save listener: drop a user's sort indexes (their open cursors rebuild on next page)"""
+        user_id = str(user_id)
+        for key in [key for key in self._indexes if key[1] == user_id]:
+            del self._indexes[key]
+
+# Global pagination engine instance
+pagination_engine = PaginationEngine()
+data_manager.add_save_listener(pagination_engine.invalidate_user)
@@ -0,0 +1,65 @@
+# Cached Character Power for KoKoroMichi Bot
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+from utils.helpers import calculate_waifu_power, get_rarity_tier
+from utils.advanced_combat import battle_engine
+
+logger = logging.getLogger(__name__)
+
+# Character fields the cached scores are derived from (besides relic and traits)
+STAT_FIELDS = ("hp", "atk", "def", "crit", "speed", "magic", "resistance", "level", "potential")
+
+# Distinct characters whose scores are kept in memory (least recently used dropped first)
+POWER_CACHE_SIZE = 4096
+
+_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+
+def _fingerprint(waifu: Dict[str, Any]) -> Tuple:
+    """Every input of the cached scores; records with equal fingerprints score the same"""
+    relic = waifu.get("relic") or waifu.get("equipped_relic")
+    if isinstance(relic, dict):
+        relic = (relic.get("name"), relic.get("potential"))
+    return (tuple(waifu.get(field) for field in STAT_FIELDS), relic, waifu.get("exclusive_relic"),
+            tuple(waifu.get("traits") or ()))
+
+
+def get_cached_stats(waifu: Dict[str, Any]) -> Dict[str, Any]:
+    """Power, rarity tier and effective battle stats of a character, computed once per stat change
+
+    Scores are held in memory, keyed by the fields they are derived from, so a changed
+    character misses the cache by itself and nothing derived is written to the record.
+    """
+    key = _fingerprint(waifu)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+
+    # Timed buffs expire on their own schedule, so only relics and traits are baked in
+    battle_stats = battle_engine.calculate_battle_stats(dict(waifu, temporary_buffs={}))
+    cached = _cache[key] = {
+        "power": calculate_waifu_power(waifu),
+        "rarity_tier": get_rarity_tier(waifu.get("potential", 0)),
+        "battle_stats": battle_stats
+    }
+    if len(_cache) > POWER_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return cached
+
+
+def get_waifu_power(waifu: Dict[str, Any]) -> int:
+    """Cached battle power of a character record"""
+    return get_cached_stats(waifu)["power"]
+
+
+def get_effective_stats(waifu: Dict[str, Any]) -> Dict[str, Any]:
+    """Cached battle stats after level, relic and trait bonuses (a copy, safe to modify)"""
+    return dict(get_cached_stats(waifu)["battle_stats"])
+
+
+def get_collection_power(user_data: Dict[str, Any]) -> int:
+    """Total power of every character a player owns"""
+    return sum(get_waifu_power(waifu) for waifu in user_data.get("claimed_waifus", []))
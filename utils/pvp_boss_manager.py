@@ -1,9 +1,18 @@
 import json
 import os
+import time
 import random
+import asyncio
+import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from core.config import BOSS_FLUSH_INTERVAL
+from core.data_manager import data_manager
+from utils.rating_system import rating_system
+
+logger = logging.getLogger(__name__)
+
 class PvPBossManager:
     def __init__(self):
         self.data_file = os.path.join(os.path.dirname(__file__), '../data/pvp_bosses.json')
@@ -13,6 +22,12 @@ class PvPBossManager:
         self.pvp_data = self.load_pvp_data()
         self.user_pvp = self.load_user_pvp_data()
         self.active_bosses = self.load_active_bosses()
+        
+        # Raid state lives in memory; hits only bump counters and the file is written on flush
+        # (every BOSS_FLUSH_INTERVAL by the boss cog, and at once on spawns, despawns and defeats)
+        self._boss_locks: Dict[str, asyncio.Lock] = {}
+        self._dirty = False
+        self._last_flush = time.monotonic()
     
     def load_pvp_data(self) -> Dict:
         """Load PvP and boss configuration"""
@@ -47,6 +62,25 @@ class PvPBossManager:
         """Save active boss data"""
         with open(self.active_bosses_file, 'w') as f:
             json.dump(self.active_bosses, f, indent=2)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+    
+    def get_boss_lock(self, boss_id: str) -> asyncio.Lock:
+        """Lock serializing raid waves on one boss; hold it from reading the boss until its results are applied"""
+        return self._boss_locks.setdefault(boss_id, asyncio.Lock())
+    
+    def flush_active_bosses(self, force: bool = False) -> bool:
+        """Write raid state if it changed and the flush interval passed (or force); True if written"""
+        if not self._dirty:
+            return False
+        if not force and time.monotonic() - self._last_flush < BOSS_FLUSH_INTERVAL:
+            return False
+        try:
+            self.save_active_bosses()
+            return True
+        except Exception as e:
+            logger.warning(f"Error flushing boss state: {e}")
+            return False
     
     def initiate_duel(self, challenger_id: str, opponent_id: str, stakes: int) -> Tuple[bool, str, Dict]:
         """Initiate a PvP duel between two players"""
@@ -126,7 +160,8 @@ class PvPBossManager:
                     spawned_bosses.append(boss)
         
         self.active_bosses["last_spawn_check"] = current_time.isoformat()
-        self.save_active_bosses()
+        self._dirty = True
+        self.flush_active_bosses(force=bool(spawned_bosses))
         
         return spawned_bosses
     
@@ -166,21 +201,39 @@ class PvPBossManager:
         """Get all currently active bosses"""
         current_time = datetime.now()
         active = []
+        despawned = False
         
         for boss_id, boss in self.active_bosses.get("spawned_bosses", {}).items():
             despawn_time = datetime.fromisoformat(boss["despawn_time"])
             
             if current_time < despawn_time and boss["status"] == "active":
                 active.append(boss)
-            elif current_time >= despawn_time:
+            elif current_time >= despawn_time and boss["status"] == "active":
                 # Boss expired
                 boss["status"] = "expired"
+                despawned = True
         
-        self.save_active_bosses()
+        if despawned:
+            self._dirty = True
+            self.flush_active_bosses(force=True)
         return active
     
-    def attack_boss(self, user_id: str, boss_id: str, damage_dealt: int) -> Tuple[bool, str, Dict]:
-        """Player attacks a boss"""
+    def find_active_boss(self, query: str) -> Optional[Dict]:
+        """Active boss by full ID, ID suffix or name"""
+        query = query.lower()
+        for boss in self.get_active_bosses():
+            boss_id = boss["boss_id"].lower()
+            if boss_id == query or boss_id.endswith(query) or query in boss["name"].lower():
+                return boss
+        return None
+    
+    def apply_raid_results(self, boss_id: str, breakdown: Dict[str, Dict], boss_hp: int,
+                           defeated: bool) -> Tuple[bool, str, Dict]:
+        """Apply a raid wave to a boss in one update (caller holds get_boss_lock)
+
+        The wave's final boss HP and defeat flag come from the simulation, which also plays the
+        boss's heals; the per-raider breakdown only feeds contributions and rewards.
+        """
         if boss_id not in self.active_bosses.get("spawned_bosses", {}):
             return False, "Boss not found!", {}
         
@@ -189,25 +242,33 @@ class PvPBossManager:
         if boss["status"] != "active":
             return False, "Boss is no longer active!", {}
         
-        # Add participant
-        if user_id not in boss["participants"]:
-            boss["participants"].append(user_id)
-        
-        # Track damage dealt
-        if user_id not in boss["damage_dealt"]:
-            boss["damage_dealt"][user_id] = 0
+        contributions = boss.setdefault("contributions", {})
+        total_damage = 0
+        for user_id, entry in breakdown.items():
+            if user_id not in boss["participants"]:
+                boss["participants"].append(user_id)
+            
+            # Track damage dealt
+            boss["damage_dealt"][user_id] = boss["damage_dealt"].get(user_id, 0) + entry["damage"]
+            total_damage += entry["damage"]
+            
+            totals = contributions.setdefault(user_id, {})
+            for key in ("damage", "hits", "crits", "damage_taken"):
+                totals[key] = totals.get(key, 0) + entry.get(key, 0)
+            totals["waves"] = totals.get("waves", 0) + 1
         
-        boss["damage_dealt"][user_id] += damage_dealt
-        boss["current_hp"] -= damage_dealt
+        boss["current_hp"] = max(0, int(boss_hp))
+        self._dirty = True
         
         result = {
-            "damage_dealt": damage_dealt,
-            "boss_hp_remaining": boss["current_hp"],
+            "total_damage": total_damage,
+            "boss_hp_remaining": max(0, boss["current_hp"]),
             "boss_max_hp": boss["max_hp"]
         }
         
         # Check if boss is defeated
-        if boss["current_hp"] <= 0:
+        if defeated:
+            boss["current_hp"] = 0
             boss["status"] = "defeated"
             boss["defeat_time"] = datetime.now().isoformat()
             
@@ -218,8 +279,8 @@ class PvPBossManager:
         else:
             result["boss_defeated"] = False
         
-        self.save_active_bosses()
-        return True, "Attack successful!", result
+        self.flush_active_bosses(force=result["boss_defeated"])
+        return True, "Raid damage applied!", result
     
     def distribute_boss_rewards(self, boss_id: str) -> Dict:
         """Distribute rewards to all participants"""
@@ -233,6 +294,8 @@ class PvPBossManager:
             contribution = damage / total_damage if total_damage > 0 else 1.0 / len(boss["participants"])
             
             user_rewards = {
+                "contribution": contribution,
+                "damage": damage,
                 "xp": int(rewards_template["base_xp"] * contribution),
                 "gold": int(rewards_template["base_gold"] * contribution),
                 "guaranteed_items": [],
@@ -253,36 +316,37 @@ class PvPBossManager:
             
             participant_rewards[user_id] = user_rewards
         
+        if not boss.get("rewarded"):
+            boss["rewarded"] = self.apply_boss_rewards(participant_rewards, boss["damage_dealt"])
         return participant_rewards
     
+    def apply_boss_rewards(self, participant_rewards: Dict[str, Dict], damage_dealt: Dict[str, int]) -> bool:
+        """Credit every participant's rewards in one batched profile save"""
+        updates = {}
+        for user_id, rewards in participant_rewards.items():
+            user_data = data_manager.get_user_data(user_id)
+            user_data["gold"] = user_data.get("gold", 0) + rewards["gold"]
+            user_data["xp"] = user_data.get("xp", 0) + rewards["xp"]
+            inventory = user_data.setdefault("inventory", {})
+            for item in rewards["guaranteed_items"] + rewards["rare_drops"]:
+                inventory[item] = inventory.get(item, 0) + 1
+            
+            boss_stats = user_data.setdefault("boss_battle_stats", {})
+            boss_stats["bosses_defeated"] = boss_stats.get("bosses_defeated", 0) + 1
+            boss_stats["total_damage"] = boss_stats.get("total_damage", 0) + damage_dealt.get(user_id, 0)
+            boss_stats["raids_joined"] = boss_stats.get("raids_joined", 0) + 1
+            updates[user_id] = user_data
+        return data_manager.save_many_user_data(updates)
+    
     def get_user_rating(self, user_id: str) -> int:
         """Get user's PvP rating"""
-        return self.user_pvp.get("user_ratings", {}).get(user_id, 1000)
+        return int(rating_system.get_rating(user_id)["rating"])
     
     def update_rating(self, winner_id: str, loser_id: str, stakes: int):
-        """Update PvP ratings after a duel"""
-        winner_rating = self.get_user_rating(winner_id)
-        loser_rating = self.get_user_rating(loser_id)
-        
-        # Calculate rating changes (simplified ELO)
-        expected_winner = 1 / (1 + 10**((loser_rating - winner_rating) / 400))
-        expected_loser = 1 - expected_winner
-        
-        k_factor = 32 + (stakes // 1000)  # Higher stakes = more rating change
-        
-        winner_change = int(k_factor * (1 - expected_winner))
-        loser_change = int(k_factor * (0 - expected_loser))
-        
-        # Update ratings
-        if "user_ratings" not in self.user_pvp:
-            self.user_pvp["user_ratings"] = {}
-        
-        self.user_pvp["user_ratings"][winner_id] = max(0, winner_rating + winner_change)
-        self.user_pvp["user_ratings"][loser_id] = max(0, loser_rating + loser_change)
-        
-        self.save_user_pvp_data()
-        
-        return winner_change, abs(loser_change)
+        """Record a duel for the next rating period; returns the expected (gain, loss)"""
+        winner_change, loser_change = rating_system.preview_match(winner_id, loser_id)
+        rating_system.record_match(winner_id, loser_id, 1.0, mode=f"duel:{stakes}")
+        return winner_change, loser_change
     
     def get_user_rank(self, user_id: str) -> Dict:
         """Get user's current PvP rank and rewards"""
@@ -304,5 +368,10 @@ class PvPBossManager:
             
             if current_time >= despawn_time and boss["status"] != "defeated":
                 del self.active_bosses["spawned_bosses"][boss_id]
+                self._boss_locks.pop(boss_id, None)
+                self._dirty = True
         
-        self.save_active_bosses()
\ No newline at end of file
+        self.flush_active_bosses(force=True)
+
+# Global PvP and boss manager instance
+pvp_boss_manager = PvPBossManager()
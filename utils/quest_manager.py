@@ -9,14 +9,14 @@ import random
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
-from .affinity_manager import AffinityManager
+from .affinity_manager import affinity_manager
 
 class QuestManager:
     def __init__(self, quest_file: str = "data/quests.json", users_file: str = "data/users.json"):
         self.quest_file = quest_file
         self.users_file = users_file
         self.data = self.load_quest_data()
-        self.affinity_manager = AffinityManager()
+        self.affinity_manager = affinity_manager
         self.active_quests = self.data.get("active_quests", {})
     
     def load_quest_data(self) -> dict:
@@ -0,0 +1,236 @@
+# Synchronized World Boss Raids for KoKoroMichi Bot
+import re
+import random
+import logging
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to a per-raider loop
+    np = None
+
+from core.config import (
+    CRIT_BASE_MULTIPLIER, RAID_MAX_ROUNDS, RAID_BOSS_DEFENSE_PER_LEVEL, RAID_BOSS_AOE_FACTOR
+)
+from utils.buff_snapshot import BuffSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Boss weakness/resistance tags that belong to another element's name
+_TAG_ELEMENTS = {"holy": "light", "necrotic": "dark", "crushing": "earth"}
+
+
+def get_boss_affinity(element: str, boss: Dict[str, Any]) -> float:
+    """Damage modifier of a raider's element against a boss's weaknesses and resistances"""
+    element = (element or "Neutral").lower()
+
+    def matches(tags):
+        return any(_TAG_ELEMENTS.get(tag.split("_")[0], tag.split("_")[0]) == element for tag in tags)
+
+    if matches(boss.get("weaknesses", [])):
+        return 1.25
+    if matches(boss.get("resistances", [])):
+        return 0.8
+    return 1.0
+
+
+def parse_boss_abilities(boss: Dict[str, Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """The area attack and self-heal a raid boss uses (other abilities don't act in raids)"""
+    aoe = heal = None
+    for ability in boss.get("special_abilities", []):
+        description = ability.get("description", "").lower()
+        if aoe is None and ("all enemies" in description or "area" in description):
+            percent = re.search(r"(\d+)% damage", description)
+            aoe = {
+                "name": ability.get("name", "Area Attack"),
+                "chance": ability.get("chance", 0.25),
+                "multiplier": int(percent.group(1)) / 100 if percent else float(ability.get("hits", 1.5)),
+                "cooldown": ability.get("cooldown_turns", 0)
+            }
+        elif heal is None:
+            heals = re.search(r"heals (\d+)% hp(?: every (\d+) turns)?", description)
+            if heals:
+                threshold = re.search(r"health_below_(\d+)", ability.get("trigger", ""))
+                heal = {
+                    "name": ability.get("name", "Regeneration"),
+                    "percent": int(heals.group(1)) / 100,
+                    "interval": int(heals.group(2) or 1),
+                    "threshold": int(threshold.group(1)) / 100 if threshold else 1.0
+                }
+    return {"aoe": aoe, "heal": heal}
+
+
+class RaidSimulation:
+    """One raid wave: each round every raider strikes the boss, then the boss hits every raider
+
+    Raider stats are read once from their buff snapshots into columns, so a round is a handful
+    of array operations however many raiders joined. The boss record is not modified; the
+    resulting breakdown is applied through the boss manager.
+    """
+
+    def __init__(self, boss: Dict[str, Any], snapshots: List[BuffSnapshot], rng=None):
+        self.boss = boss
+        self.user_ids = [str(snapshot.user_id) for snapshot in snapshots]
+        self.names = [snapshot.character.get("name", "Unknown") for snapshot in snapshots]
+        self.rng = rng or random
+        self.abilities = parse_boss_abilities(boss)
+
+        defense = boss.get("level", 1) * RAID_BOSS_DEFENSE_PER_LEVEL
+        self.boss_defense_factor = 1 - defense / (defense + 100)
+        self.boss_hp = boss["current_hp"]
+        self.boss_max_hp = boss["max_hp"]
+        self.boss_damage = boss.get("damage", 100) * RAID_BOSS_AOE_FACTOR
+
+        columns = {"atk": [], "crit": [], "hp": [], "defense_factor": [], "affinity": []}
+        for snapshot in snapshots:
+            stats = snapshot.stats
+            crit = stats.get("crit", 0.05)
+            columns["atk"].append(stats.get("atk", 50))
+            columns["crit"].append(min(crit / 100 if crit > 1 else crit, 0.95))
+            columns["hp"].append(stats.get("hp", 100))
+            columns["defense_factor"].append(1 - stats.get("def", 30) / (stats.get("def", 30) + 100))
+            # Battle stats carry no element; it is read from the character record
+            columns["affinity"].append(get_boss_affinity(snapshot.character.get("element"), boss))
+
+        count = len(snapshots)
+        if np is not None:
+            self.gen = self.rng.numpy_generator() if hasattr(self.rng, "numpy_generator") \
+                else np.random.default_rng(self.rng.getrandbits(64))
+            # Damage per hit before variance and crits
+            self.strike = (np.array(columns["atk"], dtype=float) * np.array(columns["affinity"])
+                           * self.boss_defense_factor)
+            self.crit = np.array(columns["crit"], dtype=float)
+            self.defense_factor = np.array(columns["defense_factor"], dtype=float)
+            self.hp = np.array(columns["hp"], dtype=float)
+            self.damage = np.zeros(count, dtype=np.int64)
+            self.crits = np.zeros(count, dtype=np.int64)
+            self.hits = np.zeros(count, dtype=np.int64)
+            self.damage_taken = np.zeros(count, dtype=np.int64)
+            self.knocked_out = np.zeros(count, dtype=np.int64)  # Round a raider fell in (0 = standing)
+        else:
+            self.gen = None
+            self.strike = [atk * affinity * self.boss_defense_factor
+                           for atk, affinity in zip(columns["atk"], columns["affinity"])]
+            self.crit = columns["crit"]
+            self.defense_factor = columns["defense_factor"]
+            self.hp = [float(hp) for hp in columns["hp"]]
+            self.damage = [0] * count
+            self.crits = [0] * count
+            self.hits = [0] * count
+            self.damage_taken = [0] * count
+            self.knocked_out = [0] * count
+
+    def _random(self) -> float:
+        return self.gen.random() if self.gen is not None else self.rng.random()
+
+    def raiders_standing(self) -> int:
+        if self.gen is not None:
+            return int(np.count_nonzero(self.hp > 0))
+        return sum(1 for hp in self.hp if hp > 0)
+
+    # Rounds
+
+    def _raiders_strike(self) -> int:
+        """Every standing raider attacks once; returns the total damage"""
+        if self.gen is not None:
+            standing = np.flatnonzero(self.hp > 0)
+            is_crit = self.gen.random(len(standing)) < self.crit[standing]
+            hits = self.strike[standing] * self.gen.uniform(0.85, 1.15, len(standing))
+            hits = np.maximum(1, (hits * np.where(is_crit, CRIT_BASE_MULTIPLIER, 1.0)).astype(np.int64))
+            self.damage[standing] += hits
+            self.crits[standing] += is_crit
+            self.hits[standing] += 1
+            return int(hits.sum())
+
+        total = 0
+        for index, hp in enumerate(self.hp):
+            if hp <= 0:
+                continue
+            hit = self.strike[index] * self.rng.uniform(0.85, 1.15)
+            if self.rng.random() < self.crit[index]:
+                hit *= CRIT_BASE_MULTIPLIER
+                self.crits[index] += 1
+            hit = max(1, int(hit))
+            self.damage[index] += hit
+            self.hits[index] += 1
+            total += hit
+        return total
+
+    def _boss_strikes(self, round_number: int, multiplier: float) -> int:
+        """The boss hits every standing raider; returns how many were knocked out"""
+        base = self.boss_damage * multiplier
+        if self.gen is not None:
+            standing = np.flatnonzero(self.hp > 0)
+            taken = np.maximum(1, (base * self.defense_factor[standing]
+                                   * self.gen.uniform(0.85, 1.15, len(standing))).astype(np.int64))
+            self.hp[standing] -= taken
+            self.damage_taken[standing] += taken
+            fallen = standing[self.hp[standing] <= 0]
+            self.knocked_out[fallen] = round_number
+            return len(fallen)
+
+        fallen = 0
+        for index, hp in enumerate(self.hp):
+            if hp <= 0:
+                continue
+            taken = max(1, int(base * self.defense_factor[index] * self.rng.uniform(0.85, 1.15)))
+            self.hp[index] -= taken
+            self.damage_taken[index] += taken
+            if self.hp[index] <= 0:
+                self.knocked_out[index] = round_number
+                fallen += 1
+        return fallen
+
+    def run(self, max_rounds: int = RAID_MAX_ROUNDS) -> Dict[str, Any]:
+        """Play rounds until the boss falls, every raider is down or max_rounds pass"""
+        aoe, heal = self.abilities["aoe"], self.abilities["heal"]
+        last_aoe = last_heal = -10 ** 6
+        rounds = []
+
+        for round_number in range(1, max_rounds + 1):
+            if self.boss_hp <= 0 or not self.raiders_standing():
+                break
+            dealt = self._raiders_strike()
+            self.boss_hp = max(0, self.boss_hp - dealt)
+            round_info = {"round": round_number, "damage": dealt, "abilities": [], "knocked_out": 0}
+            rounds.append(round_info)
+            if self.boss_hp <= 0:
+                break
+
+            if (heal and self.boss_hp < self.boss_max_hp * heal["threshold"]
+                    and round_number - last_heal >= heal["interval"]):
+                self.boss_hp = min(self.boss_max_hp, self.boss_hp + int(self.boss_max_hp * heal["percent"]))
+                last_heal = round_number
+                round_info["abilities"].append(heal["name"])
+
+            multiplier = 1.0
+            if aoe and round_number - last_aoe > aoe["cooldown"] and self._random() < aoe["chance"]:
+                multiplier = aoe["multiplier"]
+                last_aoe = round_number
+                round_info["abilities"].append(aoe["name"])
+            round_info["knocked_out"] = self._boss_strikes(round_number, multiplier)
+            round_info["boss_hp"] = self.boss_hp
+
+        if rounds:
+            rounds[-1]["boss_hp"] = self.boss_hp
+        return {
+            "rounds": rounds,
+            "boss_hp": self.boss_hp,
+            "defeated": self.boss_hp <= 0,
+            "seed": getattr(self.rng, "stream_seed", None),
+            "breakdown": self.get_breakdown()
+        }
+
+    def get_breakdown(self) -> Dict[str, Dict[str, Any]]:
+        """Per-raider contribution: damage, hits, crits, damage taken and the round they fell"""
+        return {
+            user_id: {
+                "character": self.names[index],
+                "damage": int(self.damage[index]),
+                "hits": int(self.hits[index]),
+                "crits": int(self.crits[index]),
+                "damage_taken": int(self.damage_taken[index]),
+                "knocked_out": int(self.knocked_out[index]) or None
+            }
+            for index, user_id in enumerate(self.user_ids)
+        }
@@ -1,20 +1,17 @@
 # utils/random.py
 import os
 import json
-import random
 from utils.fileManager import load_users, update_user_profile
 from utils.history import add_summon
 import discord
 from utils.template import create_waifu_template
+from utils.summon_engine import summon_engine
+from utils.rng_service import rng_service, RNG_SUMMON
+from utils.skill_compiler import skill_compiler, apply_duplicate, get_duplicate_increment
 
 from core.config import CHARACTERS_DIR
 CHARACTERS_FOLDER = str(CHARACTERS_DIR)
 
-PITY_LIMIT = 20
-SSR_CHANCE = 0.03
-SR_CHANCE = 0.12
-R_CHANCE = 0.35
-N_CHANCE = 0.50
 DUPLICATE_XP = 50
 DUPLICATE_ATK = 10
 DUPLICATE_HP = 100
@@ -94,32 +91,15 @@ def load_all_characters():
 
 
 def pick_character():
-    characters = load_all_characters()
-    roll = random.random()
-    if roll < 0.005: rarity = "Mythic 🌈✨✨"
-    elif roll < 0.015: rarity = "LR ⚡"
-    elif roll < 0.03: rarity = "UR 🌟"
-    elif roll < SSR_CHANCE + 0.03: rarity = "SSR 🌈✨"
-    elif roll < SSR_CHANCE + SR_CHANCE + 0.03: rarity = "SR 🔥"
-    elif roll < SSR_CHANCE + SR_CHANCE + R_CHANCE + 0.03: rarity = "R 🔧"
-    else: rarity = "N 🌿"
-    pool = [c for c in characters if get_rarity(c["potential"]) == rarity]
-    if not pool: pool = characters
-    return random.choice(pool)
+    """Roll a character from the standard banner without pity"""
+    rarity = summon_engine.roll_rarity({"since_sr": 0, "since_ssr": 0})
+    return summon_engine.pick_character(rarity)
 
 
 def format_skills(waifu):
-    """Combine active + passive skills and add type field"""
-    skills = []
-    for sk in waifu.get("active_skills", []):
-        sk_copy = sk.copy()
-        sk_copy["type"] = "active"
-        skills.append(sk_copy)
-    for sk in waifu.get("passive_skills", []):
-        sk_copy = sk.copy()
-        sk_copy["type"] = "passive"
-        skills.append(sk_copy)
-    return skills
+    """Structured active + passive skills compiled from the catalog"""
+    return (skill_compiler.get_character_skills(waifu.get("name", ""))
+            or skill_compiler.compile_character(waifu))
 
 
 def summon_waifu(user_id: str, username: str) -> dict:
@@ -140,24 +120,11 @@ def summon_waifu(user_id: str, username: str) -> dict:
 
     if "waifu_stats" not in profile: profile["waifu_stats"] = {}
 
-    characters = load_all_characters()
-    force_ssr = profile.get("pity_counter", 0) >= PITY_LIMIT - 1
-
-    if force_ssr:
-        pool = [
-            c for c in characters if get_rarity(c["potential"]) in
-            ["SSR 🌈✨", "UR 🌟", "LR ⚡", "Mythic 🌈✨✨"]
-        ]
-        waifu = random.choice(pool) if pool else random.choice(characters)
-        profile["pity_counter"] = 0
-    else:
-        waifu = pick_character()
-        if get_rarity(waifu["potential"]) in [
-                "SSR 🌈✨", "UR 🌟", "LR ⚡", "Mythic 🌈✨✨"
-        ]:
-            profile["pity_counter"] = 0
-        else:
-            profile["pity_counter"] = profile.get("pity_counter", 0) + 1
+    # Shared pity state with the !summon command, seeded stream for replays
+    rng = rng_service.stream(user_id, RNG_SUMMON)
+    pity_before = dict(summon_engine.get_pity_state(profile))
+    _, waifu = summon_engine.roll(profile, rng=rng)
+    profile["pity_counter"] = profile["summon_stats"]["pity"]["since_ssr"]
 
     waifu_name = waifu["name"]
 
@@ -197,37 +164,10 @@ def summon_waifu(user_id: str, username: str) -> dict:
         stats["crit"] = min(stats.get("crit", 5) + DUPLICATE_CRIT, 20)
         stats["exp"] += DUPLICATE_XP
 
-        # ----------------- Skill increment logic -----------------
-        for skill in stats["skills"]:
-            # Increment numerical values in effect string if any
-            if "damage" in skill:
-                try:
-                    if "%" in skill["damage"]:
-                        value = float(skill["damage"].replace("% P.DMG",
-                                                              "").strip())
-                        increment = 0.05 + (extract_potential_value(
-                            waifu["potential"]) / 10000)
-                        value += increment
-                        skill["damage"] = f"{round(value, 2)}% P.DMG"
-                    else:
-                        value = float(skill["damage"])
-                        increment = 0.05 + (extract_potential_value(
-                            waifu["potential"]) / 10000)
-                        skill["damage"] = str(round(value + increment, 2))
-                except (ValueError, TypeError):
-                    pass
-            if "effect" in skill:
-                import re
-
-                def increase_percent(match):
-                    val = float(match.group(1))
-                    increment = 0.05 + (
-                        extract_potential_value(waifu["potential"]) / 10000)
-                    return f"{round(val + increment,2)}%"
-
-                skill["effect"] = re.sub(r'(\d+(\.\d+)?)%', increase_percent,
-                                         skill["effect"])
-        # --------------------------------------------------------
+        # Duplicate skill scaling: stack count arithmetic, text is rendered on display
+        stats["skills"] = apply_duplicate(
+            stats.get("skills", []),
+            increment=get_duplicate_increment(waifu["potential"]))
 
     # Increment summon count
     profile["summon_count"] += 1
@@ -242,7 +182,9 @@ def summon_waifu(user_id: str, username: str) -> dict:
     image_url = f"attachment://{image_file}"
 
     # Save history & profile
-    add_summon(user_id, waifu_name, get_rarity(waifu["potential"]))
+    add_summon(user_id, waifu_name, get_rarity(waifu["potential"]),
+               seed=rng.stream_seed, banner=summon_engine.get_banner().banner_id,
+               pity=pity_before)
     update_user_profile(user_id, profile)
 
     result_type = "duplicate" if already_owned else "new"
@@ -0,0 +1,327 @@
+# PvP Rating System for KoKoroMichi Bot
+import os
+import json
+import math
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+
+try:
+    import numpy as np
+except ImportError:  # Ratings are updated one player at a time without numpy
+    np = None
+
+from core.config import (
+    DATA_DIR, RATING_DEFAULT, RATING_DEFAULT_RD, RATING_DEFAULT_VOLATILITY, RATING_TAU,
+    RATING_PERIOD_HOURS, RATING_HISTORY_LIMIT
+)
+from utils.leaderboard import leaderboard_service
+
+logger = logging.getLogger(__name__)
+
+# Glicko-2 scale factor between displayed ratings and the internal scale
+GLICKO_SCALE = 173.7178
+
+# Convergence tolerance of the volatility iteration
+VOLATILITY_EPSILON = 0.000001
+MAX_ITERATIONS = 100
+
+
+# Glicko-2 math (internal scale: mu = (rating - RATING_DEFAULT) / GLICKO_SCALE, phi = rd / GLICKO_SCALE)
+
+def _g(phi):
+    return 1 / (1 + 3 * phi ** 2 / math.pi ** 2) ** 0.5
+
+
+def glicko2_update(mu: float, phi: float, sigma: float, games: List[Tuple[float, float, float]],
+                   tau: float = RATING_TAU) -> Tuple[float, float, float]:
+    """One player's rating period: games are (opponent mu, opponent phi, score); returns (mu, phi, sigma)"""
+    if not games:
+        return mu, min((phi ** 2 + sigma ** 2) ** 0.5, RATING_DEFAULT_RD / GLICKO_SCALE), sigma
+
+    inverse_v = 0.0
+    improvement = 0.0
+    for opponent_mu, opponent_phi, score in games:
+        g = _g(opponent_phi)
+        expected = 1 / (1 + math.exp(-g * (mu - opponent_mu)))
+        inverse_v += g * g * expected * (1 - expected)
+        improvement += g * (score - expected)
+    v = 1 / inverse_v
+    delta = v * improvement
+
+    # Illinois iteration for the new volatility
+    a = math.log(sigma ** 2)
+
+    def f(x):
+        ex = math.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    low = a
+    if delta ** 2 > phi ** 2 + v:
+        high = math.log(delta ** 2 - phi ** 2 - v)
+    else:
+        k = 1
+        while f(a - k * tau) < 0 and k < MAX_ITERATIONS:
+            k += 1
+        high = a - k * tau
+    f_low, f_high = f(low), f(high)
+    for _ in range(MAX_ITERATIONS):
+        if abs(high - low) <= VOLATILITY_EPSILON:
+            break
+        new = low + (low - high) * f_low / (f_high - f_low)
+        f_new = f(new)
+        if f_new * f_high <= 0:
+            low, f_low = high, f_high
+        else:
+            f_low /= 2
+        high, f_high = new, f_new
+    new_sigma = math.exp(low / 2)
+
+    phi_star = (phi ** 2 + new_sigma ** 2) ** 0.5
+    new_phi = 1 / (1 / phi_star ** 2 + 1 / v) ** 0.5
+    return mu + new_phi ** 2 * improvement, new_phi, new_sigma
+
+
+def glicko2_update_batch(mu, phi, sigma, player_index, opponent_index, scores, tau: float = RATING_TAU):
+    """Vectorized rating period over numpy arrays
+
+    Each game row appears once per side (player_index, opponent_index, score). Players without
+    games only have their deviation decayed. Returns new (mu, phi, sigma) arrays.
+    """
+    count = len(mu)
+    g = _g(phi[opponent_index])
+    expected = 1 / (1 + np.exp(-g * (mu[player_index] - mu[opponent_index])))
+    inverse_v = np.bincount(player_index, g * g * expected * (1 - expected), minlength=count)
+    improvement = np.bincount(player_index, g * (scores - expected), minlength=count)
+
+    new_mu = mu.copy()
+    new_phi = np.minimum(np.sqrt(phi ** 2 + sigma ** 2), RATING_DEFAULT_RD / GLICKO_SCALE)
+    new_sigma = sigma.copy()
+    active = inverse_v > 0
+    if not active.any():
+        return new_mu, new_phi, new_sigma
+
+    a_phi, a_sigma, a_improvement = phi[active], sigma[active], improvement[active]
+    v = 1 / inverse_v[active]
+    delta = v * a_improvement
+    a = np.log(a_sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta ** 2 - a_phi ** 2 - v - ex) / (2 * (a_phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    # Illinois iteration, all players at once; converged rows stop moving
+    low = a.copy()
+    big_delta = delta ** 2 > a_phi ** 2 + v
+    high = np.where(big_delta, np.log(np.where(big_delta, delta ** 2 - a_phi ** 2 - v, 1.0)), a - tau)
+    k = np.ones_like(a)
+    for _ in range(MAX_ITERATIONS):
+        searching = ~big_delta & (f(a - k * tau) < 0)
+        if not searching.any():
+            break
+        k[searching] += 1
+    high = np.where(big_delta, high, a - k * tau)
+    f_low, f_high = f(low), f(high)
+    for _ in range(MAX_ITERATIONS):
+        moving = np.abs(high - low) > VOLATILITY_EPSILON
+        if not moving.any():
+            break
+        new = low + (low - high) * f_low / np.where(moving, f_high - f_low, 1.0)
+        f_new = f(new)
+        swap = moving & (f_new * f_high <= 0)
+        halve = moving & ~swap
+        low = np.where(swap, high, low)
+        f_low = np.where(swap, f_high, np.where(halve, f_low / 2, f_low))
+        high = np.where(moving, new, high)
+        f_high = np.where(moving, f_new, f_high)
+    a_new_sigma = np.exp(low / 2)
+
+    phi_star = np.sqrt(a_phi ** 2 + a_new_sigma ** 2)
+    a_new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+    new_mu[active] = mu[active] + a_new_phi ** 2 * a_improvement
+    new_phi[active] = a_new_phi
+    new_sigma[active] = a_new_sigma
+    return new_mu, new_phi, new_sigma
+
+
+class RatingSystem:
+    """Glicko-2 PvP ratings fed by an append-only match log and updated once per rating period"""
+
+    def __init__(self, ratings_file: str = str(DATA_DIR / "ratings.json"),
+                 match_log_file: str = str(DATA_DIR / "rating_matches.jsonl"),
+                 period_hours: float = RATING_PERIOD_HOURS):
+        self.ratings_file = ratings_file
+        self.match_log_file = match_log_file
+        self.period_length = timedelta(hours=period_hours)
+        self.state = self.load()
+        self._period_listeners = []
+
+    # Persistence
+
+    def load(self) -> Dict[str, Any]:
+        """Ratings and log position ({"period", "period_start", "log_offset", "players"})"""
+        try:
+            with open(self.ratings_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error loading ratings: {e}")
+        return {"period": 0, "period_start": datetime.now().isoformat(), "log_offset": 0, "players": {}}
+
+    def save(self):
+        try:
+            with open(self.ratings_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, separators=(",", ":"))
+        except Exception as e:
+            logger.warning(f"Error saving ratings: {e}")
+
+    def add_period_listener(self, listener):
+        """Callback run with {user_id: rating} for every player after each rating period"""
+        self._period_listeners.append(listener)
+
+    # Matches
+
+    def record_match(self, player1_id: str, player2_id: str, score: float, mode: str = "pvp"):
+        """Append a result (score is player 1's: 1 win, 0.5 draw, 0 loss); ratings move at period end"""
+        self.record_matches([(player1_id, player2_id, score)], mode)
+
+    def record_matches(self, results: List[Tuple[str, str, float]], mode: str = "pvp"):
+        """Append several (player 1, player 2, player 1 score) results in one write"""
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        lines = "".join(json.dumps({"ts": timestamp, "p1": str(player1_id), "p2": str(player2_id),
+                                    "score": score, "mode": mode}, separators=(",", ":")) + "\n"
+                        for player1_id, player2_id, score in results)
+        try:
+            with open(self.match_log_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except Exception as e:
+            logger.warning(f"Error recording matches: {e}")
+        self.maybe_process_periods()
+
+    def read_pending_matches(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Log records after the processed offset, and the offset after them"""
+        offset = self.state.get("log_offset", 0)
+        if not os.path.exists(self.match_log_file):
+            return [], offset
+        matches = []
+        with open(self.match_log_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partly written record; picked up next period
+                offset += len(line)
+                try:
+                    matches.append(json.loads(line))
+                except ValueError as e:
+                    logger.warning(f"Skipping bad match record: {e}")
+        return matches, offset
+
+    # Rating periods
+
+    def maybe_process_periods(self, now: Optional[datetime] = None) -> int:
+        """Close every rating period that has ended; returns how many were processed"""
+        now = now or datetime.now()
+        period_start = datetime.fromisoformat(self.state["period_start"])
+        elapsed = int((now - period_start) / self.period_length)
+        if elapsed <= 0:
+            return 0
+        # Pending matches belong to the first closed period; later ones only decay deviations
+        self.process_period(period_start + self.period_length)
+        for index in range(1, elapsed):
+            self.process_period(period_start + self.period_length * (index + 1), matches=[])
+        return elapsed
+
+    def process_period(self, period_end: Optional[datetime] = None,
+                       matches: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Apply one rating period to every player in a single batch pass"""
+        offset = self.state.get("log_offset", 0)
+        if matches is None:
+            matches, offset = self.read_pending_matches()
+
+        players = self.state["players"]
+        for match in matches:
+            for user_id in (match["p1"], match["p2"]):
+                if user_id not in players:
+                    players[user_id] = {"rating": RATING_DEFAULT, "rd": RATING_DEFAULT_RD,
+                                        "volatility": RATING_DEFAULT_VOLATILITY, "matches": 0, "history": []}
+
+        user_ids = list(players)
+        positions = {user_id: index for index, user_id in enumerate(user_ids)}
+        mu = [(players[user_id]["rating"] - RATING_DEFAULT) / GLICKO_SCALE for user_id in user_ids]
+        phi = [players[user_id]["rd"] / GLICKO_SCALE for user_id in user_ids]
+        sigma = [players[user_id]["volatility"] for user_id in user_ids]
+        player_index, opponent_index, scores = [], [], []
+        for match in matches:
+            first, second = positions[match["p1"]], positions[match["p2"]]
+            player_index += [first, second]
+            opponent_index += [second, first]
+            scores += [match["score"], 1 - match["score"]]
+
+        if np is not None and user_ids:
+            new_mu, new_phi, new_sigma = glicko2_update_batch(
+                np.array(mu), np.array(phi), np.array(sigma), np.array(player_index, dtype=np.int64),
+                np.array(opponent_index, dtype=np.int64), np.array(scores, dtype=float))
+            new_mu, new_phi, new_sigma = new_mu.tolist(), new_phi.tolist(), new_sigma.tolist()
+        else:
+            games = [[] for _ in user_ids]
+            for player, opponent, score in zip(player_index, opponent_index, scores):
+                games[player].append((mu[opponent], phi[opponent], score))
+            results = [glicko2_update(mu[index], phi[index], sigma[index], games[index])
+                       for index in range(len(user_ids))]
+            new_mu, new_phi, new_sigma = ([result[part] for result in results] for part in range(3))
+
+        period = self.state["period"] + 1
+        games_played = [0] * len(user_ids)
+        for player in player_index:
+            games_played[player] += 1
+        for index, user_id in enumerate(user_ids):
+            player = players[user_id]
+            player["rating"] = round(new_mu[index] * GLICKO_SCALE + RATING_DEFAULT, 2)
+            player["rd"] = round(new_phi[index] * GLICKO_SCALE, 2)
+            player["volatility"] = round(new_sigma[index], 6)
+            if games_played[index]:
+                player["matches"] += games_played[index]
+                player["history"].append([period, round(player["rating"]), round(player["rd"])])
+                player["history"] = player["history"][-RATING_HISTORY_LIMIT:]
+        active = sum(1 for count in games_played if count)
+
+        self.state["period"] = period
+        self.state["period_start"] = (period_end or datetime.now()).isoformat()
+        self.state["log_offset"] = offset
+        self.save()
+        logger.info(f"Rating period {period}: {len(matches)} matches, {active} active of {len(user_ids)} players")
+
+        ratings = {user_id: players[user_id]["rating"] for user_id in user_ids}
+        for listener in self._period_listeners:
+            try:
+                listener(ratings)
+            except Exception as e:
+                logger.warning(f"Rating period listener failed: {e}")
+        return {"period": period, "matches": len(matches), "active": active, "players": len(user_ids)}
+
+    # Queries
+
+    def get_rating(self, user_id: str) -> Dict[str, Any]:
+        """Current rating, deviation and pending match count of a player"""
+        player = self.state["players"].get(str(user_id))
+        if player is None:
+            return {"rating": RATING_DEFAULT, "rd": RATING_DEFAULT_RD, "volatility": RATING_DEFAULT_VOLATILITY,
+                    "matches": 0, "history": [], "provisional": True}
+        return dict(player, provisional=player["rd"] > 110)
+
+    def preview_match(self, winner_id: str, loser_id: str) -> Tuple[int, int]:
+        """Approximate (winner gain, loser loss) if this were the only game of the period"""
+        winner, loser = self.get_rating(winner_id), self.get_rating(loser_id)
+        winner_state = ((winner["rating"] - RATING_DEFAULT) / GLICKO_SCALE, winner["rd"] / GLICKO_SCALE)
+        loser_state = ((loser["rating"] - RATING_DEFAULT) / GLICKO_SCALE, loser["rd"] / GLICKO_SCALE)
+        winner_mu = glicko2_update(*winner_state, winner["volatility"], [loser_state + (1.0,)])[0]
+        loser_mu = glicko2_update(*loser_state, loser["volatility"], [winner_state + (0.0,)])[0]
+        return (round((winner_mu - winner_state[0]) * GLICKO_SCALE),
+                round((loser_state[0] - loser_mu) * GLICKO_SCALE))
+
+# Global rating system instance
+rating_system = RatingSystem()
+rating_system.add_period_listener(lambda ratings: leaderboard_service.set_external_scores("pvp", ratings))
+leaderboard_service.add_external_source(
+    "pvp", lambda: {user_id: player["rating"] for user_id, player in rating_system.state["players"].items()})
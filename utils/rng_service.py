@@ -0,0 +1,90 @@
+# Seeded RNG Streams for KoKoroMichi Bot
+import os
+import random
+import hashlib
+import secrets
+import logging
+import threading
+from typing import Dict, Tuple, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # NumPy generators are optional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Subsystem names used when issuing streams
+RNG_SUMMON = "summon"
+RNG_BATTLE = "battle"
+RNG_TOURNAMENT = "tournament"
+RNG_RAID = "raid"
+
+
+class RNGStream(random.Random):
+    """Independent random stream for one user and subsystem; the seed is kept for audit logs"""
+
+    def __init__(self, stream_seed: Optional[int] = None, user_id: Optional[str] = None,
+                 subsystem: Optional[str] = None):
+        if stream_seed is None:
+            stream_seed = secrets.randbits(64)
+        self.stream_seed = stream_seed
+        self.user_id = user_id
+        self.subsystem = subsystem
+        self._generator = None
+        super().__init__(stream_seed)
+
+    def __reduce__(self):
+        # Keep the seed and owner when streams are sent to worker processes
+        return (self.__class__, (self.stream_seed, self.user_id, self.subsystem), self.getstate())
+
+    def numpy_generator(self) -> Any:
+        """PCG64 NumPy generator derived from this stream's seed (None without NumPy)"""
+        if np is None:
+            return None
+        if self._generator is None:
+            self._generator = np.random.Generator(np.random.PCG64(self.stream_seed))
+        return self._generator
+
+
+class RNGService:
+    """Issues seedable per-user, per-subsystem RNG streams so outcomes can be replayed"""
+
+    def __init__(self):
+        self.master_seed = self._load_master_seed()
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _load_master_seed(self) -> int:
+        """Read a fixed master seed from KOKORO_RNG_SEED, or pick a random one for this process"""
+        env_seed = os.getenv("KOKORO_RNG_SEED")
+        if env_seed:
+            try:
+                return int(env_seed)
+            except ValueError:
+                logger.warning(f"Invalid KOKORO_RNG_SEED '{env_seed}', using a random master seed")
+        return secrets.randbits(64)
+
+    def derive_seed(self, user_id: str, subsystem: str, counter: int) -> int:
+        """Derive a 64-bit stream seed from the master seed, owner, subsystem and stream counter"""
+        material = f"{self.master_seed}:{user_id}:{subsystem}:{counter}".encode("utf-8")
+        return int.from_bytes(hashlib.sha256(material).digest()[:8], "big")
+
+    def stream(self, user_id: Any, subsystem: str, seed: Optional[int] = None) -> RNGStream:
+        """Issue a fresh stream for a user and subsystem (pass a logged seed to replay an outcome)"""
+        user_id = str(user_id)
+        if seed is None:
+            with self._lock:
+                counter = self._counters.get((user_id, subsystem), 0)
+                self._counters[(user_id, subsystem)] = counter + 1
+            seed = self.derive_seed(user_id, subsystem, counter)
+        return RNGStream(seed, user_id, subsystem)
+
+    @staticmethod
+    def get_seed(rng: Any) -> Optional[int]:
+        """Seed of a stream for logging (None for the global random module)"""
+        return getattr(rng, "stream_seed", None)
+
+
+# Global RNG service instance
+rng_service = RNGService()
@@ -0,0 +1,179 @@
+# Simulation Executor for KoKoroMichi Bot
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Any, Callable
+
+from core.config import SIM_POOL_WORKERS, SIM_QUEUE_LIMIT, SIM_JOB_TIMEOUT, SIM_INLINE_MAX_COST
+from utils.advanced_combat import battle_engine
+from utils.rng_service import RNGStream
+from utils.team_battle import team_battle_engine
+from utils.win_estimator import estimate_win_probability, DEFAULT_ESTIMATE_BATTLES
+
+logger = logging.getLogger(__name__)
+
+
+# Jobs (module-level so worker processes can unpickle them; payloads are plain dicts and lists)
+
+def run_duels(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Headless 1v1 battles: {"battles": [(waifu1, waifu2, seed), ...], "max_rounds": n}"""
+    return [battle_engine.simulate_battle(waifu1, waifu2, payload.get("max_rounds"), rng=RNGStream(seed),
+                                          headless=True)
+            for waifu1, waifu2, seed in payload["battles"]]
+
+
+def run_team_battles(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Team battles: {"battles": [(team1, team2, seed), ...], "max_rounds": n, "headless": bool}"""
+    return [team_battle_engine.simulate_battle(team1, team2, payload.get("max_rounds"), rng=RNGStream(seed),
+                                               headless=payload.get("headless", True))
+            for team1, team2, seed in payload["battles"]]
+
+
+def run_win_estimate(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Win probability: {"waifu1", "waifu2", "seed", "options": estimate_win_probability kwargs}"""
+    options = payload.get("options", {})
+    return estimate_win_probability(payload["waifu1"], payload["waifu2"], rng=RNGStream(payload["seed"]),
+                                    **options)
+
+
+def _timed_job(job: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]) -> Tuple[Any, float]:
+    """Run a job and report the time the worker spent on it"""
+    start = time.perf_counter()
+    result = job(payload)
+    return result, time.perf_counter() - start
+
+
+# Job name -> (function, cost estimate); cost is roughly "unit-battles" of work
+SIMULATION_JOBS: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Callable[[Dict[str, Any]], int]]] = {
+    "duels": (run_duels, lambda payload: 2 * len(payload["battles"])),
+    "team_battles": (run_team_battles,
+                     lambda payload: sum(len(team1) + len(team2) for team1, team2, _ in payload["battles"])),
+    # Estimates are vectorized, so thousands of battles cost about as much as a few scalar ones
+    "win_estimate": (run_win_estimate,
+                     lambda payload: payload.get("options", {}).get("battles", DEFAULT_ESTIMATE_BATTLES) // 100),
+}
+
+
+class SimulationExecutor:
+    """Runs CPU-heavy simulations in a process pool so the event loop stays responsive
+
+    Small jobs run in-process; larger ones are shipped to worker processes with a bounded
+    number in flight and a per-job timeout.
+    """
+
+    def __init__(self, max_workers: int = SIM_POOL_WORKERS, queue_limit: int = SIM_QUEUE_LIMIT,
+                 timeout: float = SIM_JOB_TIMEOUT, inline_max_cost: int = SIM_INLINE_MAX_COST):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.inline_max_cost = inline_max_cost
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_started = 0.0
+        self._in_flight = 0
+        self.metrics = {
+            "inline": 0, "submitted": 0, "completed": 0, "timeouts": 0, "rejected": 0, "failures": 0,
+            "inline_seconds": 0.0, "worker_seconds": 0.0, "max_in_flight": 0
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._pool_started = time.monotonic()
+            logger.info(f"Simulation pool started with {self.max_workers} workers")
+        return self._pool
+
+    def _reset_pool(self):
+        """Drop a broken pool; the next job starts a fresh one"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def get_cost(self, kind: str, payload: Dict[str, Any]) -> int:
+        """Estimated cost of a job (compared with inline_max_cost)"""
+        return SIMULATION_JOBS[kind][1](payload)
+
+    def run_inline(self, kind: str, payload: Dict[str, Any]) -> Any:
+        """Run a job in this process (blocks the caller)"""
+        result, seconds = _timed_job(SIMULATION_JOBS[kind][0], payload)
+        self.metrics["inline"] += 1
+        self.metrics["inline_seconds"] += seconds
+        return result
+
+    async def run(self, kind: str, payload: Dict[str, Any], timeout: Optional[float] = None,
+                  allow_inline: bool = True) -> Any:
+        """Run a simulation job, in the pool unless it is small (or allow_inline is False)
+
+        Raises asyncio.QueueFull when too many jobs are in flight and asyncio.TimeoutError
+        when a job exceeds its timeout.
+        """
+        job = SIMULATION_JOBS[kind][0]
+        if allow_inline and self.get_cost(kind, payload) <= self.inline_max_cost:
+            return self.run_inline(kind, payload)
+
+        if self._in_flight >= self.max_workers + self.queue_limit:
+            self.metrics["rejected"] += 1
+            raise asyncio.QueueFull(f"Simulation queue full ({self._in_flight} jobs in flight)")
+
+        self._in_flight += 1
+        self.metrics["submitted"] += 1
+        self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self._in_flight)
+        future = None
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_pool(), _timed_job, job, payload)
+            result, seconds = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+            self.metrics["completed"] += 1
+            self.metrics["worker_seconds"] += seconds
+            return result
+        except asyncio.TimeoutError:
+            # A worker cannot be interrupted, so the job keeps its slot until it finishes
+            self.metrics["timeouts"] += 1
+            logger.warning(f"Simulation job '{kind}' timed out after {timeout or self.timeout}s")
+            raise
+        except BrokenProcessPool as e:
+            self.metrics["failures"] += 1
+            logger.warning(f"Simulation pool broke running '{kind}': {e}")
+            self._reset_pool()
+            raise
+        finally:
+            if future is not None and not future.done():
+                future.add_done_callback(self._finish_abandoned)
+            else:
+                self._in_flight -= 1
+
+    def _finish_abandoned(self, future):
+        """Release the slot of a timed-out job once its worker is done"""
+        self._in_flight -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.metrics["worker_seconds"] += future.result()[1]
+
+    async def run_many(self, kind: str, payloads: List[Dict[str, Any]], timeout: Optional[float] = None,
+                       allow_inline: bool = True) -> List[Any]:
+        """Run several jobs concurrently; results are in payload order"""
+        return list(await asyncio.gather(*(self.run(kind, payload, timeout, allow_inline) for payload in payloads)))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Job counters plus pool utilization (worker busy time over available worker time)"""
+        metrics = dict(self.metrics)
+        uptime = time.monotonic() - self._pool_started if self._pool is not None else 0.0
+        metrics.update({
+            "workers": self.max_workers,
+            "pool_running": self._pool is not None,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.max_workers),
+            "queue_limit": self.queue_limit,
+            "utilization": min(1.0, metrics["worker_seconds"] / (uptime * self.max_workers)) if uptime else 0.0
+        })
+        return metrics
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+# Global simulation executor instance
+sim_executor = SimulationExecutor()
@@ -0,0 +1,457 @@
+# Skill Compiler for KoKoroMichi Bot
+#
+# Usage: python -m utils.skill_compiler [--all]   (reports effects the compiler cannot parse)
+import re
+import sys
+import copy
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple, Any
+
+from core.data_manager import data_manager
+
+logger = logging.getLogger(__name__)
+
+# Duplicate pulls raise every percentage in a skill by 0.05 + potential / 10000
+DUPLICATE_SKILL_INCREMENT = 0.05
+DUPLICATE_SKILL_POTENTIAL_SCALE = 10000
+
+# Skill text fields with scalable numbers
+SCALABLE_FIELDS = ["damage", "effect"]
+
+_PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)%')
+_PLAIN_NUMBER_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*$')
+
+# Effect record parameters that are percentages (raised by duplicate stacks like the skill text)
+PERCENT_PARAMS = ("value", "scale", "chance")
+
+# Placeholder texts that describe no effect
+EMPTY_EFFECT_TEXTS = {"", "0", "n/a", "none", "effect details not provided."}
+
+# Stat names used in skill text -> canonical stat keys
+STAT_ALIASES = {
+    "max hp": "hp", "hp": "hp", "atk": "atk", "attack": "atk", "str": "atk",
+    "def": "def", "defense": "def", "p.res": "p_res", "m.res": "m_res", "debuff res": "debuff_res",
+    "crit": "crit", "crit probability": "crit",
+    "crit dmg": "crit_dmg", "p.crit dmg": "crit_dmg", "m.crit dmg": "crit_dmg",
+    "acc": "acc", "effect acc": "effect_acc", "eva": "eva", "evasion": "eva", "agi": "eva",
+    "dmg": "dmg", "damage": "dmg", "p.dmg": "dmg", "m.dmg": "dmg",
+    "dmg received": "dmg_taken", "dmg taken": "dmg_taken", "damage taken": "dmg_taken",
+    "leech": "leech", "dmg reflection": "reflect",
+    "healing": "healing", "increased heal": "healing"
+}
+
+# Debuffs inflicted on enemies and states entered by the caster
+STATUS_ALIASES = {
+    "bleeding": "bleed", "bleed": "bleed", "stunned": "stun", "stun": "stun", "burn": "burn",
+    "ignite": "ignite", "poison": "poison", "freeze": "freeze", "silence": "silence",
+    "charm": "charm", "blind": "blind", "shock": "shock", "seal": "seal", "weaken": "weaken",
+    "sunder armor": "sunder_armor", "confusion": "confusion", "fear": "fear", "break": "break",
+    "pierce": "pierce"
+}
+STATE_ALIASES = {
+    "excite": "excite", "frenzy": "frenzy", "invisibility": "invisibility", "taunt": "taunt",
+    "guard": "guard", "blessing": "blessing", "encourage": "encourage", "judgment": "judgment",
+    "afterimage": "afterimage", "soul mode": "soul_mode"
+}
+
+
+def _alternation(names) -> str:
+    """Regex alternation matching the longest name first"""
+    return "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+
+
+_NUM = r'(\d+(?:\.\d+)?)'
+_STATS = _alternation(STAT_ALIASES)
+_TARGET_WORDS = r"(?:(?:the|self|enemy's|enemy|enemies'|enemies|their|its|her|his|target's|all)\s+)*"
+_INCREASE = r'increas\w*|boosts?|rais\w*'
+_DECREASE = r'reduc\w*|decreas\w*|lower\w*'
+
+_CLAUSE_SPLIT = re.compile(r'(?<=[.;])\s+')
+_CONDITION_PATTERN = re.compile(r'\b(?:if|when|while|against|for each)\b')
+_DURATION_PATTERN = re.compile(r'for\s+(\d+)\s+rounds?')
+_CHANCE_PATTERN = re.compile(_NUM + r'%\s+(?:base\s+)?(?:chance|probability)')
+_DOT_PATTERN = re.compile(r'lose\s+' + _NUM + r'%\s+(?:of\s+)?(?:their\s+)?current\s+hp')
+_CONDITION_CONTEXT = re.compile(r'(?:affected by|under|in|against|already has)\s+\[?$')
+_UP_TO_PATTERN = re.compile(r'up to\s+(?:a maximum of\s+)?(\d+)')
+
+_DAMAGE_PATTERN = re.compile(_NUM + r'%\)?\s*(p\.|m\.|true\s)\s*(?:dmg|damage)')
+_HITS_PATTERN = re.compile(r'(\d+)\s+(?:hits|times)\b')
+_STAT_MOD_PATTERN = re.compile(r'(?<![\w.])(' + _STATS + r')\s*([+-])\s*' + _NUM + r'(%?)')
+_STAT_VERB_PATTERN = re.compile(r'(?:\b(' + _INCREASE + '|' + _DECREASE + r')|\band)\s+' + _TARGET_WORDS
+                                + r'(' + _STATS + r')\s+by\s+' + _NUM + '%')
+_STAT_PASSIVE_PATTERN = re.compile(r'(?<![\w.])(' + _STATS + r')\s+is\s+(' + _INCREASE + '|' + _DECREASE + r')\s+by\s+'
+                                   + _NUM + '%')
+_STAT_VERB_PERCENT_PATTERN = re.compile(r'\b(' + _INCREASE + '|' + _DECREASE + r')\s+' + _NUM
+                                        + r'%\s+(' + _STATS + r')\b')
+_LIFESTEAL_PATTERN = re.compile(
+    r'leech\s+' + _NUM + r'%\s+of\s+(?:dealt\s+)?(?:dmg|damage)'
+    r'|heals?\s+(?:self\s+)?(?:by|for)\s+' + _NUM + r'%\s+of\s+(?:dealt\s+)?(?:dmg|damage)'
+    r'|converts?\s+' + _NUM + r'%\s+of\s+(?:total\s+)?(?:dmg|damage)'
+    r'|' + _NUM + r'%\s+of\s+the\s+damage\s+dealt\s+is\s+converted'
+)
+_HEAL_PATTERN = re.compile(r'\b(?:heal\w*|restor\w*)\b.*?' + _NUM
+                           + r"%\s+of\s+(?:(?:[\w]+'s|self|her|his|their|the)\s+)?(max atk|max hp|atk|def|hp)\b")
+_SHIELD_PATTERN = re.compile(r'shield\s+absorbing\s+' + _NUM + r'%\s+of\s+max\s+hp'
+                             r'|absorb\w*\s+' + _NUM + r'%\s+(?:of\s+)?(?:dmg|damage)')
+_REFLECT_PATTERN = re.compile(r'reflects?\s+(?:to\s+(?:the\s+)?source\s+)?' + _NUM + '%')
+_GUARANTEED_CRIT_PATTERN = re.compile(r'guaranteed\s+(?:to\s+)?crit')
+_DOUBLE_DAMAGE_PATTERN = re.compile(r'(?:dmg|damage) is doubled|deals? (?:double|bonus) (?:dmg|damage)|double dmg')
+_ARMOR_PIERCE_PATTERN = re.compile(r'ignores?\s+' + _NUM + r'%\s+(def|p\.res|m\.res)')
+_DISPEL_PATTERN = re.compile(r'\b(dispel|remove|steal)s?\s+(all|\d+)\s+(de)?buffs?')
+_EXTRA_ATTACK_PATTERN = re.compile(r'attacks?\s+(?:again|twice)|strikes\s+again')
+_STATUS_PATTERN = re.compile(r'\b(' + _alternation(STATUS_ALIASES) + r')\b')
+_STATE_PATTERN = re.compile(r'\b(' + _alternation(STATE_ALIASES) + r')\b')
+
+
+def get_duplicate_increment(potential: Any) -> float:
+    """Per-duplicate increase applied to each scalable skill value"""
+    if isinstance(potential, dict):
+        potential = next(iter(potential.values()), 0)
+    try:
+        potential = int(potential)
+    except (TypeError, ValueError):
+        potential = 0
+    return DUPLICATE_SKILL_INCREMENT + potential / DUPLICATE_SKILL_POTENTIAL_SCALE
+
+
+def compile_text(text: str) -> Tuple[str, List[float]]:
+    """Split skill text into a format template and its scalable numbers"""
+    plain = _PLAIN_NUMBER_PATTERN.match(text)
+    if plain:
+        return "{0}", [float(plain.group(1))]
+
+    values: List[float] = []
+
+    def to_slot(match):
+        values.append(float(match.group(1)))
+        return "{" + str(len(values) - 1) + "}%"
+
+    escaped = text.replace("{", "{{").replace("}", "}}")
+    return _PERCENT_PATTERN.sub(to_slot, escaped), values
+
+
+def format_value(value: float) -> str:
+    """Format a skill number for display (180.0 -> '180', 180.55 -> '180.55')"""
+    return f"{round(value, 2):g}"
+
+
+# Effect compilation
+
+def _first_number(match) -> float:
+    """First captured number of a match with alternative number groups"""
+    return float(next(group for group in match.groups() if group is not None))
+
+
+def _parse_clause(clause: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """Effect records found in one clause of skill text, with their positions"""
+    found: List[Tuple[int, Dict[str, Any]]] = []
+
+    for match in _DAMAGE_PATTERN.finditer(clause):
+        damage_type = {"p.": "physical", "m.": "magic"}.get(match.group(2), "true")
+        found.append((match.start(), {"type": "damage", "scale": float(match.group(1)), "damage_type": damage_type}))
+    for match in _HITS_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "multi_hit", "hits": int(match.group(1))}))
+
+    for match in _STAT_MOD_PATTERN.finditer(clause):
+        stat = STAT_ALIASES[match.group(1)]
+        value = float(match.group(3)) * (-1 if match.group(2) == "-" else 1)
+        effect = {"type": "reflect", "value": value} if stat == "reflect" else \
+            {"type": "stat", "stat": stat, "value": value, "target": "self"}
+        if not match.group(4):
+            effect["flat"] = True
+        found.append((match.start(), effect))
+
+    decreasing = False
+    verb_matches = [(m.start(), m.group(1), m.group(2), m.group(3)) for m in _STAT_VERB_PATTERN.finditer(clause)]
+    verb_matches += [(m.start(), m.group(1), m.group(3), m.group(2)) for m in _STAT_VERB_PERCENT_PATTERN.finditer(clause)]
+    verb_matches += [(m.start(), m.group(2), m.group(1), m.group(3)) for m in _STAT_PASSIVE_PATTERN.finditer(clause)]
+    for start, verb, stat_name, number in sorted(verb_matches):
+        if verb:  # "and <stat> by N%" continues the previous verb
+            decreasing = re.match(_DECREASE, verb) is not None
+        stat = STAT_ALIASES[stat_name]
+        target = "enemy" if decreasing and stat != "dmg_taken" else "self"
+        value = float(number) * (-1 if decreasing else 1)
+        found.append((start, {"type": "stat", "stat": stat, "value": value, "target": target}))
+
+    for match in _LIFESTEAL_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "lifesteal", "value": _first_number(match)}))
+    for match in _HEAL_PATTERN.finditer(clause):
+        target = "allies" if re.search(r'\b(?:allies|team|teammates)\b', match.group(0)) else "self"
+        found.append((match.start(), {"type": "heal", "value": float(match.group(1)),
+                                      "scale_stat": match.group(2).replace("max ", ""), "target": target}))
+    for match in _SHIELD_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "shield", "value": _first_number(match)}))
+    for match in _REFLECT_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "reflect", "value": float(match.group(1))}))
+    for match in _ARMOR_PIERCE_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "armor_pierce", "value": float(match.group(1)),
+                                      "stat": STAT_ALIASES[match.group(2)]}))
+    for match in _GUARANTEED_CRIT_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "guaranteed_crit"}))
+    for match in _DOUBLE_DAMAGE_PATTERN.finditer(clause):
+        found.append((match.start(), {"type": "damage_bonus", "value": 100.0}))
+    for match in _DISPEL_PATTERN.finditer(clause):
+        count = None if match.group(2) == "all" else int(match.group(2))
+        found.append((match.start(), {"type": "dispel", "count": count, "debuffs": bool(match.group(3)),
+                                      "steal": match.group(1) == "steal"}))
+    for match in _EXTRA_ATTACK_PATTERN.finditer(clause):
+        effect = {"type": "extra_attack"}
+        up_to = _UP_TO_PATTERN.search(clause, match.end())
+        if up_to:
+            effect["max_attacks"] = int(up_to.group(1))
+        found.append((match.start(), effect))
+
+    # Statuses named as conditions ("if the enemy is affected by [Freeze]") are not inflicted
+    for pattern, aliases, record_type in ((_STATUS_PATTERN, STATUS_ALIASES, "status"),
+                                          (_STATE_PATTERN, STATE_ALIASES, "state")):
+        seen = set()
+        for match in pattern.finditer(clause):
+            name = aliases[match.group(1)]
+            after = clause[match.end():match.end() + 12]
+            if name in seen or _CONDITION_CONTEXT.search(clause[:match.start()]) or \
+                    re.match(r'\]?\s+(?:is active|targets)', after):
+                continue
+            seen.add(name)
+            found.append((match.start(), {"type": record_type, record_type: name}))
+
+    # Clause-level parameters
+    duration = _DURATION_PATTERN.search(clause)
+    chance = _CHANCE_PATTERN.search(clause)
+    dot = _DOT_PATTERN.search(clause)
+    for start, effect in found:
+        # Triggered bonuses usually state their condition afterwards ("guaranteed crit if ...")
+        condition_text = clause if effect["type"] in ("guaranteed_crit", "damage_bonus", "extra_attack") \
+            else clause[:start]
+        if _CONDITION_PATTERN.search(condition_text):
+            effect["conditional"] = True
+        if duration and effect["type"] in ("status", "state", "stat", "shield", "reflect"):
+            effect.setdefault("duration", int(duration.group(1)))
+        if effect["type"] in ("status", "state", "dispel"):
+            effect.setdefault("chance", float(chance.group(1)) if chance else 100.0)
+        if dot and effect["type"] == "status":
+            effect.setdefault("value", float(dot.group(1)))
+    return found
+
+
+def compile_effects(text: Any) -> Optional[List[Dict[str, Any]]]:
+    """Compile skill text into typed effect records (None if the text has effects that cannot be parsed)"""
+    if not isinstance(text, str):
+        return []
+    normalized = " ".join(text.replace("\u2019", "'").lower().split())
+    if normalized in EMPTY_EFFECT_TEXTS:
+        return []
+
+    found: List[Tuple[int, Dict[str, Any]]] = []
+    offset = 0
+    for clause in _CLAUSE_SPLIT.split(normalized):
+        found.extend((offset + start, effect) for start, effect in _parse_clause(clause))
+        offset += len(clause) + 1
+    if not found:
+        return None
+    found.sort(key=lambda item: item[0])
+    return [effect for _, effect in found]
+
+
+_effect_cache: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+
+
+def compile_effects_cached(text: Any) -> Optional[List[Dict[str, Any]]]:
+    """compile_effects memoized by text (records are shared, treat them as read-only)"""
+    if not isinstance(text, str):
+        return []
+    if text not in _effect_cache:
+        _effect_cache[text] = compile_effects(text)
+    return _effect_cache[text]
+
+
+def get_base_text(skill: Any, field: str) -> str:
+    """Skill field text without duplicate stacks"""
+    if not isinstance(skill, dict):
+        return str(skill) if field == "effect" else ""
+    template = skill.get(f"{field}_template")
+    if template is None:
+        value = skill.get(field, "")
+        return value if isinstance(value, str) else str(value)
+    return template.format(*[format_value(v) for v in skill.get(f"{field}_values", [])])
+
+
+def get_skill_effects(skill: Any) -> List[Dict[str, Any]]:
+    """Compiled effect records of a skill (compiled on first use for skills stored before effects existed)"""
+    if isinstance(skill, dict) and "effects" in skill:
+        return skill["effects"]
+    effects = []
+    for field in SCALABLE_FIELDS:
+        effects.extend(compile_effects_cached(get_base_text(skill, field)) or [])
+    return effects
+
+
+def get_effect_value(skill: Any, effect: Dict[str, Any], param: str = "value") -> float:
+    """Numeric effect parameter including duplicate stacks (percent parameters only)"""
+    value = effect.get(param, 0.0)
+    if param in PERCENT_PARAMS and not effect.get("flat") and isinstance(skill, dict):
+        value += skill.get("stacks", 0) * skill.get("stack_increment", 0.0)
+    return value
+
+
+def compile_skill(skill: Dict[str, Any], skill_type: Optional[str] = None,
+                  increment: float = DUPLICATE_SKILL_INCREMENT) -> Dict[str, Any]:
+    """Compile a catalog (or legacy owned) skill into structured numeric fields"""
+    if is_compiled(skill):
+        return copy.deepcopy(skill)
+
+    compiled = {key: copy.deepcopy(value) for key, value in skill.items() if key not in SCALABLE_FIELDS}
+    if skill_type:
+        compiled["type"] = skill_type
+
+    for field in SCALABLE_FIELDS:
+        text = skill.get(field)
+        if not isinstance(text, str):
+            continue
+        template, values = compile_text(text)
+        compiled[f"{field}_template"] = template
+        compiled[f"{field}_values"] = values
+
+    compiled["effects"] = get_skill_effects(compiled)
+    compiled["stacks"] = 0
+    compiled["stack_increment"] = increment
+    return compiled
+
+
+def is_compiled(skill: Any) -> bool:
+    """Check whether a skill already uses the structured format"""
+    return isinstance(skill, dict) and "stacks" in skill
+
+
+def get_skill_values(skill: Dict[str, Any], field: str) -> List[float]:
+    """Current numeric values of a skill field including duplicate stacks"""
+    bonus = skill.get("stacks", 0) * skill.get("stack_increment", 0.0)
+    return [value + bonus for value in skill.get(f"{field}_values", [])]
+
+
+def render_skill_field(skill: Any, field: str) -> str:
+    """Render a skill field as display text (legacy text skills are returned as-is)"""
+    if not isinstance(skill, dict):
+        return str(skill) if field == "effect" else ""
+    template = skill.get(f"{field}_template")
+    if template is None:
+        value = skill.get(field, "")
+        return value if isinstance(value, str) else str(value)
+    return template.format(*[format_value(v) for v in get_skill_values(skill, field)])
+
+
+def render_skill(skill: Any) -> Dict[str, Any]:
+    """Render a structured skill back to the catalog text format for display"""
+    if not is_compiled(skill):
+        return skill if isinstance(skill, dict) else {"name": str(skill), "effect": str(skill)}
+    rendered = {key: value for key, value in skill.items()
+                if not key.endswith("_template") and not key.endswith("_values")
+                and key not in ("effects", "stacks", "stack_increment")}
+    for field in SCALABLE_FIELDS:
+        if f"{field}_template" in skill:
+            rendered[field] = render_skill_field(skill, field)
+    return rendered
+
+
+def apply_duplicate(skills: List[Any], count: int = 1, increment: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Merge duplicate pulls into a skill list by adding stacks (legacy text skills are compiled first)"""
+    merged = []
+    for skill in skills:
+        if not isinstance(skill, dict):
+            merged.append(skill)
+            continue
+        if not is_compiled(skill):
+            skill = compile_skill(skill, increment=increment if increment is not None else DUPLICATE_SKILL_INCREMENT)
+        skill["stacks"] += count
+        merged.append(skill)
+    return merged
+
+
+class SkillCompiler:
+    """Compiles catalog skills once per character and hands out structured copies"""
+
+    def __init__(self):
+        self.compiled_skills: Dict[str, List[Dict[str, Any]]] = {}
+        self.unparsed_effects: List[Dict[str, str]] = []
+        self.reload()
+
+    def reload(self):
+        """Recompile skills for every catalog character"""
+        compiled = {}
+        _effect_cache.clear()
+        for character in data_manager.get_all_characters():
+            name = character.get("name")
+            if not name:
+                continue
+            try:
+                compiled[name] = self.compile_character(character)
+            except Exception as e:
+                logger.warning(f"Failed to compile skills for {name}: {e}")
+                compiled[name] = []
+        self.compiled_skills = compiled
+        self.unparsed_effects = self.find_unparsed_effects()
+        if self.unparsed_effects:
+            logger.info(f"{len(self.unparsed_effects)} skill effects could not be compiled "
+                        f"(python -m utils.skill_compiler for details)")
+
+    def find_unparsed_effects(self) -> List[Dict[str, str]]:
+        """Catalog skill texts the effect compiler could not turn into effect records"""
+        unparsed = []
+        for name, skills in self.compiled_skills.items():
+            for skill in skills:
+                for field in SCALABLE_FIELDS:
+                    text = get_base_text(skill, field)
+                    if compile_effects_cached(text) is None:
+                        unparsed.append({"character": name, "skill": skill.get("name", "Unknown Skill"),
+                                         "field": field, "text": " ".join(text.split())})
+        return unparsed
+
+    def compile_character(self, character: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Compile a catalog character's active and passive skills"""
+        increment = get_duplicate_increment(character.get("potential", 0))
+        skills = []
+        for skill_type in ("active", "passive"):
+            for skill in character.get(f"{skill_type}_skills", []):
+                if isinstance(skill, dict):
+                    skills.append(compile_skill(skill, skill_type, increment))
+        for skill in character.get("skills", []):
+            if isinstance(skill, dict):
+                skills.append(compile_skill(skill, skill.get("type"), increment))
+        return skills
+
+    def get_character_skills(self, character_name: str) -> List[Dict[str, Any]]:
+        """Fresh structured skill list for a newly obtained character"""
+        # Skills are flat dicts whose only containers are lists, so a one-level copy is enough
+        # (effect records inside "effects" are shared and never modified)
+        return [{key: list(value) if isinstance(value, list) else value for key, value in skill.items()}
+                for skill in self.compiled_skills.get(character_name, [])]
+
+# Global skill compiler instance
+skill_compiler = SkillCompiler()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="KoKoroMichi skill effect compiler report")
+    parser.add_argument("--all", action="store_true", help="List compiled effects for every skill")
+    args = parser.parse_args(argv)
+
+    skills = [(name, skill) for name, character_skills in skill_compiler.compiled_skills.items()
+              for skill in character_skills]
+    compiled = sum(1 for _, skill in skills if skill.get("effects"))
+    print(f"Catalog: {len(skill_compiler.compiled_skills)} characters, {len(skills)} skills, "
+          f"{compiled} with compiled effects")
+
+    if args.all:
+        for name, skill in skills:
+            print(f"\n{name} - {skill.get('name', 'Unknown Skill')}")
+            for effect in skill.get("effects", []):
+                print(f"  {effect}")
+
+    print(f"\nUnparseable effects: {len(skill_compiler.unparsed_effects)}")
+    for entry in skill_compiler.unparsed_effects:
+        print(f"  {entry['character']} / {entry['skill']} [{entry['field']}]: {entry['text']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
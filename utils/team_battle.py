@@ -0,0 +1,492 @@
+# Team Battle Engine for KoKoroMichi Bot
+import re
+import heapq
+import random
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to per-target loops
+    np = None
+
+from core.config import BATTLE_ROUNDS_MAX, CRIT_BASE_MULTIPLIER
+from utils.advanced_combat import BattleEngine, battle_engine, SKILL_ACTIVATION_CHANCE
+from utils.skill_compiler import get_skill_effects, get_effect_value, get_base_text
+from utils.win_estimator import _get_generator
+
+logger = logging.getLogger(__name__)
+
+# Target count meaning every living unit on a side
+ALL_TARGETS = 0
+
+# Event skill ids that are not skills
+BASIC_ATTACK = -1
+DOT_EVENT = -2
+STUN_EVENT = -3
+
+# Statuses that deal a share of max HP each round, and statuses that skip turns
+DOT_STATUSES = {"bleed", "burn", "ignite", "poison"}
+CONTROL_STATUSES = {"stun", "freeze"}
+DOT_DAMAGE_FRACTION = 0.05
+
+_ALL_ALLIES_PATTERN = re.compile(r'\ballies\b|\bteam\b')
+_ALL_ENEMIES_PATTERN = re.compile(r'\ball\s+enem')
+_RANDOM_HITS_PATTERN = re.compile(r'(\d+)\s+times')
+_ENEMY_COUNT_PATTERN = re.compile(r'(\d+)\s+enem')
+
+# Fate bonuses ("HP UP 20%", "ATK UP +15%", "Max HP +1000")
+_FATE_PERCENT_PATTERN = re.compile(r'(max hp|hp|atk|dmg|def|crit)\s+(up|down)\s*\+?(\d+(?:\.\d+)?)%')
+_FATE_FLAT_PATTERN = re.compile(r'(max hp|hp|atk|def)\s*\+\s*(\d+)(?!\s*%)')
+
+
+def parse_targets(text: Any) -> Tuple[str, int, bool]:
+    """(side, count, random hits) from a skill's targets text; count 0 means every unit"""
+    text = str(text or "").lower()
+    if _ALL_ALLIES_PATTERN.search(text):
+        return "allies", ALL_TARGETS, False
+    if _ALL_ENEMIES_PATTERN.search(text):
+        return "enemies", ALL_TARGETS, False
+    match = _RANDOM_HITS_PATTERN.search(text)
+    if match:
+        return "enemies", int(match.group(1)), True
+    match = _ENEMY_COUNT_PATTERN.search(text)
+    if match:
+        return "enemies", int(match.group(1)), False
+    return "enemies", 1, False
+
+
+def get_fate_bonuses(waifu: Dict[str, Any], team_names: set) -> Dict[str, float]:
+    """Stat bonuses from fate links whose partners are all on the same team"""
+    bonuses = {"hp": 0.0, "atk": 0.0, "def": 0.0, "dmg": 0.0, "crit": 0.0, "flat_hp": 0.0,
+               "flat_atk": 0.0, "flat_def": 0.0}
+    for fate in waifu.get("fate", []):
+        if not isinstance(fate, dict):
+            continue
+        angels = fate.get("angels", [])
+        if not angels or not all(name in team_names for name in angels):
+            continue
+        text = str(fate.get("effect", "")).lower()
+        for stat, direction, value in _FATE_PERCENT_PATTERN.findall(text):
+            stat = "hp" if stat == "max hp" else stat
+            bonuses[stat] += float(value) / 100 * (1 if direction == "up" else -1)
+        for stat, value in _FATE_FLAT_PATTERN.findall(text):
+            stat = "hp" if stat == "max hp" else stat
+            bonuses[f"flat_{stat}"] += float(value)
+    return bonuses
+
+
+class _Action:
+    """A targeted skill reduced to the numbers the team engine uses"""
+
+    def __init__(self, index: int, skill: Dict[str, Any], stats: Dict[str, Any]):
+        self.index = index
+        self.name = skill.get("name", "Unknown Skill")
+        self.side, self.count, self.random_hits = parse_targets(get_base_text(skill, "targets"))
+        self.chance = SKILL_ACTIVATION_CHANCE.get(skill.get("rarity", "common"), 0.3)
+
+        scale = crit_bonus = lifesteal = weaken = 0.0
+        self.healing = 0
+        self.statuses: List[Tuple[str, float, int]] = []
+        self.weaken_duration = 0
+        for effect in get_skill_effects(skill):
+            if effect.get("conditional") or effect.get("flat"):
+                continue
+            effect_type = effect["type"]
+            if effect_type == "damage":
+                scale += get_effect_value(skill, effect, "scale") / 100
+            elif effect_type == "stat" and effect.get("target") == "self" and effect["stat"] == "crit":
+                crit_bonus += get_effect_value(skill, effect) / 100
+            elif effect_type == "stat" and effect.get("target") == "enemy" and effect["stat"] in ("atk", "dmg"):
+                weaken = max(weaken, -get_effect_value(skill, effect) / 100)
+                self.weaken_duration = max(self.weaken_duration, effect.get("duration", 1))
+            elif effect_type == "lifesteal":
+                lifesteal += get_effect_value(skill, effect) / 100
+            elif effect_type == "heal":
+                self.healing += int(stats.get(effect["scale_stat"], 0) * get_effect_value(skill, effect) / 100)
+            elif effect_type == "status":
+                status = effect["status"]
+                if status in DOT_STATUSES or status in CONTROL_STATUSES:
+                    chance = get_effect_value(skill, effect, "chance") / 100 if "chance" in effect else 1.0
+                    self.statuses.append((status, chance, effect.get("duration", 1)))
+
+        self.scale = scale or 1.0
+        self.crit_bonus = crit_bonus
+        self.lifesteal = lifesteal
+        self.weaken = min(max(weaken, 0.0), 0.9)
+
+
+class TeamBattleEngine:
+    """Team battles (3v3, 5v5, raids) over struct-of-arrays unit state
+
+    Units act in speed order each round (a heap keyed on speed); multi-target skills
+    resolve every target at once as array operations when NumPy is available.
+    """
+
+    def __init__(self, engine: BattleEngine = battle_engine):
+        self.engine = engine
+
+    # Setup
+
+    def _prepare_units(self, teams: List[List[Dict[str, Any]]],
+                       stats: Optional[List[List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Flatten both teams into per-stat columns"""
+        columns = {key: [] for key in ("hp", "atk", "def_factor", "crit", "speed", "team",
+                                       "dmg_bonus", "lifesteal", "element")}
+        units, actions = [], []
+        for team_index, team in enumerate(teams):
+            team_names = {waifu.get("name") for waifu in team}
+            for unit_index, waifu in enumerate(team):
+                unit_stats = (stats[team_index][unit_index] if stats
+                              else self.engine.calculate_battle_stats(waifu))
+                fate = get_fate_bonuses(waifu, team_names - {waifu.get("name")})
+                hp = max(1, int(unit_stats["hp"] * (1 + fate["hp"]) + fate["flat_hp"]))
+                atk = unit_stats["atk"] * (1 + fate["atk"]) + fate["flat_atk"]
+                defense = max(0, unit_stats["def"] * (1 + fate["def"]) + fate["flat_def"])
+
+                # Passive skills (no targets) apply for the whole battle
+                unit_actions, dmg_bonus, lifesteal, crit = [], fate["dmg"], 0.0, unit_stats["crit"] + fate["crit"]
+                for skill_index, skill in enumerate(waifu.get("skills", [])):
+                    if not isinstance(skill, dict):
+                        continue
+                    if skill.get("targets"):
+                        unit_actions.append(_Action(skill_index, skill, unit_stats))
+                        continue
+                    for effect in get_skill_effects(skill):
+                        if effect.get("conditional") or effect.get("flat") or effect.get("duration"):
+                            continue
+                        if effect["type"] == "stat" and effect.get("target") == "self":
+                            value = get_effect_value(skill, effect) / 100
+                            if effect["stat"] in ("atk", "dmg"):
+                                dmg_bonus += value
+                            elif effect["stat"] == "crit":
+                                crit += value
+                            elif effect["stat"] == "leech":
+                                lifesteal += value
+                        elif effect["type"] == "lifesteal":
+                            lifesteal += get_effect_value(skill, effect) / 100
+
+                columns["hp"].append(hp)
+                columns["atk"].append(atk)
+                columns["def_factor"].append(1 - defense / (defense + 100))
+                columns["crit"].append(min(crit, 0.95))
+                columns["speed"].append(unit_stats.get("speed", 50))
+                columns["team"].append(team_index)
+                columns["dmg_bonus"].append(dmg_bonus)
+                columns["lifesteal"].append(lifesteal)
+                columns["element"].append(unit_stats.get("element", waifu.get("element", "Neutral")))
+                units.append(waifu.get("name", f"Unit {len(units) + 1}"))
+                actions.append(unit_actions)
+
+        count = len(units)
+        elements = columns.pop("element")
+        elemental = [[self.engine._get_elemental_modifier(elements[a], elements[d]) for d in range(count)]
+                     for a in range(count)]
+        state = {
+            "names": units,
+            "actions": actions,
+            "max_hp": list(columns["hp"]),
+            "weaken": [0.0] * count,
+            "weaken_turns": [0] * count,
+            "dot_turns": [0] * count,
+            "dot_damage": [0] * count,
+            "stun_turns": [0] * count,
+            "damage_dealt": [0] * count,
+        }
+        state.update(columns)
+        if np is not None:
+            for key in ("hp", "max_hp", "atk", "def_factor", "crit", "dmg_bonus", "lifesteal",
+                        "weaken", "damage_dealt"):
+                state[key] = np.array(state[key], dtype=float)
+            state["team"] = np.array(state["team"])
+            state["elemental"] = np.array(elemental)
+        else:
+            state["elemental"] = elemental
+        return state
+
+    # Random draws (NumPy generator or random.Random)
+
+    def _random(self, rand, count: int):
+        return rand.random(count) if np is not None else [rand.random() for _ in range(count)]
+
+    def _uniform(self, rand, low: float, high: float, count: int):
+        return rand.uniform(low, high, count) if np is not None else [rand.uniform(low, high) for _ in range(count)]
+
+    def _choose(self, rand, candidates: List[int], count: int, random_hits: bool) -> List[int]:
+        """Pick targets among living candidates (count 0 = all)"""
+        if random_hits:
+            if np is not None:
+                return list(rand.choice(candidates, count))
+            return [rand.choice(candidates) for _ in range(count)]
+        if count == ALL_TARGETS or count >= len(candidates):
+            return candidates
+        if np is not None:
+            return sorted(rand.choice(candidates, count, replace=False))
+        return sorted(rand.sample(candidates, count))
+
+    # Turn resolution
+
+    def _strike(self, state: Dict[str, Any], rand, actor: int, targets: List[int],
+                scale: float, crit_bonus: float) -> Tuple[List[int], List[bool]]:
+        """Damage every target of one attack; returns per-target damage and crits"""
+        count = len(targets)
+        variance = self._uniform(rand, 0.85, 1.15, count)
+        crit_rolls = self._random(rand, count)
+        attack = state["atk"][actor] * (1 - state["weaken"][actor]) * scale * (1 + state["dmg_bonus"][actor])
+        crit_chance = state["crit"][actor] + crit_bonus
+
+        if np is not None:
+            idx = np.array(targets)
+            crits = crit_rolls < crit_chance
+            damage = attack * variance * state["def_factor"][idx]
+            damage = np.where(crits, damage * CRIT_BASE_MULTIPLIER, damage) * state["elemental"][actor, idx]
+            damage = np.maximum(1, np.floor(damage))
+            np.subtract.at(state["hp"], idx, damage)
+            np.maximum(state["hp"], 0, out=state["hp"])
+            state["damage_dealt"][actor] += damage.sum()
+            return [int(value) for value in damage], [bool(value) for value in crits]
+
+        damages, crits = [], []
+        for target, roll, crit_roll in zip(targets, variance, crit_rolls):
+            is_critical = crit_roll < crit_chance
+            damage = attack * roll * state["def_factor"][target]
+            if is_critical:
+                damage *= CRIT_BASE_MULTIPLIER
+            damage = max(1, int(damage * state["elemental"][actor][target]))
+            state["hp"][target] = max(0, state["hp"][target] - damage)
+            state["damage_dealt"][actor] += damage
+            damages.append(damage)
+            crits.append(is_critical)
+        return damages, crits
+
+    def _apply_statuses(self, state: Dict[str, Any], rand, action: _Action, targets: List[int]):
+        """Roll an action's debuffs on its targets"""
+        for status, chance, duration in action.statuses:
+            for target, roll in zip(targets, self._random(rand, len(targets))):
+                if roll >= chance:
+                    continue
+                if status in CONTROL_STATUSES:
+                    state["stun_turns"][target] = max(state["stun_turns"][target], duration)
+                else:
+                    state["dot_turns"][target] = max(state["dot_turns"][target], duration)
+                    state["dot_damage"][target] = max(1, int(state["max_hp"][target] * DOT_DAMAGE_FRACTION))
+        if action.weaken:
+            for target in targets:
+                state["weaken"][target] = max(state["weaken"][target], action.weaken)
+                state["weaken_turns"][target] = max(state["weaken_turns"][target], action.weaken_duration)
+
+    def _heal(self, state: Dict[str, Any], unit: int, amount: float) -> int:
+        before = state["hp"][unit]
+        state["hp"][unit] = min(state["max_hp"][unit], before + amount)
+        return int(state["hp"][unit] - before)
+
+    def _take_turn(self, state: Dict[str, Any], rand, actor: int) -> Optional[Tuple]:
+        """Resolve one unit's action; returns (skill id, targets, damages, crits, healing)
+
+        Ally skills record the HP restored per target in place of damages, with no crits.
+        """
+        team = state["team"][actor]
+        action = None
+        for candidate in state["actions"][actor]:
+            if rand.random() < candidate.chance:
+                action = candidate
+                break
+
+        hp, teams = state["hp"], state["team"]
+        if action is not None and action.side == "allies":
+            allies = [unit for unit in range(len(hp)) if teams[unit] == team and hp[unit] > 0]
+            targets = self._choose(rand, allies, action.count, False)
+            heals = tuple(self._heal(state, unit, action.healing) for unit in targets) if action.healing else ()
+            return action.index, tuple(int(unit) for unit in targets), heals, (), sum(heals)
+
+        enemies = [unit for unit in range(len(hp)) if teams[unit] != team and hp[unit] > 0]
+        if not enemies:
+            return None
+        if action is None:
+            targets = self._choose(rand, enemies, 1, False)
+            damages, crits = self._strike(state, rand, actor, targets, 1.0, 0.0)
+            healing = int(sum(damages) * state["lifesteal"][actor])
+            return BASIC_ATTACK, tuple(int(unit) for unit in targets), tuple(damages), tuple(crits), \
+                self._heal(state, actor, healing) if healing else 0
+
+        targets = self._choose(rand, enemies, action.count, action.random_hits)
+        damages, crits = self._strike(state, rand, actor, targets, action.scale, action.crit_bonus)
+        self._apply_statuses(state, rand, action, [unit for unit in targets if hp[unit] > 0])
+        healing = action.healing + int(sum(damages) * (state["lifesteal"][actor] + action.lifesteal))
+        return action.index, tuple(int(unit) for unit in targets), tuple(damages), tuple(crits), \
+            self._heal(state, actor, healing) if healing else 0
+
+    def _tick_statuses(self, state: Dict[str, Any], round_num: int, events: Optional[List[Tuple]]):
+        """Damage-over-time at the start of a round"""
+        hp = state["hp"]
+        for unit, turns in enumerate(state["dot_turns"]):
+            if turns <= 0 or hp[unit] <= 0:
+                continue
+            damage = min(state["dot_damage"][unit], int(hp[unit]))
+            hp[unit] -= damage
+            state["dot_turns"][unit] = turns - 1
+            if events is not None:
+                events.append((round_num, unit, DOT_EVENT, (unit,), (damage,), (False,), 0))
+
+    def _end_round(self, state: Dict[str, Any]):
+        """Expire attack debuffs"""
+        for unit, turns in enumerate(state["weaken_turns"]):
+            if turns > 0:
+                state["weaken_turns"][unit] = turns - 1
+                if turns == 1:
+                    state["weaken"][unit] = 0.0
+
+    def _team_alive(self, state: Dict[str, Any], team: int) -> bool:
+        hp, teams = state["hp"], state["team"]
+        return any(hp[unit] > 0 for unit in range(len(hp)) if teams[unit] == team)
+
+    # Battle
+
+    def simulate_battle(self, team1: List[Dict[str, Any]], team2: List[Dict[str, Any]],
+                        max_rounds: int = None, rng=None, headless: bool = False,
+                        stats: Optional[List[List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Simulate a battle between two teams of any size (a raid boss is a team of one)
+
+        Returns the same outcome keys as BattleEngine.simulate_battle with per-unit lists;
+        non-headless battles add the event list for render_battle.
+        """
+        max_rounds = max_rounds or BATTLE_ROUNDS_MAX
+        rng = rng or random
+        rand = _get_generator(None if rng is random else rng) if np is not None else rng
+        state = self._prepare_units([team1, team2], stats)
+        events = None if headless else []
+
+        round_num = 0
+        for round_num in range(1, max_rounds + 1):
+            self._tick_statuses(state, round_num, events)
+            if not self._team_alive(state, 0) or not self._team_alive(state, 1):
+                break
+
+            # Speed-keyed heap: fastest living unit acts first; ties are drawn from the battle's RNG
+            # each round so neither side always moves first
+            order = [(-state["speed"][unit], float(rand.random()), unit)
+                     for unit in range(len(state["names"])) if state["hp"][unit] > 0]
+            heapq.heapify(order)
+            while order:
+                _, _, actor = heapq.heappop(order)
+                if state["hp"][actor] <= 0:
+                    continue
+                if state["stun_turns"][actor] > 0:
+                    state["stun_turns"][actor] -= 1
+                    if events is not None:
+                        events.append((round_num, actor, STUN_EVENT, (), (), (), 0))
+                    continue
+                turn = self._take_turn(state, rand, actor)
+                if turn is None:
+                    break
+                if events is not None:
+                    events.append((round_num, actor) + turn)
+                if not self._team_alive(state, 0) or not self._team_alive(state, 1):
+                    break
+            if not self._team_alive(state, 0) or not self._team_alive(state, 1):
+                break
+            self._end_round(state)
+
+        # Winner: the surviving team, otherwise the higher share of remaining HP
+        hp = [int(value) for value in state["hp"]]
+        teams = [int(value) for value in state["team"]]
+        shares = []
+        for team in (0, 1):
+            remaining = sum(hp[unit] for unit in range(len(hp)) if teams[unit] == team)
+            total = sum(state["max_hp"][unit] for unit in range(len(hp)) if teams[unit] == team)
+            shares.append(remaining / total if total else 0)
+        if shares[0] > shares[1]:
+            winner, winner_id = "Team 1", 1
+        elif shares[1] > shares[0]:
+            winner, winner_id = "Team 2", 2
+        else:
+            winner, winner_id = "Draw", 0
+
+        split = len(team1)
+        dealt = [int(value) for value in state["damage_dealt"]]
+        results = {
+            "winner": winner,
+            "winner_id": winner_id,
+            "final_hp": {"team1": hp[:split], "team2": hp[split:]},
+            "total_rounds": round_num,
+            "damage_dealt": {"team1": dealt[:split], "team2": dealt[split:]},
+            "seed": getattr(rng, "stream_seed", None)
+        }
+        if events is not None:
+            results["units"] = [{"name": name, "team": team + 1, "max_hp": int(max_hp)}
+                                for name, team, max_hp in zip(state["names"], teams, state["max_hp"])]
+            results["events"] = events
+        return results
+
+    def render_battle(self, results: Dict[str, Any], team1: List[Dict[str, Any]],
+                      team2: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """Render a simulated team battle's events as (battle_log, round_details) text"""
+        units = results["units"]
+        waifus = list(team1) + list(team2)
+        names = [unit["name"] for unit in units]
+        hp = [unit["max_hp"] for unit in units]
+
+        battle_log = [
+            f"🏟️ **Team battle begins: {', '.join(names[:len(team1)])} vs {', '.join(names[len(team1):])}!**",
+            f"❤️ Team 1: {sum(hp[:len(team1)])} HP | Team 2: {sum(hp[len(team1):])} HP",
+            ""
+        ]
+        round_details = []
+
+        round_log = None
+        current_round = None
+        for round_num, actor, skill_id, targets, damages, crits, healing in results.get("events", []):
+            if round_num != current_round:
+                if round_log is not None:
+                    round_details.append("\n".join(round_log + self._format_team_hp(units, hp)))
+                current_round = round_num
+                round_log = [f"🎯 **Round {round_num}**"]
+
+            if skill_id == DOT_EVENT:
+                hp[actor] -= damages[0]
+                round_log.append(f"🩸 {names[actor]} suffers **{damages[0]}** damage over time!")
+                continue
+            if skill_id == STUN_EVENT:
+                round_log.append(f"💫 {names[actor]} is stunned and loses the turn!")
+                continue
+
+            if skill_id != BASIC_ATTACK:
+                skill = waifus[actor].get("skills", [])[skill_id]
+                round_log.append(f"✨ {names[actor]} uses {skill.get('name', 'Unknown Skill')}!")
+            if damages and not crits:
+                for target, restored in zip(targets, damages):
+                    hp[target] += restored
+                if healing > 0:
+                    round_log.append(f"💚 {names[actor]} restores **{healing}** HP to the team!")
+                continue
+            for target, damage, is_critical in zip(targets, damages, crits):
+                hp[target] = max(0, hp[target] - damage)
+                damage_text = f"💥 {names[actor]} hits {names[target]} for **{damage}** damage!"
+                if is_critical:
+                    damage_text += " 💥"
+                round_log.append(damage_text)
+                if hp[target] == 0:
+                    round_log.append(f"☠️ {names[target]} is defeated!")
+            if healing > 0:
+                hp[actor] += healing
+                round_log.append(f"💚 {names[actor]} recovers **{healing}** HP!")
+
+        if round_log is not None:
+            round_details.append("\n".join(round_log + self._format_team_hp(units, hp)))
+
+        return battle_log, round_details
+
+    def _format_team_hp(self, units: List[Dict[str, Any]], hp: List[int]) -> List[str]:
+        """HP summary line per team"""
+        lines = []
+        for team in (1, 2):
+            members = [index for index, unit in enumerate(units) if unit["team"] == team]
+            alive = sum(1 for index in members if hp[index] > 0)
+            current = sum(max(0, hp[index]) for index in members)
+            total = sum(units[index]["max_hp"] for index in members)
+            lines.append(f"❤️ Team {team} ({alive}/{len(members)} standing): "
+                         f"{self.engine._create_hp_bar(current, total)}")
+        return lines
+
+# Global team battle engine instance
+team_battle_engine = TeamBattleEngine()
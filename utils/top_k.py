@@ -0,0 +1,37 @@
+# Top-K Selection for KoKoroMichi Bot
+import heapq
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.collection_stats import collection_stats, COLLECTION_TOP_SIZE, TOP_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+def top_k(items: Iterable[Any], k: int, key: Callable[[Any], Any], largest: bool = True) -> List[Any]:
+    """The k best items by key, best first (same result as sorted(...)[:k] in O(n log k))"""
+    if k <= 0:
+        return []
+    if k == 1:
+        select = max if largest else min
+        best = select(items, key=key, default=None)
+        return [] if best is None else [best]
+    return heapq.nlargest(k, items, key=key) if largest else heapq.nsmallest(k, items, key=key)
+
+
+def get_top_waifus(user_id: Optional[str], collection: List[Dict[str, Any]], field: str,
+                   k: int = COLLECTION_TOP_SIZE) -> List[Dict[str, Any]]:
+    """A player's k best characters by a field
+
+    Fields with a maintained top list (potential, level, affection, power) are read from the
+    collection aggregates, which are updated as characters change, and return summaries with
+    name, rarity and the field. Other fields, and lists that are not a player's whole
+    collection (user_id None, e.g. one summon batch), are selected from the records given.
+    """
+    if user_id is not None and field in TOP_FIELDS and k <= COLLECTION_TOP_SIZE:
+        return collection_stats.get_stats(user_id, collection)["top"][field][:k]
+    return top_k(collection, k, key=lambda waifu: _number(waifu.get(field, 0)))
+
+
+def _number(value) -> float:
+    return value if isinstance(value, (int, float)) else 0
@@ -0,0 +1,288 @@
+# Arena Tournaments for KoKoroMichi Bot
+import copy
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any, Callable, Awaitable
+
+from core.config import (
+    DATA_DIR, TOURNAMENT_MIN_PLAYERS, TOURNAMENT_MAX_PLAYERS, TOURNAMENT_TEAM_SIZE,
+    TOURNAMENT_SIGNUP_MINUTES, TOURNAMENT_MATCHES_PER_JOB, TOURNAMENT_PARTICIPATION_GOLD,
+    TOURNAMENT_ROUND_WIN_GOLD
+)
+from core.data_manager import data_manager
+from utils.power_cache import get_waifu_power
+from utils.rating_system import rating_system
+from utils.rng_service import rng_service, RNG_TOURNAMENT
+from utils.sim_executor import sim_executor
+
+logger = logging.getLogger(__name__)
+
+# Placement rewards when contest_system.json has none
+DEFAULT_PLACEMENT_REWARDS = {
+    "1st": {"coins": 5000, "title": "Arena Champion", "item": "Golden Trophy"},
+    "2nd": {"coins": 3000, "title": "Arena Runner-up", "item": "Silver Trophy"},
+    "3rd": {"coins": 2000, "title": "Arena Finalist", "item": "Bronze Trophy"}
+}
+
+
+def bracket_order(size: int) -> List[int]:
+    """Seed numbers in bracket slot order so the top seeds can only meet in the late rounds"""
+    order = [1]
+    while len(order) < size:
+        order = [seed for top in order for seed in (top, 2 * len(order) + 1 - top)]
+    return order
+
+
+def get_round_name(players: int) -> str:
+    """Name of a round by the number of bracket slots left"""
+    return {2: "Final", 4: "Semifinals", 8: "Quarterfinals"}.get(players, f"Round of {players}")
+
+
+class TournamentManager:
+    """Single-elimination arena tournaments, one per server at a time"""
+
+    def __init__(self, tournaments_file: str = str(DATA_DIR / "tournaments.json")):
+        self.tournaments_file = tournaments_file
+        self.tournaments: Dict[str, Dict[str, Any]] = self.load()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.tournaments_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Error loading tournaments: {e}")
+            return {}
+
+    def save(self):
+        try:
+            with open(self.tournaments_file, 'w', encoding='utf-8') as f:
+                json.dump(self.tournaments, f, separators=(",", ":"), ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Error saving tournaments: {e}")
+
+    def get_tournament(self, guild_id: Any) -> Optional[Dict[str, Any]]:
+        return self.tournaments.get(str(guild_id))
+
+    # Signups
+
+    def create_tournament(self, guild_id: Any, channel_id: Any, creator_id: Any,
+                          signup_minutes: int = TOURNAMENT_SIGNUP_MINUTES,
+                          max_players: int = TOURNAMENT_MAX_PLAYERS) -> Tuple[bool, str]:
+        """Open signups for a new tournament (replaces a finished one)"""
+        current = self.get_tournament(guild_id)
+        if current and current["status"] in ("signup", "running"):
+            return False, "A tournament is already running in this server."
+        now = datetime.now()
+        self.tournaments[str(guild_id)] = {
+            "id": (current or {}).get("id", 0) + 1,
+            "channel_id": str(channel_id),
+            "created_by": str(creator_id),
+            "status": "signup",
+            "created_at": now.isoformat(),
+            "signup_ends": (now + timedelta(minutes=signup_minutes)).isoformat(),
+            "max_players": max(TOURNAMENT_MIN_PLAYERS, min(max_players, TOURNAMENT_MAX_PLAYERS)),
+            "entrants": {},
+            "rounds": []
+        }
+        self.save()
+        return True, "Signups are open!"
+
+    def sign_up(self, guild_id: Any, user_id: Any, name: str, user_data: Dict[str, Any]) -> Tuple[bool, str]:
+        """Enter a player with their strongest characters, locked in until the tournament ends"""
+        tournament = self.get_tournament(guild_id)
+        if not tournament or tournament["status"] != "signup":
+            return False, "There is no tournament open for signups."
+        user_id = str(user_id)
+        if user_id in tournament["entrants"]:
+            return False, "You're already signed up!"
+        if len(tournament["entrants"]) >= tournament["max_players"]:
+            return False, "The tournament is full."
+
+        ranked = sorted(user_data.get("claimed_waifus", []), key=get_waifu_power, reverse=True)
+        team = [dict(waifu) for waifu in ranked[:TOURNAMENT_TEAM_SIZE]]
+        if not team:
+            return False, "You need at least one character to enter."
+
+        tournament["entrants"][user_id] = {
+            "name": name,
+            "rating": rating_system.get_rating(user_id)["rating"],
+            "power": sum(get_waifu_power(waifu) for waifu in team),
+            "team": team
+        }
+        self.save()
+        return True, f"Signed up with {', '.join(waifu.get('name', '?') for waifu in team)}!"
+
+    def withdraw(self, guild_id: Any, user_id: Any) -> bool:
+        tournament = self.get_tournament(guild_id)
+        if not tournament or tournament["status"] != "signup":
+            return False
+        if tournament["entrants"].pop(str(user_id), None) is None:
+            return False
+        self.save()
+        return True
+
+    def cancel(self, guild_id: Any) -> bool:
+        tournament = self.get_tournament(guild_id)
+        if not tournament or tournament["status"] != "signup":
+            return False
+        tournament["status"] = "cancelled"
+        self.save()
+        return True
+
+    # Bracket
+
+    def seed_entrants(self, tournament: Dict[str, Any]) -> List[str]:
+        """Entrant ids by seed: PvP rating, then team power"""
+        entrants = tournament["entrants"]
+        return sorted(entrants, key=lambda user_id: (-entrants[user_id]["rating"],
+                                                     -entrants[user_id]["power"], user_id))
+
+    def create_bracket(self, seeded: List[str]) -> List[Optional[str]]:
+        """First-round slots; missing seeds are byes (None) for the top seeds"""
+        size = 2
+        while size < len(seeded):
+            size *= 2
+        return [seeded[seed - 1] if seed <= len(seeded) else None for seed in bracket_order(size)]
+
+    async def run_tournament(self, guild_id: Any,
+                             on_round: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]]] = None
+                             ) -> Dict[str, Any]:
+        """Play every round; each round's battles are simulated concurrently in the worker pool"""
+        tournament = self.get_tournament(guild_id)
+        if not tournament or tournament["status"] != "signup":
+            raise ValueError("No tournament waiting to start")
+        if len(tournament["entrants"]) < TOURNAMENT_MIN_PLAYERS:
+            tournament["status"] = "cancelled"
+            self.save()
+            raise ValueError(f"At least {TOURNAMENT_MIN_PLAYERS} players are needed")
+
+        rng = rng_service.stream(guild_id, RNG_TOURNAMENT)
+        seeded = self.seed_entrants(tournament)
+        tournament.update({"status": "running", "seed": rng.stream_seed, "seeds": seeded, "rounds": []})
+        seed_of = {user_id: index + 1 for index, user_id in enumerate(seeded)}
+        entrants = tournament["entrants"]
+        slots = self.create_bracket(seeded)
+
+        try:
+            while len(slots) > 1:
+                pairs = [(slots[index], slots[index + 1]) for index in range(0, len(slots), 2)]
+                played = [(pair, rng.getrandbits(64)) for pair in pairs if pair[0] and pair[1]]
+                battles = [(entrants[first]["team"], entrants[second]["team"], seed)
+                           for (first, second), seed in played]
+                payloads = [{"battles": battles[start:start + TOURNAMENT_MATCHES_PER_JOB], "headless": True}
+                            for start in range(0, len(battles), TOURNAMENT_MATCHES_PER_JOB)]
+                # Always in the pool: a whole bracket run in-process would stall the event loop
+                results = [result for chunk in await sim_executor.run_many("team_battles", payloads,
+                                                                           allow_inline=False)
+                           for result in chunk]
+                outcomes = {pair: (seed, result) for (pair, seed), result in zip(played, results)}
+
+                matches = []
+                for first, second in pairs:
+                    if not (first and second):
+                        matches.append({"p1": first or second, "p2": None, "winner": first or second, "bye": True})
+                        continue
+                    seed, result = outcomes[(first, second)]
+                    if result["winner_id"] == 0:  # Draw: the higher seed advances
+                        winner = first if seed_of[first] < seed_of[second] else second
+                    else:
+                        winner = first if result["winner_id"] == 1 else second
+                    matches.append({"p1": first, "p2": second, "winner": winner, "seed": seed,
+                                    "turns": result["total_rounds"],
+                                    "hp": [sum(result["final_hp"]["team1"]), sum(result["final_hp"]["team2"])]})
+
+                round_info = {"name": get_round_name(len(slots)), "matches": matches}
+                tournament["rounds"].append(round_info)
+                slots = [match["winner"] for match in matches]
+                self.save()
+                if on_round:
+                    await on_round(tournament, round_info)
+        except Exception:
+            # Leave it restartable instead of stuck in "running"
+            tournament["status"] = "signup"
+            tournament["rounds"] = []
+            self.save()
+            raise
+
+        tournament["champion"] = slots[0]
+        tournament["placements"] = self.get_placements(tournament)
+        tournament["status"] = "finished"
+        tournament["finished_at"] = datetime.now().isoformat()
+        self.save()
+
+        rating_system.record_matches([(match["p1"], match["p2"], 1.0 if match["winner"] == match["p1"] else 0.0)
+                                      for round_info in tournament["rounds"] for match in round_info["matches"]
+                                      if not match.get("bye")], mode="tournament")
+        return tournament
+
+    def get_placements(self, tournament: Dict[str, Any]) -> Dict[str, str]:
+        """Finish of every entrant ("1st", "2nd", "3rd" or the round they fell in)"""
+        placements = {tournament["champion"]: "1st"}
+        rounds = tournament["rounds"]
+        for index, round_info in enumerate(rounds):
+            from_end = len(rounds) - index
+            for match in round_info["matches"]:
+                if match.get("bye"):
+                    continue
+                loser = match["p2"] if match["winner"] == match["p1"] else match["p1"]
+                placements[loser] = {1: "2nd", 2: "3rd"}.get(from_end, round_info["name"])
+        return placements
+
+    # Rewards
+
+    def distribute_rewards(self, guild_id: Any) -> Dict[str, Dict[str, Any]]:
+        """Give every entrant their rewards in one batched profile save
+
+        Returns the rewards paid, or an empty dict if there was nothing to pay or the save
+        failed; a failed tournament stays unrewarded so the payout can be retried.
+        """
+        tournament = self.get_tournament(guild_id)
+        if not tournament or tournament["status"] != "finished" or tournament.get("rewarded"):
+            return {}
+
+        contest_data = data_manager._load_json(data_manager.data_dir / "contest_system.json")
+        placement_rewards = (contest_data.get("global_events", {}).get("arena_tournaments", {}).get("rewards")
+                             or DEFAULT_PLACEMENT_REWARDS)
+        wins = {}
+        for round_info in tournament["rounds"]:
+            for match in round_info["matches"]:
+                if not match.get("bye"):
+                    wins[match["winner"]] = wins.get(match["winner"], 0) + 1
+
+        updates = {}
+        rewards = {}
+        for user_id, placement in tournament["placements"].items():
+            # Profiles share nested dicts with the data cache; a failed save must leave them untouched
+            user_data = copy.deepcopy(data_manager.get_user_data(user_id))
+            reward = placement_rewards.get(placement, {})
+            gold = TOURNAMENT_PARTICIPATION_GOLD + wins.get(user_id, 0) * TOURNAMENT_ROUND_WIN_GOLD + reward.get("coins", 0)
+
+            user_data["gold"] = user_data.get("gold", 0) + gold
+            if reward.get("item"):
+                inventory = user_data.setdefault("inventory", {})
+                inventory[reward["item"]] = inventory.get(reward["item"], 0) + 1
+            if reward.get("title") and reward["title"] not in user_data.setdefault("titles", []):
+                user_data["titles"].append(reward["title"])
+
+            stats = user_data.setdefault("tournament_stats", {"entered": 0, "championships": 0, "matches_won": 0})
+            stats["entered"] = stats.get("entered", 0) + 1
+            stats["matches_won"] = stats.get("matches_won", 0) + wins.get(user_id, 0)
+            if placement == "1st":
+                stats["championships"] = stats.get("championships", 0) + 1
+
+            updates[user_id] = user_data
+            rewards[user_id] = {"placement": placement, "gold": gold, "item": reward.get("item"),
+                                "title": reward.get("title")}
+
+        if not data_manager.save_many_user_data(updates):
+            logger.warning(f"Tournament rewards for guild {guild_id} could not be saved; will retry")
+            return {}
+        tournament["rewarded"] = True
+        self.save()
+        return rewards
+
+# Global tournament manager instance
+tournament_manager = TournamentManager()
@@ -0,0 +1,272 @@
+# Monte Carlo Win-Probability Estimator for KoKoroMichi Bot
+#
+# Usage: python -m utils.win_estimator [--battles N] [--pairs N] [--seed N]   (validates against simulate_battle)
+import sys
+import math
+import time
+import random
+import argparse
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to scalar headless battles
+    np = None
+
+from core.config import BATTLE_ROUNDS_MAX, CRIT_BASE_MULTIPLIER
+from utils.advanced_combat import BattleEngine, battle_engine, SKILL_ACTIVATION_CHANCE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ESTIMATE_BATTLES = 2000
+CONFIDENCE_Z = 1.96  # 95% confidence interval
+
+# Battles simulated one at a time when NumPy is unavailable
+SCALAR_FALLBACK_BATTLES = 300
+
+
+def wilson_interval(successes: float, trials: int, z: float = CONFIDENCE_Z) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion"""
+    if trials <= 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _get_generator(rng: Any) -> Any:
+    """NumPy generator for an RNG stream, the random module or a random.Random"""
+    if rng is None:
+        return np.random.default_rng()
+    if hasattr(rng, "numpy_generator"):
+        return rng.numpy_generator()
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+class _Fighter:
+    """Per-fighter constants of the battle model, precomputed once per estimate"""
+
+    def __init__(self, engine: BattleEngine, waifu: Dict[str, Any], stats: Dict[str, Any], use_skills: bool):
+        self.max_hp = stats["hp"]
+        self.atk = stats["atk"]
+        self.crit = stats["crit"]
+        self.speed = stats.get("speed", 50)
+        self.element = stats.get("element", "Neutral")
+        self.defense_factor = 1 - stats["def"] / (stats["def"] + 100)
+
+        # Skill activation chances and the bonuses each activation adds
+        chances, bonuses = [], []
+        for skill in (waifu.get("skills", []) if use_skills else []):
+            rarity = skill.get("rarity", "common") if isinstance(skill, dict) else "common"
+            modifiers = {"damage_multiplier": 0.0, "healing_amount": 0, "crit_bonus": 0,
+                         "defense_boost": 0, "lifesteal": 0}
+            damage_bonus, healing, crit_bonus, _, lifesteal = engine._apply_skill_effects(waifu, skill, modifiers)
+            chances.append(SKILL_ACTIVATION_CHANCE.get(rarity, 0.3))
+            bonuses.append((damage_bonus, healing, crit_bonus, lifesteal))
+        self.skill_count = len(chances)
+        if np is not None and chances:
+            self.skill_chances = np.array(chances)
+            self.skill_bonuses = np.array(bonuses, dtype=float)  # columns: damage, healing, crit, lifesteal
+
+
+def _take_turn(gen, attacker: _Fighter, defender: _Fighter, elemental: float,
+               hp_attacker, hp_defender, idx):
+    """Vectorized turn for the battles in idx; updates both HP arrays in place"""
+    count = len(idx)
+    multiplier = np.ones(count)
+    crit_chance = np.full(count, attacker.crit)
+    healing = None
+    lifesteal = None
+
+    # Skills roll first, in list order, like BattleEngine._roll_skills
+    if attacker.skill_count:
+        activated = gen.random((count, attacker.skill_count)) < attacker.skill_chances
+        totals = activated @ attacker.skill_bonuses
+        multiplier += totals[:, 0]
+        healing = totals[:, 1]
+        crit_chance += totals[:, 2]
+        lifesteal = totals[:, 3]
+
+    variance = gen.uniform(0.85, 1.15, count)
+    damage = attacker.atk * multiplier * variance * defender.defense_factor
+    crits = gen.random(count) < crit_chance
+    damage = np.where(crits, damage * CRIT_BASE_MULTIPLIER, damage) * elemental
+    damage = np.maximum(1, np.floor(damage))
+
+    hp_defender[idx] = np.maximum(0, hp_defender[idx] - damage)
+    if healing is not None:
+        heal = healing + np.floor(damage * lifesteal)
+        hp_attacker[idx] = np.minimum(attacker.max_hp, hp_attacker[idx] + heal)
+    return damage
+
+
+def estimate_win_probability(waifu1: Dict[str, Any], waifu2: Dict[str, Any],
+                             battles: int = DEFAULT_ESTIMATE_BATTLES, rng=None,
+                             max_rounds: Optional[int] = None, stats1: Optional[Dict[str, Any]] = None,
+                             stats2: Optional[Dict[str, Any]] = None, first_attacker: Optional[int] = None,
+                             use_skills: bool = True, engine: BattleEngine = battle_engine) -> Dict[str, Any]:
+    """Estimate fighter 1's chance to beat fighter 2 from many simulated battles
+
+    Mirrors BattleEngine.simulate_battle (speed turn order, skills, round cap). Pass buffed stats
+    (e.g. BuffSnapshot.stats) to override calculate_battle_stats, and first_attacker (1 or 2) for
+    callers with a fixed turn order.
+    """
+    max_rounds = max_rounds or BATTLE_ROUNDS_MAX
+    battles = max(1, battles)
+    start = time.perf_counter()
+
+    stats1 = stats1 or engine.calculate_battle_stats(waifu1)
+    stats2 = stats2 or engine.calculate_battle_stats(waifu2)
+
+    if first_attacker is None:
+        order = (0, 1) if stats1.get("speed", 50) >= stats2.get("speed", 50) else (1, 0)
+    else:
+        order = (0, 1) if first_attacker == 1 else (1, 0)
+
+    if np is None:
+        return _estimate_scalar((waifu1, waifu2), (stats1, stats2), min(battles, SCALAR_FALLBACK_BATTLES),
+                                rng, max_rounds, order, use_skills, engine, start)
+
+    fighters = (_Fighter(engine, waifu1, stats1, use_skills), _Fighter(engine, waifu2, stats2, use_skills))
+    elemental = (engine._get_elemental_modifier(fighters[0].element, fighters[1].element),
+                 engine._get_elemental_modifier(fighters[1].element, fighters[0].element))
+
+    gen = _get_generator(rng)
+    hp = (np.full(battles, float(fighters[0].max_hp)), np.full(battles, float(fighters[1].max_hp)))
+    damage_dealt = (np.zeros(battles), np.zeros(battles))
+    rounds = np.full(battles, max_rounds)
+    active = np.arange(battles)
+
+    for round_num in range(1, max_rounds + 1):
+        for attacker in order:
+            defender = 1 - attacker
+            damage = _take_turn(gen, fighters[attacker], fighters[defender], elemental[attacker],
+                                hp[attacker], hp[defender], active)
+            damage_dealt[attacker][active] += damage
+            ended = hp[defender][active] <= 0
+            if ended.any():
+                rounds[active[ended]] = round_num
+                active = active[~ended]
+            if not len(active):
+                break
+        if not len(active):
+            break
+
+    wins = int(np.count_nonzero(hp[0] > hp[1]))
+    losses = int(np.count_nonzero(hp[1] > hp[0]))
+    return _build_estimate(wins, losses, battles, float(rounds.mean()),
+                           float(damage_dealt[0].mean()), float(damage_dealt[1].mean()), start)
+
+
+def _estimate_scalar(fighters: Tuple[Dict[str, Any], Dict[str, Any]], stats: Tuple[Dict[str, Any], Dict[str, Any]],
+                     battles: int, rng, max_rounds: int, order: Tuple[int, int], use_skills: bool,
+                     engine: BattleEngine, start: float) -> Dict[str, Any]:
+    """Estimate with string-free scalar battles (used without NumPy)"""
+    rng = rng or random.Random()
+    wins = losses = total_rounds = 0
+    total_damage = [0, 0]
+    for _ in range(battles):
+        hp = [stats[0]["hp"], stats[1]["hp"]]
+        rounds = max_rounds
+        for round_num in range(1, max_rounds + 1):
+            for attacker in order:
+                defender = 1 - attacker
+                skill_modifiers = engine._roll_skills(fighters[attacker], rng) if use_skills else {}
+                damage, _ = engine._roll_damage(stats[attacker], stats[defender], skill_modifiers, rng)
+                hp[defender] = max(0, hp[defender] - damage)
+                if skill_modifiers:
+                    healing = skill_modifiers["healing_amount"] + int(damage * skill_modifiers["lifesteal"])
+                    hp[attacker] = min(stats[attacker]["hp"], hp[attacker] + healing)
+                total_damage[attacker] += damage
+                if hp[defender] <= 0:
+                    break
+            if hp[0] <= 0 or hp[1] <= 0:
+                rounds = round_num
+                break
+        wins += hp[0] > hp[1]
+        losses += hp[1] > hp[0]
+        total_rounds += rounds
+    return _build_estimate(wins, losses, battles, total_rounds / battles,
+                           total_damage[0] / battles, total_damage[1] / battles, start)
+
+
+def _build_estimate(wins: int, losses: int, battles: int, avg_rounds: float,
+                    avg_damage1: float, avg_damage2: float, start: float) -> Dict[str, Any]:
+    low, high = wilson_interval(wins, battles)
+    return {
+        "battles": battles,
+        "win_rate": wins / battles,
+        "loss_rate": losses / battles,
+        "draw_rate": (battles - wins - losses) / battles,
+        "confidence_interval": (low, high),
+        "avg_rounds": avg_rounds,
+        "avg_damage": {"fighter1": avg_damage1, "fighter2": avg_damage2},
+        "elapsed_ms": (time.perf_counter() - start) * 1000
+    }
+
+
+def format_win_chance(estimate: Dict[str, Any]) -> str:
+    """Short display text for an estimate, e.g. '62.4% (±2.1%)'"""
+    low, high = estimate["confidence_interval"]
+    return f"{estimate['win_rate'] * 100:.1f}% (±{(high - low) * 50:.1f}%)"
+
+
+def compare_with_scalar(waifu1: Dict[str, Any], waifu2: Dict[str, Any], battles: int = 5000,
+                        seed: Optional[int] = None, engine: BattleEngine = battle_engine) -> Dict[str, float]:
+    """Run the vectorized and scalar simulators on one matchup and test whether their win rates agree"""
+    rng = random.Random(seed)
+    vector = estimate_win_probability(waifu1, waifu2, battles, random.Random(rng.getrandbits(64)), engine=engine)
+    scalar_wins = 0
+    start = time.perf_counter()
+    for _ in range(battles):
+        scalar_wins += engine.simulate_battle(waifu1, waifu2, rng=rng, headless=True)["winner_id"] == 1
+    scalar_ms = (time.perf_counter() - start) * 1000
+
+    # Two-proportion z-test
+    p1, p2 = vector["win_rate"], scalar_wins / battles
+    pooled = (p1 + p2) / 2
+    se = math.sqrt(2 * pooled * (1 - pooled) / battles)
+    return {
+        "vector_win_rate": p1,
+        "scalar_win_rate": p2,
+        "z": (p1 - p2) / se if se else 0.0,
+        "vector_ms": vector["elapsed_ms"],
+        "scalar_ms": scalar_ms
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate the vectorized win estimator against simulate_battle")
+    parser.add_argument("--battles", type=int, default=5000, help="Battles per matchup for each simulator")
+    parser.add_argument("--pairs", type=int, default=20, help="Random catalog matchups to compare")
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("NumPy is not installed; the estimator uses scalar battles and there is nothing to validate")
+        return 1
+
+    from utils.summon_engine import summon_engine
+    rng = random.Random(args.seed)
+    fighters = summon_engine.pull_many({}, args.pairs * 2, rng=rng)
+    for fighter in fighters:
+        fighter["level"] = rng.randint(1, 40)
+
+    print(f"{'Matchup':<44}{'Vector':>9}{'Scalar':>9}{'z':>7}{'Vec ms':>9}{'Scal ms':>9}")
+    failures = 0
+    for i in range(args.pairs):
+        waifu1, waifu2 = fighters[2 * i], fighters[2 * i + 1]
+        result = compare_with_scalar(waifu1, waifu2, args.battles, rng.getrandbits(32))
+        failures += abs(result["z"]) > 3
+        matchup = f"{waifu1['name']} vs {waifu2['name']}"[:42]
+        print(f"{matchup:<44}{result['vector_win_rate']*100:>8.1f}%{result['scalar_win_rate']*100:>8.1f}%"
+              f"{result['z']:>7.2f}{result['vector_ms']:>9.2f}{result['scalar_ms']:>9.1f}")
+    print(f"\n{failures} of {args.pairs} matchups differ beyond |z| > 3")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())